@@ -0,0 +1,569 @@
+# benchmark.py - パース・抽出処理のベンチマーク
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from config import (
+    FILTER_KEYWORDS, TARGET_URLS, USER_AGENT, EXCLUDE_KEYWORDS, KEYWORD_WEIGHTS, EXCLUDE_WEIGHT,
+    RELEVANCE_TITLE_BOOST, RELEVANCE_THRESHOLD, KEYWORD_MATCH_MODES, NEAR_DUP_THRESHOLD,
+)
+from db.store import EventStore
+from processor.dedup import NearDuplicateDetector
+from processor.filter import EventFilter, _normalize
+from processor.matcher import AHOCORASICK_AVAILABLE, MATCH_AUTO, MATCH_SUBSTRING, KeywordMatcher
+from processor.translator import EventTranslator
+from scraper.extraction import DEFAULT_PLAN
+from scraper.fetcher import EventFetcher
+from scraper.parsers import available_backends, get_backend
+from scraper.snapshot import REPLAY, SnapshotStore
+from tests.stand_in_server import start_stand_in_server
+
+FIXTURE_DIR = "data/fixtures"
+
+
+def fixture_path(site: Dict) -> str:
+    """サイトURLからフィクスチャのファイル名を作る"""
+    slug = re.sub(r"[^0-9A-Za-z]+", "_", site["url"].split("://", 1)[-1]).strip("_")
+    return os.path.join(FIXTURE_DIR, f"{slug}.html")
+
+
+def load_fixtures(snapshot_path: Optional[str] = None) -> List[Dict]:
+    """保存済みのフィクスチャ（またはスナップショットアーカイブ）を (site, html) の形で読み込む"""
+    fixtures = []
+    if snapshot_path:
+        bodies = SnapshotStore(snapshot_path, REPLAY).bodies()
+        for site in TARGET_URLS:
+            if site["url"] in bodies:
+                fixtures.append({"site": site, "html": bodies[site["url"]]})
+    else:
+        for site in TARGET_URLS:
+            path = fixture_path(site)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    fixtures.append({"site": site, "html": f.read()})
+    if not fixtures:
+        print("⚠️ フィクスチャがありません。先に `python benchmark.py save` を実行してください")
+    return fixtures
+
+
+def save_fixtures():
+    """設定中の各サイトのHTMLを保存"""
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for site in TARGET_URLS:
+        try:
+            resp = requests.get(site["url"], headers={"User-Agent": USER_AGENT}, timeout=15)
+            resp.raise_for_status()
+            with open(fixture_path(site), "w", encoding="utf-8") as f:
+                f.write(resp.text)
+            print(f"✅ {site['name']}: {len(resp.text):,} chars")
+        except Exception as e:
+            print(f"❌ {site['name']}: {e}")
+
+
+def timeit(func: Callable, repeat: int) -> float:
+    """中央値（ミリ秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def strip_volatile(events: List[Dict]) -> List[Dict]:
+    """比較用に fetched_at を除いた title/content/url の組"""
+    return [{k: e.get(k) for k in ("title", "content", "url")} for e in events]
+
+
+def bench_parsers(repeat: int, snapshot_path: Optional[str] = None):
+    """パーサーバックエンドごとの抽出時間と結果の一致を比較"""
+    backends = available_backends()
+    print(f"🔧 backends: {', '.join(backends)}")
+    fetchers = {name: EventFetcher(parser_backend=name) for name in backends}
+
+    totals = {name: 0.0 for name in backends}
+    for fixture in load_fixtures(snapshot_path):
+        site, html = fixture["site"], fixture["html"]
+        baseline = None
+        row = []
+        for name, fetcher in fetchers.items():
+            run = lambda: fetcher.extract_events_from_html(html, site, page_url=site["url"])
+            elapsed = timeit(run, repeat)
+            totals[name] += elapsed
+            events = strip_volatile(run())
+            if baseline is None:
+                baseline = events
+            mark = "" if events == baseline else " ≠"
+            row.append(f"{name}={elapsed:7.1f}ms{mark}")
+        print(f"{site['name'][:30]:<30} {len(html):>9,} chars  " + "  ".join(row))
+
+    print("合計: " + "  ".join(f"{name}={ms:.1f}ms" for name, ms in totals.items()))
+
+
+# 1パス抽出プラン導入前の実装（比較用のリファレンス）
+LEGACY_TITLE_SELECTORS = [
+    "h1, h2, h3, h4",
+    ".title, .headline, .subject",
+    "[class*='title'], [class*='subject']",
+    "strong, b",
+    "a",
+]
+LEGACY_CONTENT_SELECTORS = [
+    "p, .content, .description, .summary",
+    "[class*='desc'], [class*='content']",
+]
+
+
+def legacy_extract(el):
+    """select_one を順番に呼ぶ従来方式の (title, content, href)"""
+    title = None
+    for selector in LEGACY_TITLE_SELECTORS:
+        title_el = el.select_one(selector)
+        if title_el:
+            text = title_el.get_text(strip=True)
+            if text and len(text) > 2:
+                title = text
+                break
+    if title is None:
+        full_text = el.get_text(strip=True)
+        if full_text and len(full_text) > 2:
+            title = full_text[:100].split("\n")[0].strip()
+
+    content = ""
+    for selector in LEGACY_CONTENT_SELECTORS:
+        content_el = el.select_one(selector)
+        if content_el:
+            text = content_el.get_text(" ", strip=True)
+            if text and len(text) > 5:
+                content = text
+                break
+
+    link_el = el.select_one("a")
+    href = link_el.get("href", "") if link_el else ""
+    return title, content, href
+
+
+def plan_extract(fetcher: EventFetcher, el):
+    """1パス抽出プランによる (title, content, href)"""
+    matches = DEFAULT_PLAN.collect(el)
+    link_el = matches.link()
+    return (
+        fetcher._extract_title(el, matches),
+        fetcher._extract_content(el, matches),
+        link_el.get("href", "") if link_el else "",
+    )
+
+
+def bench_extract(repeat: int, backend: str, snapshot_path: Optional[str] = None):
+    """要素単位の抽出を従来方式と1パス方式で比較"""
+    parser = get_backend(backend)
+    fetcher = EventFetcher(parser_backend=backend)
+    legacy_total = plan_total = 0.0
+    for fixture in load_fixtures(snapshot_path):
+        site = fixture["site"]
+        elements = parser.select(parser.parse(fixture["html"]), site["selector"])
+        legacy_ms = timeit(lambda: [legacy_extract(el) for el in elements], repeat)
+        plan_ms = timeit(lambda: [plan_extract(fetcher, el) for el in elements], repeat)
+        legacy_total += legacy_ms
+        plan_total += plan_ms
+        same = [legacy_extract(el) for el in elements] == [plan_extract(fetcher, el) for el in elements]
+        print(
+            f"{site['name'][:30]:<30} {len(elements):>5} elements  "
+            f"legacy={legacy_ms:7.1f}ms  plan={plan_ms:7.1f}ms  {'一致' if same else '不一致 ❌'}"
+        )
+    if plan_total:
+        print(f"合計: legacy={legacy_total:.1f}ms  plan={plan_total:.1f}ms  ({legacy_total / plan_total:.1f}x)")
+
+
+def portal_page(listing_html: str, seed: int = 0) -> str:
+    """
+    検索結果・百貨店ページ相当の重いページを作る
+
+    スクリプト・スタイル・メニュー・広告枠・フッターの中に一覧を埋め込む。
+    周りのリンクはどのサイトのセレクターにも一致しないURLにする（parse_only の有無で結果が変わらないように）。
+    """
+    rng = random.Random(seed)
+    words = ["쇼핑", "브랜드", "혜택", "멤버십", "고객센터", "매장안내", "shop", "brand", "benefit", "member"]
+    text = lambda n: " ".join(rng.choice(words) for _ in range(n))
+    scripts = "".join(
+        f"<script>window.__state{i} = {json.dumps([text(8) for _ in range(40)], ensure_ascii=False)};</script>"
+        for i in range(20)
+    )
+    style = "<style>" + "".join(f".c{i} {{ margin: {i}px; color: #{i:06x}; }}" for i in range(1500)) + "</style>"
+    menu = "<nav><ul>" + "".join(
+        f'<li class="gnb-item"><a href="/menu/{i}"><span>{text(2)}</span></a></li>' for i in range(300)
+    ) + "</ul></nav>"
+    ads = "<aside>" + "".join(
+        f'<div class="ad-card c{i}"><img src="/img/{i}.jpg" alt="{text(2)}"><p>{text(12)}</p>'
+        f'<button type="button">{text(1)}</button></div>'
+        for i in range(250)
+    ) + "</aside>"
+    footer = "<footer><dl>" + "".join(
+        f"<dt>{text(1)}</dt><dd><span>{text(6)}</span></dd>" for i in range(300)
+    ) + "</dl></footer>"
+    body = listing_html.split("<body>", 1)[-1].rsplit("</body>", 1)[0]
+    return (
+        f'<html><head><meta charset="utf-8">{style}{scripts}</head>'
+        f"<body>{menu}<main>{body}</main>{ads}{footer}</body></html>"
+    )
+
+
+def bench_parse_only(
+    repeat: int,
+    snapshot_path: Optional[str] = None,
+    portal: bool = False,
+    parse_only: Optional[Dict] = None,
+    site_name: Optional[str] = None,
+):
+    """
+    parse_only を設定したサイトについて、部分パースの有無で抽出時間・メモリのピークを比較
+
+    parse_only を渡すと、設定の代わりにその値を（site_name を含む名前のサイトに）当てて比較する。
+    """
+    fixtures = load_fixtures(snapshot_path)
+    if site_name:
+        fixtures = [f for f in fixtures if site_name in f["site"]["name"]]
+    if parse_only:
+        fixtures = [{**f, "site": {**f["site"], "parse_only": parse_only}} for f in fixtures]
+    fixtures = [f for f in fixtures if f["site"].get("parse_only")]
+    if not fixtures:
+        print("⚠️ parse_only を設定したサイトのフィクスチャがありません（--parse-only で候補を指定できます）")
+        return
+    for fixture in fixtures:
+        site = fixture["site"]
+        html = portal_page(fixture["html"]) if portal else fixture["html"]
+        full_site = {k: v for k, v in site.items() if k != "parse_only"}
+        print(f"{site['name'][:30]:<30} {len(html):>9,} chars  parse_only={site['parse_only']}")
+        for backend in available_backends():
+            fetcher = EventFetcher(parser_backend=backend)
+            row = []
+            results = []
+            for label, config in (("full", full_site), ("parse_only", site)):
+                run = lambda: fetcher.extract_events_from_html(html, config, page_url=site["url"])
+                elapsed = timeit(run, repeat)
+                tracemalloc.start()
+                results.append(strip_volatile(run()))
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                row.append(f"{label}={elapsed:7.1f}ms / {peak / 1024 / 1024:5.1f}MB")
+            mark = "" if results[0] == results[1] else " ≠"
+            print(f"  {backend:<12} " + "  ".join(row) + f"  ({len(results[0])} events){mark}")
+    print("※ メモリはPythonヒープのピーク（tracemalloc）。selectolax のツリーはC側なので含まれない")
+
+
+class LegacyStore:
+    """呼び出しごとに接続を開閉する従来方式の重複チェック・保存（比較用）"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    def is_new_event(self, event_hash: str) -> bool:
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM events WHERE event_hash = ?", (event_hash,))
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count == 0
+
+    def save_event(self, event: Dict) -> bool:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute(
+                "INSERT INTO events (event_hash, site_name, title) VALUES (?, ?, ?)",
+                (event["event_hash"], event["site_name"], event["title"]),
+            )
+            conn.commit()
+            return True
+        except sqlite3.IntegrityError:
+            return False
+        finally:
+            conn.close()
+
+
+def bench_store(count: int):
+    """重複チェック・保存のスループット（従来方式 / プール接続）"""
+    events = [
+        {"event_hash": f"{i:032x}", "site_name": "bench", "title": f"event {i}"}
+        for i in range(count)
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        pooled_path = os.path.join(tmp, "pooled.db")
+
+        # 従来方式のDB（ロールバックジャーナル）
+        EventStore(legacy_path).close()
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.close()
+
+        results = {}
+        for label, store in (("legacy", LegacyStore(legacy_path)), ("pooled", EventStore(pooled_path))):
+            half = events[: count // 2]
+            start = time.perf_counter()
+            for event in half:
+                store.save_event(event)
+            insert_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            new = sum(store.is_new_event(event["event_hash"]) for event in events)
+            lookup_s = time.perf_counter() - start
+            results[label] = lookup_s
+            print(
+                f"{label:<7} insert {len(half):,}: {len(half) / insert_s:9,.0f}/s   "
+                f"dedup check {count:,}: {count / lookup_s:9,.0f}/s   (new={new:,})"
+            )
+            if isinstance(store, EventStore):
+                store.close()
+        print(f"dedup check speedup: {results['legacy'] / results['pooled']:.1f}x")
+
+
+def load_corpus_events(snapshot_path: Optional[str] = None) -> List[Dict]:
+    """フィクスチャ（またはスナップショット）から抽出したイベント"""
+    fetcher = EventFetcher()
+    events = []
+    for fixture in load_fixtures(snapshot_path):
+        site = fixture["site"]
+        events.extend(fetcher.extract_events_from_html(fixture["html"], site, page_url=site["url"]))
+    return events
+
+
+def synthetic_events(count: int, keywords: List[str], seed: int = 0) -> List[Dict]:
+    """キーワードを3割程度に混ぜた合成イベント（フィクスチャがない場合用）"""
+    rng = random.Random(seed)
+    filler = (
+        "서울 안내 공지 오픈 매장 고객 운영 시간 변경 정보 일정 참여 방법 확인 "
+        "the store notice update opening hours information お知らせ 店舗 1234 2024"
+    ).split()
+    events = []
+    for _ in range(count):
+        words = [rng.choice(filler) for _ in range(rng.randint(20, 80))]
+        if rng.random() < 0.3:
+            words.insert(rng.randrange(len(words)), rng.choice(keywords))
+        events.append({"title": " ".join(words[:8]), "content": " ".join(words[8:])})
+    return events
+
+
+def legacy_is_interesting(keywords: List[str], event: Dict) -> bool:
+    """キーワードごとに部分文字列を調べる従来方式（最初のヒットで終了）"""
+    text = f"{_normalize(event.get('title', ''))} {_normalize(event.get('content', ''))}".strip()
+    return any(kw in text for kw in keywords)
+
+
+def legacy_find_all(keywords: List[str], event: Dict) -> Dict[str, List[int]]:
+    """従来方式で全キーワードの位置を集める（オートマトンと同じ出力を得る場合のコスト）"""
+    text = f"{_normalize(event.get('title', ''))} {_normalize(event.get('content', ''))}".strip()
+    positions: Dict[str, List[int]] = {}
+    for kw in keywords:
+        start = text.find(kw)
+        while start != -1:
+            positions.setdefault(kw, []).append(start)
+            start = text.find(kw, start + 1)
+    return positions
+
+
+def bench_filter(count: int, snapshot_path: Optional[str] = None, synthetic: bool = False):
+    """注目ワード判定（従来方式 / オートマトン）のスループット"""
+    keywords = [_normalize(k) for k in FILTER_KEYWORDS if k]
+    corpus = []
+    if not synthetic and (snapshot_path or os.path.isdir(FIXTURE_DIR)):
+        corpus = load_corpus_events(snapshot_path)
+    if corpus:
+        events = [dict(corpus[i % len(corpus)]) for i in range(count)]
+        print(f"📄 corpus: {len(corpus):,} events → {count:,}")
+    else:
+        events = synthetic_events(count, keywords)
+        print(f"🧪 synthetic: {count:,} events")
+
+    start = time.perf_counter()
+    legacy = [legacy_is_interesting(keywords, e) for e in events]
+    legacy_s = time.perf_counter() - start
+    print(f"{'legacy':<14} {count / legacy_s:9,.0f} events/s  hits={sum(legacy):,}（最初のヒットで終了）")
+
+    start = time.perf_counter()
+    for e in events:
+        legacy_find_all(keywords, e)
+    legacy_all_s = time.perf_counter() - start
+    print(f"{'legacy (all)':<14} {count / legacy_all_s:9,.0f} events/s（全キーワードと位置を取得）")
+
+    backends = [False] + ([True] if AHOCORASICK_AVAILABLE else [])
+    for use_native in backends:
+        # substring は従来方式と同じ判定になるはず。auto は単語境界の確認を含めた速度
+        for mode in (MATCH_SUBSTRING, MATCH_AUTO):
+            event_filter = EventFilter(FILTER_KEYWORDS)
+            event_filter.matcher = KeywordMatcher(event_filter.keywords, use_native=use_native, default_mode=mode)
+            start = time.perf_counter()
+            result = [event_filter.is_interesting(e) for e in events]
+            elapsed = time.perf_counter() - start
+            same = ("一致" if result == legacy else "不一致 ❌") if mode == MATCH_SUBSTRING else ""
+            print(
+                f"{event_filter.matcher.backend + ' ' + mode:<24} {count / elapsed:9,.0f} events/s  hits={sum(result):,}  "
+                f"vs legacy {legacy_s / elapsed:.1f}x  vs legacy (all) {legacy_all_s / elapsed:.1f}x  {same}"
+            )
+
+
+def translator_calls(events: List[Dict], event_filter: Optional[EventFilter]) -> Tuple[List[Dict], List[Dict]]:
+    """run_single_check と同じ順（フィルター → 近似重複の除外）で (注目イベント, 翻訳対象) を返す"""
+    events = [dict(e, event_hash=str(i)) for i, e in enumerate(events)]
+    if event_filter is None:
+        hits = [e for e in events if legacy_is_interesting(FILTER_KEYWORDS, e)]
+    else:
+        hits = event_filter.filter_events(events)
+    if NEAR_DUP_THRESHOLD is None:
+        return hits, hits
+    primary, _ = NearDuplicateDetector(threshold=NEAR_DUP_THRESHOLD).group(hits)
+    return hits, primary
+
+
+def bench_match_modes(snapshot_path: Optional[str] = None):
+    """照合モードで翻訳（ChatGPT API）の呼び出しがどれだけ減るか（1イベント1回、top-K なし）"""
+    events = load_corpus_events(snapshot_path)
+    print(f"📄 corpus: {len(events):,} events")
+
+    def make_filter(match_modes: Optional[Dict[str, str]], default_mode: str) -> EventFilter:
+        return EventFilter(
+            FILTER_KEYWORDS, exclude_keywords=EXCLUDE_KEYWORDS, weights=KEYWORD_WEIGHTS,
+            threshold=RELEVANCE_THRESHOLD, exclude_weight=EXCLUDE_WEIGHT, title_boost=RELEVANCE_TITLE_BOOST,
+            match_modes=match_modes, default_mode=default_mode,
+        )
+
+    substring_filter = make_filter(None, MATCH_SUBSTRING)
+    mode_filter = make_filter(KEYWORD_MATCH_MODES, MATCH_AUTO)
+    runs = [
+        ("boolean", translator_calls(events, None)),
+        ("substring", translator_calls(events, substring_filter)),
+        ("match modes", translator_calls(events, mode_filter)),
+    ]
+    baseline = len(runs[0][1][1])
+    for name, (hits, calls) in runs:
+        saved = baseline - len(calls)
+        rate = f"{saved / baseline:.0%}" if baseline else "-"
+        print(f"{name:<12} hits={len(hits):5,}  translator calls={len(calls):5,}  saved={saved:5,} ({rate})")
+
+    # 照合モードで外れたマッチ（キーワード別）と、それで対象外になったイベント
+    removed: Dict[str, int] = {}
+    for event in events:
+        before = {m.keyword for m in substring_filter.match(event)}
+        after = {m.keyword for m in mode_filter.match(event)}
+        for keyword in before - after:
+            removed[keyword] = removed.get(keyword, 0) + 1
+    if removed:
+        top = sorted(removed.items(), key=lambda kv: kv[1], reverse=True)[:10]
+        print("外れたマッチ: " + ", ".join(f"{k}={n}" for k, n in top))
+
+    # 誤マッチがなくなって対象外になったイベントと、除外ワードの誤マッチがなくなって対象になったイベント
+    before = {e["event_hash"]: e for e in runs[1][1][0]}
+    after = {e["event_hash"]: e for e in runs[2][1][0]}
+    for label, mark, a, b in (("対象外になった", "-", before, after), ("対象になった", "+", after, before)):
+        changed = [e for h, e in a.items() if h not in b]
+        print(f"{label}: {len(changed):,}")
+        for event in changed[:5]:
+            print(f"  {mark} {event.get('title', '')[:60]}  kw={event['matched_keywords']}")
+
+
+def bench_translate(count: int, concurrency: int, batch_size: int, latency: float, rps_limit: Optional[int]):
+    """翻訳の逐次 / 一括 / 並行の比較（ローカルの代役サーバーに対して）"""
+    server = start_stand_in_server(latency, rps_limit)
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    print(f"🧪 {count} events, latency {latency}s, server limit {rps_limit or '-'} req/s")
+
+    scenarios = [
+        ("single", 1, None),
+        ("batch", 1, None),
+        (f"batch x{concurrency}", concurrency, None),
+    ]
+    if rps_limit:
+        # クライアント側の上限をサーバーの上限内にすると 429 を受けずに済む
+        scenarios.append((f"batch x{concurrency} rpm", concurrency, rps_limit * 60 * 0.9))
+
+    for name, workers, rpm in scenarios:
+        events = [{"title": f"팝업스토어 이벤트 {i}", "content": "한정 굿즈 선착순 증정 " * 5} for i in range(count)]
+        translator = EventTranslator(
+            "stand-in", base_url=base_url, concurrency=workers, requests_per_minute=rpm,
+            batch_max_events=batch_size,
+        )
+        server.stats.update(requests=0, rate_limited=0)
+        server.window.clear()
+        server.log.clear()
+        start = time.perf_counter()
+        if name == "single":
+            result = [translator.translate_and_summarize(event) for event in events]
+        else:
+            result = translator.translate_batch(events)
+        elapsed = time.perf_counter() - start
+        in_order = result is events or all(a is b for a, b in zip(result, events))
+        translated = sum(1 for e in result if e.get("translated_title") == f"JA:{e['title']}")
+        print(
+            f"{name:<18} {elapsed:6.2f}s  requests={server.stats['requests']:4}  "
+            f"429={server.stats['rate_limited']:3}  translated={translated}/{count}  "
+            f"{'順序一致' if in_order else '順序不一致 ❌'}"
+        )
+    server.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Korean Event Watcher ベンチマーク")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("save", help="各サイトのHTMLをフィクスチャとして保存")
+    p = sub.add_parser("parsers", help="パーサーバックエンドの比較")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--snapshot", metavar="PATH", help="フィクスチャの代わりに main.py --record のアーカイブを使う")
+    p = sub.add_parser("extract", help="要素抽出（従来方式 / 1パス方式）の比較")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--backend", default="html.parser", choices=available_backends())
+    p.add_argument("--snapshot", metavar="PATH", help="フィクスチャの代わりに main.py --record のアーカイブを使う")
+    p = sub.add_parser("parseonly", help="parse_only（部分パース）の有無による抽出時間・メモリの比較")
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--snapshot", metavar="PATH", help="フィクスチャの代わりに main.py --record のアーカイブを使う")
+    p.add_argument("--portal", action="store_true", help="一覧をヘッダー・広告・フッター付きの重いページに埋め込む")
+    p.add_argument("--parse-only", type=json.loads, metavar="JSON", help='候補の parse_only（例: \'{"name": "a"}\'）')
+    p.add_argument("--site", metavar="NAME", help="名前にこの文字列を含むサイトだけを比較する")
+    p = sub.add_parser("store", help="EventStore の重複チェック・保存スループット")
+    p.add_argument("--count", type=int, default=10000)
+    p = sub.add_parser("filter", help="注目ワード判定（従来方式 / オートマトン）の比較")
+    p.add_argument("--count", type=int, default=50000)
+    p.add_argument("--snapshot", metavar="PATH", help="フィクスチャの代わりに main.py --record のアーカイブを使う")
+    p.add_argument("--synthetic", action="store_true", help="フィクスチャがあっても合成イベントを使う")
+    p = sub.add_parser("translate", help="翻訳の逐次 / 一括 / 並行の比較（ローカルの代役サーバー）")
+    p.add_argument("--count", type=int, default=60)
+    p.add_argument("--concurrency", type=int, default=4)
+    p.add_argument("--batch-size", type=int, default=5)
+    p.add_argument("--latency", type=float, default=0.3, help="代役サーバーの応答時間（秒）")
+    p.add_argument("--rps-limit", type=int, default=3, help="代役サーバーの毎秒リクエスト上限（0 で無制限）")
+    p = sub.add_parser("matchmodes", help="照合モード（単語境界）による翻訳呼び出しの削減数")
+    p.add_argument("--snapshot", metavar="PATH", help="フィクスチャの代わりに main.py --record のアーカイブを使う")
+    args = parser.parse_args()
+
+    # 抽出処理のログは計測の邪魔になるので抑制
+    logging.basicConfig(level=logging.ERROR)
+
+    if args.command == "save":
+        save_fixtures()
+    elif args.command == "parsers":
+        bench_parsers(args.repeat, args.snapshot)
+    elif args.command == "extract":
+        bench_extract(args.repeat, args.backend, args.snapshot)
+    elif args.command == "parseonly":
+        bench_parse_only(args.repeat, args.snapshot, args.portal, args.parse_only, args.site)
+    elif args.command == "store":
+        bench_store(args.count)
+    elif args.command == "filter":
+        bench_filter(args.count, args.snapshot, args.synthetic)
+    elif args.command == "translate":
+        bench_translate(args.count, args.concurrency, args.batch_size, args.latency, args.rps_limit or None)
+    elif args.command == "matchmodes":
+        bench_match_modes(args.snapshot)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,19 +7,68 @@ SLACK_WEBHOOK_URL = os.getenv("SLACK_WEBHOOK_URL", "")
 
 # === Database ===
 DB_PATH = "data/events.db"
+PREFILTER_FP_RATE = 0.01  # 既知ハッシュのブルームフィルター誤判定率（None で無効）
+NEAR_DUP_THRESHOLD = 0.7  # タイトルの類似度（Jaccard）がこれ以上なら近似重複（None で無効）
+REVISION_MATERIAL_THRESHOLD = 0.8  # 内容の類似度がこれ未満に変わったら更新として再処理する
 
 # === 実行間隔設定 (main.pyで必要) ===
-CHECK_INTERVAL = 7200  # 2時間 = 7200秒
+CHECK_INTERVAL = 7200  # 2時間 = 7200秒（適応スケジューラ使用時は各サイトの初期間隔）
+
+# === 適応スケジューラ設定 ===
+# 新着の多いサイトは間隔を短く、静かなサイトは長くする（サイト個別に "interval" /
+# "min_interval" / "max_interval" を TARGET_URLS に指定可能）
+SCHEDULER_ENABLED = True
+SCHEDULER_MIN_INTERVAL = 600  # 最短10分
+SCHEDULER_MAX_INTERVAL = 86400  # 最長1日
+SCHEDULER_TARGET_NEW_EVENTS = 1.0  # 1回のチェックあたりの目標新着件数
 
 # === Scraping Settings ===
 DEFAULT_DELAY = 2.0  # サイト間の待機時間（秒）
 REQUEST_TIMEOUT = 15
 MAX_RETRIES = 3
+HOST_RATE_PER_SECOND = 1.0  # ホストごとの最大リクエスト数/秒（トークンバケット）
+HOST_BURST = 2  # ホストごとのバースト上限
+CIRCUIT_FAILURE_THRESHOLD = 3  # 取得（リトライ込み）がこの回数続けて失敗したらホストへのリクエストを止める
+CIRCUIT_INITIAL_COOLDOWN = 300  # 最初に開いたときの再試行までの秒数（再試行も失敗するたびに倍）
+CIRCUIT_COOLDOWN = 1800  # 再試行までの最長の秒数
+HTTP_CACHE_PATH = "data/http_cache.json"  # ETag/Last-Modified・本文ダイジェストの保存先
+
+# 本文ダイジェスト計算前に除去する揮発トークン（正規表現）
+# サイト個別のパターンは TARGET_URLS の "volatile_patterns" に追加できる
+VOLATILE_PATTERNS = [
+    r'(?i)<meta[^>]+name="(?:csrf|_csrf|csrf-token|csrf_token)"[^>]*>',
+    r'(?i)<input[^>]+name="(?:_csrf|csrf_token|_token|__VIEWSTATE|__EVENTVALIDATION|__VIEWSTATEGENERATOR)"[^>]*>',
+    r'(?i)\bnonce="[^"]*"',
+    r'[?&](?:v|ver|t|ts|_|timestamp)=\d{8,13}\b',
+    r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})?',
+]
+
+# JavaScript必須サイト（requires_js）用のヘッドレスブラウザ
+USE_SELENIUM = False  # True にすると requires_js のサイトをSeleniumで取得
+BROWSER_POOL_SIZE = 2  # 同時に起動しておくブラウザ数
+BROWSER_MAX_PAGES = 50  # このページ数を処理したブラウザは作り直す
+SELENIUM_WAIT_TIMEOUT = 10  # セレクターの出現を待つ最大秒数
+
+# 抽出処理（サイト個別に "streaming" と "parse_only" を TARGET_URLS に指定可能。
+# "parse_only" は SoupStrainer の引数で、例: {"name": "ul", "class_": "news_list"}。
+# セレクターの一致先がすべて strainer の範囲に入るサイトにだけ指定し、記録した実ページで
+# `python benchmark.py parseonly --snapshot ... --parse-only '...'` が一致（≠ なし）になることを確認する）
+STREAMING_PARSE = True  # マッチを順に処理し max_items 件の有効イベントで打ち切る
+MAX_RESPONSE_BYTES = 5 * 1024 * 1024  # これを超える本文は切り捨てる
+
+# HTMLパーサー（"html.parser" / "lxml" / "selectolax"）
+# サイト個別に変える場合は TARGET_URLS の "parser" で指定する。未インストールなら html.parser を使用
+# lxml / selectolax は速いが、壊れたHTMLの補正が html.parser と異なり抽出結果が変わりうるため、
+# `python benchmark.py parsers` で結果が一致することを確かめてからサイト単位で切り替える
+HTML_PARSER = "html.parser"
 
 # === User Agent設定 ===
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
 
 # === Target URLs (修正版) ===
+# イベントはリンク先の正規化URLで同一性を判定する（計測用パラメータは常に除去）。
+# サイト個別に "canonical_params"（残すクエリパラメータ）と "drop_params"（除去する
+# クエリパラメータ）を指定できる
 TARGET_URLS = [
     # --- 映画館 ---
     {
@@ -231,6 +280,83 @@ EXCLUDE_KEYWORDS = [
     "도박","gambling","베팅","betting"
 ]
 
+# === 関連度スコア ===
+# マッチしたキーワードの重みの合計（タイトル内のマッチは RELEVANCE_TITLE_BOOST 倍）が
+# RELEVANCE_THRESHOLD 以上のイベントだけを翻訳・通知する。重みを指定しない注目ワードは 1.0
+KEYWORD_WEIGHTS = {
+    # 希少性が高い
+    "수량한정": 3.0, "数量限定": 3.0, "limited quantity": 3.0,
+    "선착": 3.0, "first come": 3.0,
+    "사인회": 3.0, "サイン会": 3.0, "signing": 2.0, "autograph": 2.0,
+    "한정": 2.0, "限定": 2.0, "limited": 2.0, "exclusive": 2.0,
+    "기간한정": 2.5, "期間限定": 2.5, "limited time": 2.5,
+    "팝업스토어": 2.5, "ポップアップストア": 2.5, "popup store": 2.5,
+    "팝업": 2.0, "ポップアップ": 2.0, "popup": 2.0, "pop-up": 2.0,
+    "팬미팅": 2.0, "ファンミーティング": 2.0, "fanmeeting": 2.0, "fan meeting": 2.0,
+    "추첨": 2.0, "抽選": 2.0, "lottery": 2.0, "응모": 2.0, "応募": 2.0,
+    "조기마감": 2.0, "早期終了": 2.0, "early bird": 2.0,
+    # ありふれていて単独では弱い
+    "이벤트": 0.5, "event": 0.3, "new": 0.3, "only": 0.3, "special": 0.5, "특별": 0.5,
+    "sale": 0.5, "할인": 0.5, "discount": 0.5, "특가": 0.8,
+    "gift": 0.5, "present": 0.3, "선물": 0.5, "goods": 0.5,
+    "주말": 0.3, "週末": 0.3, "weekend": 0.3,
+    "예약": 0.5, "予約": 0.5, "reservation": 0.5, "booking": 0.5,
+    "당일": 0.5, "当日": 0.5, "launch": 0.5, "출시": 0.5, "album": 0.5, "pc": 0.5,
+}
+EXCLUDE_WEIGHT = -5.0  # 除外ワード1つあたりの重み
+RELEVANCE_TITLE_BOOST = 1.5
+RELEVANCE_THRESHOLD = 1.5  # None なら注目ワードが1つでもあれば対象（除外ワードを含むものは除く）
+RELEVANCE_TOP_K = 20  # 1回のチェックで翻訳・通知する最大件数（関連度順、None で無制限）
+
+# キーワードの照合モード（未指定は "auto"）
+#   "auto": ラテン文字だけのキーワードは "word"、ハングル・かな・漢字を含むものは "substring"
+#   "word": 前後が単語の区切りのときだけ（"pc" は "npc" に、"ad" は "download" にマッチしない。
+#           4文字以上は複数形の "s" を、ハングルは直後の助詞を許す）
+#   "prefix": 直前が区切りのときだけ（後ろに続いてもよい）
+#   "substring": どこに含まれていてもマッチ
+# 区切りは文字種で判定する（"bts콘서트" の "bts" は区切られている）
+KEYWORD_MATCH_MODES = {
+    "아이브": "word",  # "아이브로우"（アイブロウ）を除く
+    "collab": "prefix",
+    "merch": "prefix",
+}
+
+# === 購読プロファイル ===
+# 1回の取得・フィルターで複数の購読先に通知する。各プロファイルは "keywords" /
+# "exclude_keywords" / "weights" / "threshold" / "top_k" / "slack_webhook_url" を持てる。
+# 省略した項目は上の FILTER_KEYWORDS / EXCLUDE_KEYWORDS / KEYWORD_WEIGHTS /
+# RELEVANCE_THRESHOLD / RELEVANCE_TOP_K / SLACK_WEBHOOK_URL を使う
+SUBSCRIPTION_PROFILES = [
+    {
+        "name": "default",
+    },
+    {
+        "name": "character_goods",
+        "enabled": False,
+        "keywords": [
+            "포켓몬","ポケモン","pokemon","피카츄","ピカチュウ","pikachu",
+            "산리오","サンリオ","sanrio","hello kitty","헬로키티",
+            "라인프렌즈","line friends","카카오프렌즈","kakao friends","bt21",
+            "굿즈","グッズ","goods","merch","팝업","popup","한정","限定","limited",
+        ],
+        "weights": {"굿즈": 2.0, "팝업": 2.0, "popup": 2.0, "한정": 2.0, "限定": 2.0, "limited": 2.0},
+        "slack_webhook_url": os.getenv("SLACK_WEBHOOK_URL_CHARACTER", ""),
+    },
+    {
+        "name": "cinema_giveaway",
+        "enabled": False,
+        "keywords": [
+            "시사회","試写会","무대인사","舞台挨拶","증정","プレゼント","경품",
+            "오리지널 티켓","아트카드","포스터","ポスター","굿즈","グッズ","선착",
+        ],
+        "weights": {"시사회": 3.0, "무대인사": 3.0, "오리지널 티켓": 2.5, "선착": 2.0},
+        "slack_webhook_url": os.getenv("SLACK_WEBHOOK_URL_CINEMA", ""),
+    },
+]
+
+# 有効なプロファイルのみ
+SUBSCRIPTION_PROFILES = [profile for profile in SUBSCRIPTION_PROFILES if profile.get("enabled", True)]
+
 # === 通知設定 ===
 NOTIFICATION_ENABLED = True
 SLACK_ENABLED = bool(SLACK_WEBHOOK_URL and SLACK_WEBHOOK_URL != "")
@@ -240,6 +366,18 @@ PRINT_ENABLED = True
 OPENAI_MODEL = "gpt-3.5-turbo"
 OPENAI_MAX_TOKENS = 500
 OPENAI_TEMPERATURE = 0.3
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "")  # 互換APIやプロキシを使う場合（空なら公式API）
+# 翻訳の並列実行（上限は利用中のプランのレート制限に合わせる。429 は Retry-After に従って再送）
+TRANSLATION_CONCURRENCY = 4  # 同時に送るリクエスト数
+OPENAI_REQUESTS_PER_MINUTE = 500  # None で無制限
+OPENAI_TOKENS_PER_MINUTE = 200000  # 入力の見積もり + max_tokens で数える（None で無制限）
+# 一括翻訳（複数イベントを1リクエストにまとめ、JSONで受け取る）
+TRANSLATION_BATCH_TOKEN_BUDGET = 8000  # 1リクエストの入力 + 出力トークンの上限（見積もり）
+TRANSLATION_BATCH_MAX_EVENTS = 20  # 1リクエストにまとめる最大件数
+# 翻訳キャッシュ（正規化した原文 + モデル + プロンプトのバージョンで引く。None で無効）
+TRANSLATION_CACHE_PATH = "data/translation_cache.db"
+TRANSLATION_CACHE_MAX_ENTRIES = 50000  # 超えたら最終利用の古い順に削除
+TRANSLATION_CACHE_MEMORY_ENTRIES = 1000  # メモリ上に置く件数
 
 # === ログ設定 ===
 LOG_LEVEL = "INFO"
@@ -249,10 +387,13 @@ LOG_FILE = "logs/korean_event_watcher.log"
 # === その他の設定 ===
 # データベース関連
 DB_BACKUP_DAYS = 30  # 30日以上古いデータは削除
-MAX_DB_SIZE_MB = 100  # DBサイズ上限
+MAX_DB_SIZE_MB = 100  # DBサイズ上限（超えたら古い順に削除）
+TOMBSTONE_RETENTION_DAYS = 365  # 削除済みイベントのハッシュを残す日数（過ぎたら再び新規扱いになりうる）
+MAINTENANCE_INTERVAL = 3600  # 削除・圧縮を行う間隔（秒、継続実行時。--once では実行の最後に1回）
+MAINTENANCE_BATCH_SIZE = 500  # 1トランザクションで削除する件数
 
 # スクレイピング関連
-CONCURRENT_REQUESTS = 3  # 同時リクエスト数
+CONCURRENT_REQUESTS = 3  # 同時リクエスト数（異なるホストを並列取得、同一ホストは直列）
 RETRY_DELAY = 5  # リトライ間隔（秒）
 
 # 翻訳関連
@@ -0,0 +1,42 @@
+# db/bloom.py - 既知イベントハッシュのメモリ常駐プレフィルター
+import hashlib
+import math
+
+
+class BloomFilter:
+    """
+    ブルームフィルター
+
+    「含まれていない」は確実、「含まれている」は fp_rate 程度の確率で誤判定する。
+    capacity 件を超えて追加すると誤判定率が上がるので、呼び出し側で作り直すこと。
+    """
+
+    def __init__(self, capacity: int, fp_rate: float = 0.01):
+        self.capacity = max(1, int(capacity))
+        self.fp_rate = fp_rate
+        # 最適なビット数とハッシュ関数の数
+        self.num_bits = max(8, int(math.ceil(-self.capacity * math.log(fp_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / self.capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # ダブルハッシュ法で num_hashes 個の位置を作る
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
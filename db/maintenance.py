@@ -0,0 +1,125 @@
+# db/maintenance.py - DBの保持期間・容量上限を守るバックグラウンドメンテナンス
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from db.store import EventStore
+
+
+class DatabaseMaintainer:
+    """
+    バックグラウンドスレッドで定期的にDBを整理する
+
+    1. 保持期間（retention_days）を過ぎたイベントを batch_size 件ずつ削除
+    2. 保持期間（tombstone_retention_days）を過ぎた削除済みハッシュを削除
+    3. 空いたページを incremental vacuum でファイルから返す
+    4. それでも max_size_mb を超えていれば古い順に削除して上限に収める
+
+    1回の書き込みトランザクションは1バッチ分だけなので、チェックサイクルの保存を長く待たせない。
+    削除したイベントのハッシュは tombstone_retention_days の間 EventStore 側に残るので、
+    その間は再び新規として扱われることはない。削除済みハッシュは容量上限の計算に含めない
+    （含めると、ハッシュが増えるほど残っているイベントを全て削除しても上限に収まらなくなる）。
+    """
+
+    def __init__(
+        self,
+        store: EventStore,
+        retention_days: Optional[int] = 30,
+        max_size_mb: Optional[float] = 100,
+        tombstone_retention_days: Optional[int] = 365,
+        interval: float = 3600.0,
+        batch_size: int = 500,
+        batch_pause: float = 0.1,
+        vacuum_pages: int = 1000,
+    ):
+        self.store = store
+        self.retention_days = retention_days
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.tombstone_retention_days = tombstone_retention_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.vacuum_pages = vacuum_pages
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        """バックグラウンドスレッドを開始"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="db-maintenance", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """スレッドを停止（実行中のバッチの完了を待つ）"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.error(f"Database maintenance failed: {e}")
+            self._stop.wait(self.interval)
+
+    def run_once(self) -> Dict[str, int]:
+        """1回分のメンテナンスを実行"""
+        stats = {"expired": 0, "evicted": 0, "tombstones": 0, "vacuumed_pages": 0}
+
+        if self.retention_days:
+            stats["expired"] = self._drain(lambda: self.store.prune_expired(self.retention_days, self.batch_size))
+        if self.tombstone_retention_days:
+            stats["tombstones"] = self._drain(
+                lambda: self.store.prune_tombstones(self.tombstone_retention_days, self.batch_size)
+            )
+
+        stats["vacuumed_pages"] += self._vacuum()
+
+        if self.max_size_bytes:
+            while not self._stop.is_set() and self._event_size() > self.max_size_bytes:
+                evicted = self.store.prune_oldest(self.batch_size)
+                stats["evicted"] += evicted
+                stats["vacuumed_pages"] += self._vacuum()
+                if evicted < self.batch_size:
+                    break  # 削除できるイベントが残っていない
+                time.sleep(self.batch_pause)
+
+        if stats["expired"] or stats["evicted"] or stats["tombstones"]:
+            self.logger.info(
+                f"Database maintenance: pruned {stats['expired']} expired and {stats['evicted']} "
+                f"oldest events and {stats['tombstones']} old tombstones, released {stats['vacuumed_pages']} pages "
+                f"(size {self.store.database_size() / 1024 / 1024:.1f}MB)"
+            )
+        return stats
+
+    def _event_size(self) -> int:
+        """容量上限と比べるサイズ（削除済みハッシュの分を除く）"""
+        return self.store.database_size() - self.store.tombstone_size()
+
+    def _drain(self, prune_batch) -> int:
+        """バッチ削除を対象がなくなるまで繰り返す（バッチ間で他の書き込みに譲る）"""
+        total = 0
+        while not self._stop.is_set():
+            pruned = prune_batch()
+            total += pruned
+            if pruned < self.batch_size:
+                break
+            time.sleep(self.batch_pause)
+        return total
+
+    def _vacuum(self) -> int:
+        """空きページを vacuum_pages ずつ返す"""
+        released = 0
+        while not self._stop.is_set():
+            pages = self.store.incremental_vacuum(self.vacuum_pages)
+            released += pages
+            if pages < self.vacuum_pages:
+                break
+            time.sleep(self.batch_pause)
+        return released
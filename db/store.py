@@ -1,16 +1,143 @@
+import base64
 import sqlite3
 import hashlib
-from datetime import datetime
-from typing import List, Dict, Optional
+import json
+import threading
+import unicodedata
+from datetime import datetime, timezone
+from typing import Iterable, List, Dict, Optional, Set, Tuple, Union
+
+from db.bloom import BloomFilter
+from utils.urls import identity_url
+
+# 接続ごとのチューニング（WALで読み書きを並行させ、fsyncはチェックポイント時のみ）
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-16000",  # 約16MB
+    "PRAGMA temp_store=MEMORY",
+]
+
+# スキーマのバージョン（PRAGMA user_version）。上げたら _migrate に手順を追加する
+SCHEMA_VERSION = 8
+
+# query_events が返すカラム（minhash などの内部用カラムは含めない）
+EVENT_FIELDS = [
+    "id", "event_hash", "site_name", "title", "content", "url", "canonical_url",
+    "translated_title", "translated_content", "summary", "created_at", "notified", "duplicate_of",
+    "relevance_score", "matched_keywords",
+]
+
+# 全文検索の対象カラム
+SEARCH_FIELDS = ["title", "content", "translated_title", "translated_content", "summary"]
+
+# trigram トークナイザーが扱える最短の語（これより短い語は LIKE で探す）
+MIN_FTS_TERM_LENGTH = 3
+
+# プレフィルターの最小容量（件数が少ないうちに何度も作り直さないように）
+PREFILTER_MIN_CAPACITY = 10000
 
 class EventStore:
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, prefilter_fp_rate: Optional[float] = 0.01,
+                 site_rules: Optional[Dict[str, Dict]] = None):
         self.db_path = db_path
+        # サイト名 → サイト設定（TARGET_URLS の要素）。URLの正規化ルールと一覧ページのURLに使う
+        self.site_rules = site_rules or {}
+        # スレッドごとに1本の接続を使い回す（close() で全て閉じる）
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._generation = 0
+        # 既知ハッシュのブルームフィルター（None なら無効、常にSQLiteで判定）
+        self.prefilter_fp_rate = prefilter_fp_rate
+        self._prefilter: Optional[BloomFilter] = None
+        self._prefilter_lock = threading.Lock()
         self.init_db()
+        # 複数のイベントが共有するURL（これらはタイトルで同一性を判定する）
+        self._shared_urls: Set[Tuple[str, str]] = set(
+            self._connect().execute("SELECT site_name, canonical_url FROM shared_urls")
+        )
+        if prefilter_fp_rate:
+            self.rebuild_prefilter()
+
+    def rebuild_prefilter(self):
+        """eventsテーブルと削除済みハッシュからプレフィルターを作り直す"""
+        if not self.prefilter_fp_rate:
+            return
+        conn = self._connect()
+        count = conn.execute(
+            "SELECT (SELECT COUNT(*) FROM events) + (SELECT COUNT(*) FROM pruned_events)"
+        ).fetchone()[0]
+        prefilter = BloomFilter(max(PREFILTER_MIN_CAPACITY, count * 2), self.prefilter_fp_rate)
+        for (event_hash,) in conn.execute(
+            "SELECT event_hash FROM events UNION ALL SELECT event_hash FROM pruned_events"
+        ):
+            prefilter.add(event_hash)
+        with self._prefilter_lock:
+            self._prefilter = prefilter
+
+    def _remember_hashes(self, event_hashes: Iterable[str]):
+        """保存したハッシュをプレフィルターに反映（容量を超えたら作り直す）"""
+        if self._prefilter is None:
+            return
+        with self._prefilter_lock:
+            for event_hash in event_hashes:
+                self._prefilter.add(event_hash)
+            full = self._prefilter.is_full
+        if full:
+            self.rebuild_prefilter()
+
+    def _maybe_known(self, event_hash: str) -> bool:
+        """False なら確実に未保存（プレフィルター無効時は常に True）"""
+        prefilter = self._prefilter
+        if prefilter is None:
+            return True
+        return event_hash in prefilter
+
+    def _connect(self) -> sqlite3.Connection:
+        """このスレッド用のプール済み接続を返す"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.generation == self._generation:
+            return conn
+
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            cached_statements=256,  # 同じSQL文字列はコンパイル済みステートメントを再利用
+            check_same_thread=False,  # close() を別スレッドから呼べるように
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            # 終了したスレッド（取得ワーカーなど）の接続はここで片付ける
+            for thread in [t for t in self._connections if not t.is_alive()]:
+                self._connections.pop(thread).close()
+            self._connections[threading.current_thread()] = conn
+            self._local.conn = conn
+            self._local.generation = self._generation
+        return conn
+
+    def close(self):
+        """プール済みの接続をすべて閉じる"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections = {}
+            self._generation += 1
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
     
     def init_db(self):
         """データベースとテーブルを初期化"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -28,50 +155,447 @@ class EventStore:
                 notified BOOLEAN DEFAULT FALSE
             )
         ''')
+
+        # ホストごとのサーキットブレーカー状態（再起動後も引き継ぐ）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS host_circuits (
+                host TEXT PRIMARY KEY,
+                failures INTEGER NOT NULL DEFAULT 0,
+                opened_until REAL NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+
+        # 保持期間・容量上限で削除したイベントのハッシュ（再び新規扱いしないように残す）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS pruned_events (
+                event_hash TEXT PRIMARY KEY,
+                pruned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) WITHOUT ROWID
+        ''')
+
+        # 異なるタイトルのイベントが同じURLを指していた (サイト, 正規化URL)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS shared_urls (
+                site_name TEXT NOT NULL,
+                canonical_url TEXT NOT NULL,
+                PRIMARY KEY (site_name, canonical_url)
+            ) WITHOUT ROWID
+        ''')
+
+        # 内容の変更履歴（同じ内容は1回だけ記録）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS event_revisions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                event_hash TEXT NOT NULL,
+                title TEXT NOT NULL,
+                content TEXT,
+                content_digest TEXT NOT NULL,
+                material BOOLEAN DEFAULT FALSE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (event_hash, content_digest)
+            )
+        ''')
         
         conn.commit()
-        conn.close()
+        self._migrate(conn)
+        self.fts_enabled = self._ensure_search_index(conn)
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """既存DBをその場で最新のスキーマに移行する（PRAGMA user_version で管理）"""
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+
+        with conn:
+            if version < 1:
+                # 近似重複検出
+                self._ensure_columns(conn, "events", [("minhash", "BLOB"), ("duplicate_of", "TEXT")])
+            if version < 2:
+                # URL基準の同一性と変更履歴
+                # （ハッシュの付け替えは version 6 の手順で行う）
+                self._ensure_columns(conn, "events", [("canonical_url", "TEXT"), ("content_digest", "TEXT")])
+            if version < 3:
+                # 保持期間での削除用
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_events_created_at ON events (created_at)")
+            if version < 4:
+                # query_events 用（新しい順のキーセットページングに合わせて id まで含める）
+                conn.execute("DROP INDEX IF EXISTS idx_events_created_at")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_events_created ON events (created_at, id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_events_site_created ON events (site_name, created_at, id)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_events_notified_created ON events (notified, created_at, id)")
+            if version < 5:
+                # 関連度スコア（matched_keywords はJSON配列）
+                self._ensure_columns(conn, "events", [("relevance_score", "REAL"), ("matched_keywords", "TEXT")])
+            if version < 6:
+                # 取得時と同じ規則（サイト別の正規化・一覧ページ・共有URL）でハッシュを作り直す
+                self._rehash_events(conn)
+            if version < 7:
+                # 通知先の購読プロファイル（JSON配列。近似重複を同じプロファイルの中でだけまとめる）
+                self._ensure_columns(conn, "events", [("profiles", "TEXT")])
+            if version < 8:
+                # 削除済みハッシュの保持期間での削除用
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_pruned_events_pruned_at ON pruned_events (pruned_at)")
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+        # 削除で空いたページを少しずつ返せるようにする（切り替えにはVACUUMが1回必要）
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+
+    @staticmethod
+    def _ensure_search_index(conn: sqlite3.Connection) -> bool:
+        """
+        全文検索インデックス（FTS5 trigram、eventsを外部コンテンツとする）を用意する
+
+        trigram は分かち書きに依存しないので韓国語・日本語にもそのまま使える。
+        insert / update / delete のトリガーで events と同期する。
+        FTS5 や trigram が使えないSQLiteでは False を返し、検索は LIKE で行う。
+        """
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'events_fts'"
+        ).fetchone()
+        if exists:
+            return True
+
+        columns = ", ".join(SEARCH_FIELDS)
+        new_values = ", ".join(f"new.{field}" for field in SEARCH_FIELDS)
+        old_values = ", ".join(f"old.{field}" for field in SEARCH_FIELDS)
+        try:
+            with conn:
+                conn.execute(f'''
+                    CREATE VIRTUAL TABLE events_fts USING fts5(
+                        {columns}, content='events', content_rowid='id', tokenize='trigram'
+                    )
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN
+                        INSERT INTO events_fts (rowid, {columns}) VALUES (new.id, {new_values});
+                    END
+                ''')
+                conn.execute(f'''
+                    CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN
+                        INSERT INTO events_fts (events_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                    END
+                ''')
+                # notified などの更新では索引を触らない
+                conn.execute(f'''
+                    CREATE TRIGGER events_fts_update AFTER UPDATE OF {columns} ON events BEGIN
+                        INSERT INTO events_fts (events_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                        INSERT INTO events_fts (rowid, {columns}) VALUES (new.id, {new_values});
+                    END
+                ''')
+                # 既存の行を索引に取り込む
+                conn.execute("INSERT INTO events_fts (events_fts) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search unavailable, falling back to LIKE: {e}")
+            return False
+
+    @staticmethod
+    def _ensure_columns(conn: sqlite3.Connection, table: str, columns):
+        """足りないカラムを追加する"""
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns:
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    def _rehash_events(self, conn: sqlite3.Connection):
+        """
+        保存済みのハッシュを assign_event_hashes() と同じ規則のハッシュに置き換える
+
+        同じイベントになった古い行は変更履歴に移し、最新の行だけを残す。
+        """
+        rows = conn.execute(
+            "SELECT id, event_hash, site_name, title, content, url, created_at FROM events ORDER BY id DESC"
+        ).fetchall()
+
+        urls = {
+            row_id: identity_url(url, self.site_rules.get(site_name))
+            for row_id, _, site_name, _, _, url, _ in rows
+        }
+        titles_by_url: Dict[tuple, Set[str]] = {}
+        for row_id, _, site_name, title, _, _, _ in rows:
+            if urls[row_id]:
+                titles_by_url.setdefault((site_name, urls[row_id]), set()).add(title)
+        shared = {key for key, titles in titles_by_url.items() if len(titles) > 1}
+        shared |= set(conn.execute("SELECT site_name, canonical_url FROM shared_urls"))
+        conn.executemany("INSERT OR IGNORE INTO shared_urls (site_name, canonical_url) VALUES (?, ?)", shared)
+
+        renamed: Dict[str, str] = {}
+        kept: Set[str] = set()
+        merged = 0
+        for row_id, old_hash, site_name, title, content, url, created_at in rows:
+            canonical_url = urls[row_id]
+            if (site_name, canonical_url) in shared:
+                canonical_url = ""
+            new_hash = self.generate_event_hash(site_name, title, canonical_url)
+            digest = self.content_digest(title, content)
+
+            if new_hash in kept:
+                conn.execute('''
+                    INSERT OR IGNORE INTO event_revisions (event_hash, title, content, content_digest, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (new_hash, title, content, digest, created_at))
+                conn.execute("DELETE FROM events WHERE id = ?", (row_id,))
+                merged += 1
+            else:
+                conn.execute(
+                    "UPDATE events SET event_hash = ?, canonical_url = ?, content_digest = ? WHERE id = ?",
+                    (new_hash, canonical_url, digest, row_id),
+                )
+                kept.add(new_hash)
+            renamed[old_hash] = new_hash
+
+        self._rename_references(conn, renamed)
+        if rows:
+            print(f"Migrated {len(rows)} events to URL-based identity ({merged} merged into revisions)")
+
+    @staticmethod
+    def _rename_references(conn: sqlite3.Connection, renamed: Dict[str, str]):
+        """ハッシュの付け替えを duplicate_of・変更履歴・削除済みハッシュに反映する"""
+        pairs = [(new, old) for old, new in renamed.items() if new != old]
+        conn.executemany("UPDATE events SET duplicate_of = ? WHERE duplicate_of = ?", pairs)
+        for table in ("event_revisions", "pruned_events"):
+            # 付け替え先に同じ行があれば古い方は不要
+            conn.executemany(f"UPDATE OR IGNORE {table} SET event_hash = ? WHERE event_hash = ?", pairs)
+            conn.executemany(f"DELETE FROM {table} WHERE event_hash = ?", [(old,) for _, old in pairs])
+
+    def assign_event_hashes(self, events: List[Dict]):
+        """
+        1サイクル分のイベントに event_hash を付ける
+
+        正規化URL（canonical_url）があれば site:URL、なければ site:title で判定する。
+        異なるタイトルのイベントが同じURLを指す場合（共通の詳細ページへのリンクなど）は
+        そのURLを共有URLとして記録し、以降のサイクルも含めてタイトルで判定する。
+        既に保存済みのイベントも同じ規則のハッシュに付け替える。
+        """
+        titles_by_url: Dict[Tuple[str, str], Set[str]] = {}
+        for event in events:
+            if event.get('canonical_url'):
+                titles_by_url.setdefault((event['site_name'], event['canonical_url']), set()).add(event['title'])
+        newly_shared = [
+            key for key, titles in titles_by_url.items()
+            if len(titles) > 1 and key not in self._shared_urls
+        ]
+        if newly_shared:
+            self._share_urls(newly_shared)
+
+        for event in events:
+            if (event['site_name'], event.get('canonical_url', '')) in self._shared_urls:
+                event['canonical_url'] = ""
+            event['event_hash'] = self.generate_event_hash(
+                event['site_name'], event['title'], event.get('canonical_url', '')
+            )
+
+    def _share_urls(self, keys: List[Tuple[str, str]]):
+        """URLを共有URLとして記録し、そのURLで保存済みのイベントをタイトル基準のハッシュに付け替える"""
+        conn = self._connect()
+        renamed: Dict[str, str] = {}
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO shared_urls (site_name, canonical_url) VALUES (?, ?)", keys)
+            for site_name, canonical_url in keys:
+                rows = conn.execute(
+                    "SELECT id, event_hash, title FROM events WHERE site_name = ? AND canonical_url = ?",
+                    (site_name, canonical_url),
+                ).fetchall()
+                for row_id, old_hash, title in rows:
+                    new_hash = self.generate_event_hash(site_name, title)
+                    cursor = conn.execute(
+                        "UPDATE OR IGNORE events SET event_hash = ?, canonical_url = '' WHERE id = ?",
+                        (new_hash, row_id),
+                    )
+                    if cursor.rowcount:
+                        renamed[old_hash] = new_hash
+            self._rename_references(conn, renamed)
+        self._shared_urls.update(keys)
+        self._remember_hashes(renamed.values())
+        print(f"Marked {len(keys)} URLs shared by several events; rehashed {len(renamed)} saved events")
     
-    def generate_event_hash(self, site_name: str, title: str, content: str) -> str:
-        """イベントの一意性を判定するためのハッシュを生成"""
-        combined = f"{site_name}:{title}:{content}"
+    def generate_event_hash(self, site_name: str, title: str, canonical_url: str = "") -> str:
+        """
+        イベントの一意性を判定するためのハッシュを生成
+
+        正規化URLがあれば site:URL、なければ site:title で判定する
+        （閲覧数などの内容の変化で別イベントにならないように、内容は含めない）
+        """
+        key = canonical_url or title
+        combined = f"{site_name}:{key}"
         return hashlib.md5(combined.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def content_digest(title: str, content: str) -> str:
+        """内容の変更検出用ダイジェスト（空白の違いは無視）"""
+        text = unicodedata.normalize("NFKC", f"{title}\n{content or ''}")
+        return hashlib.md5(" ".join(text.split()).encode('utf-8')).hexdigest()
     
     def is_new_event(self, event_hash: str) -> bool:
-        """新規イベントかどうかを判定"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT COUNT(*) FROM events WHERE event_hash = ?", (event_hash,))
-        count = cursor.fetchone()[0]
-        
-        conn.close()
-        return count == 0
+        """新規イベントかどうかを判定（削除済みのイベントは新規としない）"""
+        if not self._maybe_known(event_hash):
+            return True
+        conn = self._connect()
+        row = conn.execute('''
+            SELECT 1 FROM events WHERE event_hash = ?
+            UNION ALL
+            SELECT 1 FROM pruned_events WHERE event_hash = ?
+            LIMIT 1
+        ''', (event_hash, event_hash)).fetchone()
+        return row is None
     
+    def filter_new_hashes(self, event_hashes: Iterable[str]) -> Set[str]:
+        """与えたハッシュのうち未保存のものを1クエリで返す"""
+        hashes = set(event_hashes)
+        # プレフィルターで「確実に新規」と分かるものはDBに問い合わせない
+        candidates = [h for h in hashes if self._maybe_known(h)]
+        if not candidates:
+            return hashes
+
+        conn = self._connect()
+        # パラメータ数の上限を気にせずに済むよう、JSON配列1つで渡す
+        cursor = conn.execute('''
+            SELECT event_hash FROM events WHERE event_hash IN (SELECT value FROM json_each(?1))
+            UNION ALL
+            SELECT event_hash FROM pruned_events WHERE event_hash IN (SELECT value FROM json_each(?1))
+        ''', (json.dumps(candidates),))
+        existing = {row[0] for row in cursor.fetchall()}
+        return hashes - existing
+
+    def get_known_events(self, event_hashes: Iterable[str]) -> Dict[str, Dict]:
+        """
+        保存済みのイベント（ハッシュ → title / content / content_digest / pruned）を1クエリで返す
+
+        削除済みのイベントは pruned=True で返す（内容は残っていない）
+        """
+        candidates = [h for h in set(event_hashes) if self._maybe_known(h)]
+        if not candidates:
+            return {}
+
+        conn = self._connect()
+        cursor = conn.execute('''
+            SELECT event_hash, title, content, content_digest, 0 FROM events
+            WHERE event_hash IN (SELECT value FROM json_each(?1))
+            UNION ALL
+            SELECT event_hash, NULL, NULL, NULL, 1 FROM pruned_events
+            WHERE event_hash IN (SELECT value FROM json_each(?1))
+        ''', (json.dumps(candidates),))
+        return {
+            event_hash: {'title': title, 'content': content, 'content_digest': digest, 'pruned': bool(pruned)}
+            for event_hash, title, content, digest, pruned in cursor.fetchall()
+        }
+
+    def save_revisions(self, events: List[Dict]) -> int:
+        """内容が変わったイベントを変更履歴に記録し、新しく記録した件数を返す"""
+        if not events:
+            return 0
+        conn = self._connect()
+        recorded = 0
+        with conn:
+            for event in events:
+                cursor = conn.execute('''
+                    INSERT OR IGNORE INTO event_revisions (event_hash, title, content, content_digest, material)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (
+                    event['event_hash'], event['title'], event.get('content', ''),
+                    event['content_digest'], bool(event.get('revised')),
+                ))
+                recorded += cursor.rowcount
+        return recorded
+
+    def update_contents(self, events: List[Dict]) -> int:
+        """
+        保存済みイベントのタイトル・内容・content_digest だけを最新にし、更新した件数を返す
+
+        注目されなかった更新イベント用（翻訳・関連度は保存済みのまま）。
+        digest を更新しないと、次のサイクルでも同じ変更を「更新」として検出し続ける。
+        """
+        if not events:
+            return 0
+        conn = self._connect()
+        with conn:
+            cursor = conn.executemany(
+                "UPDATE events SET title = ?, content = ?, content_digest = ? WHERE event_hash = ?",
+                [
+                    (event['title'], event.get('content', ''), event['content_digest'], event['event_hash'])
+                    for event in events
+                ],
+            )
+        return cursor.rowcount
+
+    def save_events(self, events: List[Dict]) -> List[str]:
+        """
+        イベントを1トランザクションでまとめて保存し、重複していたハッシュを返す
+
+        保存済みのイベントは内容（content_digest）が変わっていれば最新の内容に更新する。
+        """
+        duplicates: List[str] = []
+        if not events:
+            return duplicates
+
+        conn = self._connect()
+        with conn:
+            for event_data in events:
+                cursor = conn.execute('''
+                    INSERT INTO events (
+                        event_hash, site_name, title, content, url,
+                        translated_title, translated_content, summary,
+                        minhash, duplicate_of, canonical_url, content_digest,
+                        relevance_score, matched_keywords, profiles
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(event_hash) DO UPDATE SET
+                        title = excluded.title,
+                        content = excluded.content,
+                        url = excluded.url,
+                        translated_title = excluded.translated_title,
+                        translated_content = excluded.translated_content,
+                        summary = excluded.summary,
+                        content_digest = excluded.content_digest,
+                        relevance_score = excluded.relevance_score,
+                        matched_keywords = excluded.matched_keywords,
+                        profiles = excluded.profiles
+                    WHERE events.content_digest IS NOT excluded.content_digest
+                ''', self._event_row(event_data))
+                if cursor.rowcount == 0:
+                    duplicates.append(event_data['event_hash'])
+        self._remember_hashes(event['event_hash'] for event in events)
+        return duplicates
+
+    @staticmethod
+    def _event_row(event_data: Dict) -> tuple:
+        """INSERT用のパラメータ"""
+        return (
+            event_data['event_hash'],
+            event_data['site_name'],
+            event_data['title'],
+            event_data.get('content', ''),
+            event_data.get('url', ''),
+            event_data.get('translated_title', ''),
+            event_data.get('translated_content', ''),
+            event_data.get('summary', ''),
+            event_data.get('minhash'),
+            event_data.get('duplicate_of'),
+            event_data.get('canonical_url', ''),
+            event_data.get('content_digest'),
+            event_data.get('relevance_score'),
+            json.dumps(event_data['matched_keywords'], ensure_ascii=False)
+            if event_data.get('matched_keywords') is not None else None,
+            json.dumps(event_data['profiles'], ensure_ascii=False)
+            if event_data.get('profiles') is not None else None,
+        )
+
     def save_event(self, event_data: Dict) -> bool:
         """イベント情報をデータベースに保存"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO events (
-                    event_hash, site_name, title, content, url,
-                    translated_title, translated_content, summary
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                event_data['event_hash'],
-                event_data['site_name'],
-                event_data['title'],
-                event_data.get('content', ''),
-                event_data.get('url', ''),
-                event_data.get('translated_title', ''),
-                event_data.get('translated_content', ''),
-                event_data.get('summary', '')
-            ))
-            
-            conn.commit()
-            conn.close()
+            conn = self._connect()
+            with conn:
+                conn.execute('''
+                    INSERT INTO events (
+                        event_hash, site_name, title, content, url,
+                        translated_title, translated_content, summary,
+                        minhash, duplicate_of, canonical_url, content_digest,
+                        relevance_score, matched_keywords, profiles
+                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', self._event_row(event_data))
+            self._remember_hashes([event_data['event_hash']])
             return True
             
         except sqlite3.IntegrityError:
@@ -83,30 +607,272 @@ class EventStore:
     
     def get_recent_events(self, limit: int = 10) -> List[Dict]:
         """最近のイベントを取得"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM events 
-            ORDER BY created_at DESC 
+        events, _ = self.query_events(limit=limit)
+        return events
+
+    def query_events(
+        self,
+        site: Optional[str] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        notified: Optional[bool] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        条件に合うイベントを新しい順に取得
+
+        since 以上 until 未満の created_at（UTC）で絞り込める。
+        戻り値は (イベント, 次ページのカーソル)。カーソルを渡すと続きから取得する
+        （OFFSET を使わないので、深いページでも索引を辿るだけで済む）。最後のページでは None。
+        """
+        conditions = []
+        params: List = []
+        if site is not None:
+            conditions.append("site_name = ?")
+            params.append(site)
+        if since is not None:
+            conditions.append("created_at >= ?")
+            params.append(self._format_timestamp(since))
+        if until is not None:
+            conditions.append("created_at < ?")
+            params.append(self._format_timestamp(until))
+        if notified is not None:
+            conditions.append("notified = ?")
+            params.append(int(notified))
+        if cursor:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend(self._decode_cursor(cursor))
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        sql = f'''
+            SELECT {", ".join(EVENT_FIELDS)} FROM events
+            {where}
+            ORDER BY created_at DESC, id DESC
             LIMIT ?
-        ''', (limit,))
-        
-        events = []
-        for row in cursor.fetchall():
-            events.append({
-                'id': row[0],
-                'event_hash': row[1],
-                'site_name': row[2],
-                'title': row[3],
-                'content': row[4],
-                'url': row[5],
-                'translated_title': row[6],
-                'translated_content': row[7],
-                'summary': row[8],
-                'created_at': row[9],
-                'notified': row[10]
-            })
-        
-        conn.close()
-        return events
\ No newline at end of file
+        '''
+        # 1件多く取って次のページの有無を判定する
+        params.append(limit + 1)
+
+        db_cursor = self._connect().cursor()
+        db_cursor.row_factory = sqlite3.Row
+        rows = db_cursor.execute(sql, params).fetchall()
+
+        events = [self._row_to_event(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = self._encode_cursor(last['created_at'], last['id'])
+        return events, next_cursor
+
+    def search(
+        self,
+        query: str,
+        site: Optional[str] = None,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        limit: int = 20,
+    ) -> List[Dict]:
+        """
+        タイトル・内容・翻訳・要約を全文検索（空白区切りの語をすべて含むイベント）
+
+        3文字以上の語は全文検索インデックスで関連度順に、trigram で引けない2文字以下の語は
+        LIKE で絞り込む（例: "뉴진스 팝업" → 뉴진스 は索引、팝업 は LIKE）。
+        """
+        terms = query.split()
+        if not terms:
+            return []
+        if self.fts_enabled:
+            fts_terms = [t for t in terms if len(t) >= MIN_FTS_TERM_LENGTH]
+            like_terms = [t for t in terms if len(t) < MIN_FTS_TERM_LENGTH]
+        else:
+            fts_terms, like_terms = [], terms
+
+        conditions = []
+        params: List = []
+        if fts_terms:
+            conditions.append("events_fts MATCH ?")
+            params.append(" AND ".join('"' + t.replace('"', '""') + '"' for t in fts_terms))
+        for term in like_terms:
+            pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            conditions.append(
+                "(" + " OR ".join(f"e.{field} LIKE ? ESCAPE '\\'" for field in SEARCH_FIELDS) + ")"
+            )
+            params.extend([pattern] * len(SEARCH_FIELDS))
+        if site is not None:
+            conditions.append("e.site_name = ?")
+            params.append(site)
+        if since is not None:
+            conditions.append("e.created_at >= ?")
+            params.append(self._format_timestamp(since))
+        if until is not None:
+            conditions.append("e.created_at < ?")
+            params.append(self._format_timestamp(until))
+
+        fields = ", ".join(f"e.{field}" for field in EVENT_FIELDS)
+        if fts_terms:
+            source = "events_fts JOIN events e ON e.id = events_fts.rowid"
+            order = "events_fts.rank, e.created_at DESC"
+        else:
+            source = "events e"
+            order = "e.created_at DESC, e.id DESC"
+        sql = f"SELECT {fields} FROM {source} WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT ?"
+        params.append(limit)
+
+        db_cursor = self._connect().cursor()
+        db_cursor.row_factory = sqlite3.Row
+        return [self._row_to_event(row) for row in db_cursor.execute(sql, params).fetchall()]
+
+    @staticmethod
+    def _row_to_event(row: sqlite3.Row) -> Dict:
+        event = dict(row)
+        if event.get('matched_keywords'):
+            event['matched_keywords'] = json.loads(event['matched_keywords'])
+        return event
+
+    def mark_notified(self, event_hashes: Iterable[str]) -> int:
+        """通知済みにし、更新件数を返す"""
+        hashes = list(event_hashes)
+        if not hashes:
+            return 0
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE events SET notified = 1 WHERE event_hash IN (SELECT value FROM json_each(?))",
+                (json.dumps(hashes),),
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _format_timestamp(value: Union[datetime, str]) -> str:
+        """
+        created_at（UTCの 'YYYY-MM-DD HH:MM:SS'）と比較できる形にする
+
+        文字列は ISO 8601（'T' 区切り・タイムゾーン・小数秒・日付のみも可）として解釈し、
+        datetime と同じく正規化する（そのまま比較すると 'T' と ' ' の違いで順序がずれる）。
+        タイムゾーンのない値は UTC とみなす。
+        """
+        if isinstance(value, str):
+            text = value.strip()
+            if text.endswith(("Z", "z")):
+                text = text[:-1] + "+00:00"
+            try:
+                value = datetime.fromisoformat(text)
+            except ValueError as e:
+                raise ValueError(f"Invalid timestamp: {value!r}") from e
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+
+    @staticmethod
+    def _encode_cursor(created_at: str, row_id: int) -> str:
+        return base64.urlsafe_b64encode(f"{created_at}|{row_id}".encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[str, int]:
+        try:
+            created_at, row_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+            return EventStore._format_timestamp(created_at), int(row_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+
+    def prune_expired(self, retention_days: int, batch_size: int = 500) -> int:
+        """保持期間を過ぎたイベントを最大 batch_size 件削除し、削除件数を返す"""
+        return self._prune_batch(
+            "SELECT id, event_hash FROM events WHERE created_at < datetime('now', ?) ORDER BY created_at LIMIT ?",
+            (f"-{int(retention_days)} days", batch_size),
+        )
+
+    def prune_oldest(self, batch_size: int = 500) -> int:
+        """古い順に最大 batch_size 件削除し、削除件数を返す（容量上限の維持用）"""
+        return self._prune_batch(
+            "SELECT id, event_hash FROM events ORDER BY created_at, id LIMIT ?",
+            (batch_size,),
+        )
+
+    def prune_tombstones(self, retention_days: int, batch_size: int = 500) -> int:
+        """保持期間を過ぎた削除済みハッシュを最大 batch_size 件削除し、削除件数を返す"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM pruned_events WHERE event_hash IN ("
+                "SELECT event_hash FROM pruned_events WHERE pruned_at < datetime('now', ?) ORDER BY pruned_at LIMIT ?)",
+                (f"-{int(retention_days)} days", batch_size),
+            )
+        return cursor.rowcount
+
+    def _prune_batch(self, select_sql: str, params: tuple) -> int:
+        """選んだイベントを削除済みハッシュに移し、変更履歴と一緒に削除（短い1トランザクション）"""
+        conn = self._connect()
+        with conn:
+            rows = conn.execute(select_sql, params).fetchall()
+            if not rows:
+                return 0
+            hashes = [(event_hash,) for _, event_hash in rows]
+            conn.executemany("INSERT OR IGNORE INTO pruned_events (event_hash) VALUES (?)", hashes)
+            conn.executemany("DELETE FROM event_revisions WHERE event_hash = ?", hashes)
+            conn.executemany("DELETE FROM events WHERE id = ?", [(row_id,) for row_id, _ in rows])
+        return len(rows)
+
+    def database_size(self) -> int:
+        """DBファイルのサイズ（バイト、WALは含まない）"""
+        conn = self._connect()
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def tombstone_size(self) -> int:
+        """削除済みハッシュ（pruned_events とその索引）が占めるバイト数（dbstat がなければ 0）"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name IN ('pruned_events', 'idx_pruned_events_pruned_at')"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            # dbstat 仮想テーブルなしでビルドされた SQLite（保持期間での削除だけで上限を保つ）
+            return 0
+        return row[0] or 0
+
+    def incremental_vacuum(self, pages: int = 0) -> int:
+        """空きページを最大 pages ページ（0 なら全て）ファイルから返し、返したページ数を返す"""
+        conn = self._connect()
+        before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        # execute() では1ページしか返らないため、最後までステップする executescript を使う
+        conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+        # WALに書かれた縮小をDBファイルに反映（実行中の読み書きは待たない）
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+        return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def load_minhashes(self) -> List[tuple]:
+        """近似重複インデックス用に、代表イベントの (event_hash, minhash, site_name, title, profiles) を返す"""
+        conn = self._connect()
+        cursor = conn.execute(
+            "SELECT event_hash, minhash, site_name, title, profiles FROM events "
+            "WHERE minhash IS NOT NULL AND duplicate_of IS NULL"
+        )
+        return [
+            (event_hash, minhash, site_name, title, json.loads(profiles) if profiles is not None else None)
+            for event_hash, minhash, site_name, title, profiles in cursor.fetchall()
+        ]
+
+    def load_circuit_states(self) -> Dict[str, Dict]:
+        """保存済みのサーキットブレーカー状態を取得"""
+        conn = self._connect()
+        cursor = conn.execute("SELECT host, failures, opened_until FROM host_circuits")
+        return {
+            host: {'failures': failures, 'opened_until': opened_until}
+            for host, failures, opened_until in cursor.fetchall()
+        }
+
+    def save_circuit_state(self, host: str, failures: int, opened_until: float):
+        """サーキットブレーカー状態を保存"""
+        conn = self._connect()
+        with conn:
+            conn.execute('''
+                INSERT INTO host_circuits (host, failures, opened_until, updated_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(host) DO UPDATE SET
+                    failures = excluded.failures,
+                    opened_until = excluded.opened_until,
+                    updated_at = excluded.updated_at
+            ''', (host, failures, opened_until))
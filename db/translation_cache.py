@@ -0,0 +1,152 @@
+# db/translation_cache.py - 原文で引く翻訳結果のキャッシュ（SQLite + メモリ上のLRU）
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from db.store import CONNECTION_PRAGMAS
+
+CACHE_FIELDS = ("translated_title", "translated_content", "summary")
+
+
+def cache_key(title: str, content: str, model: str, prompt_version: str) -> str:
+    """正規化した原文 + モデル + プロンプトのバージョンから作るキー"""
+    parts = [model, prompt_version]
+    for text in (title, content):
+        text = unicodedata.normalize("NFKC", text or "")
+        parts.append(" ".join(text.split()))
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    翻訳結果のキャッシュ
+
+    直近 memory_entries 件はメモリ上のLRUから返し（DBを引かない）、それ以外はSQLiteから引く。
+    DBは max_entries 件を超えたら最終利用の古い順に1割ずつ削除する。
+    メモリ上のヒットは最終利用時刻を記録しておき、flush() でまとめてDBに書く。
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 50000, memory_entries: int = 1000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.logger = logging.getLogger(__name__)
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self._memory: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._touched: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            self._conn.execute(pragma)
+        with self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS translations (
+                    cache_key TEXT PRIMARY KEY,
+                    translated_title TEXT,
+                    translated_content TEXT,
+                    summary TEXT,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                ) WITHOUT ROWID
+            ''')
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used)")
+        self._count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Dict[str, str]]:
+        """キャッシュ済みの翻訳を返す（なければ None）"""
+        with self._lock:
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self._touched[key] = time.time()
+                self.hits += 1
+                self.memory_hits += 1
+                return dict(result)
+
+            row = self._conn.execute(
+                "SELECT translated_title, translated_content, summary FROM translations WHERE cache_key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            result = dict(zip(CACHE_FIELDS, row))
+            self._touched[key] = time.time()
+            self._remember(key, result)
+            self.hits += 1
+            return dict(result)
+
+    def put(self, key: str, translation: Dict[str, str]):
+        """翻訳を保存（上限を超えたら古いものを削除）"""
+        result = {field: translation.get(field, "") for field in CACHE_FIELDS}
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM translations WHERE cache_key = ?", (key,)).fetchone()
+            with self._conn:
+                self._conn.execute('''
+                    INSERT INTO translations (cache_key, translated_title, translated_content, summary, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(cache_key) DO UPDATE SET
+                        translated_title = excluded.translated_title,
+                        translated_content = excluded.translated_content,
+                        summary = excluded.summary,
+                        last_used = excluded.last_used
+                ''', (key, result["translated_title"], result["translated_content"], result["summary"], now, now))
+            self._remember(key, result)
+            if not exists:
+                self._count += 1
+            if self.max_entries and self._count > self.max_entries:
+                self._evict()
+
+    def _remember(self, key: str, result: Dict[str, str]):
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """最終利用の古い順に削除して上限の9割まで減らす（毎回削除しないように余裕を持たせる）"""
+        self._flush_touched()
+        target = int(self.max_entries * 0.9)
+        with self._conn:
+            self._conn.execute('''
+                DELETE FROM translations WHERE cache_key IN (
+                    SELECT cache_key FROM translations ORDER BY last_used LIMIT ?
+                )
+            ''', (max(0, self._count - target),))
+        self._count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        self.logger.info(f"Evicted translation cache entries down to {self._count}")
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "UPDATE translations SET last_used = ? WHERE cache_key = ?",
+                [(used, key) for key, used in self._touched.items()],
+            )
+        self._touched.clear()
+
+    def flush(self):
+        """メモリ上のヒットの最終利用時刻をDBに書く"""
+        with self._lock:
+            self._flush_touched()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "memory_hits": self.memory_hits, "entries": self._count}
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            self._conn.close()
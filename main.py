@@ -1,77 +1,225 @@
+import argparse
+import os
+import tempfile
 import time
 import logging
-from typing import List, Dict
+from datetime import datetime, timedelta, timezone
+from typing import List, Dict, Optional
 
 # 各モジュールのインポート（実際の実装では相対インポートを使用）
-from config import TARGET_URLS, FILTER_KEYWORDS, OPENAI_API_KEY, SLACK_WEBHOOK_URL, DB_PATH, CHECK_INTERVAL
+from config import (
+    TARGET_URLS, FILTER_KEYWORDS, OPENAI_API_KEY, SLACK_WEBHOOK_URL, DB_PATH, CHECK_INTERVAL,
+    CONCURRENT_REQUESTS, HTTP_CACHE_PATH, VOLATILE_PATTERNS, HTML_PARSER,
+    USE_SELENIUM, BROWSER_POOL_SIZE, BROWSER_MAX_PAGES, SELENIUM_WAIT_TIMEOUT,
+    SCHEDULER_ENABLED, SCHEDULER_MIN_INTERVAL, SCHEDULER_MAX_INTERVAL, SCHEDULER_TARGET_NEW_EVENTS,
+    HOST_RATE_PER_SECOND, HOST_BURST, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN, CIRCUIT_INITIAL_COOLDOWN,
+    STREAMING_PARSE, MAX_RESPONSE_BYTES, PREFILTER_FP_RATE, NEAR_DUP_THRESHOLD,
+    REVISION_MATERIAL_THRESHOLD, DB_BACKUP_DAYS, MAX_DB_SIZE_MB, MAINTENANCE_INTERVAL, MAINTENANCE_BATCH_SIZE,
+    TOMBSTONE_RETENTION_DAYS,
+    EXCLUDE_KEYWORDS, KEYWORD_WEIGHTS, EXCLUDE_WEIGHT, RELEVANCE_TITLE_BOOST, RELEVANCE_THRESHOLD, RELEVANCE_TOP_K,
+    KEYWORD_MATCH_MODES, SUBSCRIPTION_PROFILES,
+    OPENAI_MODEL, OPENAI_MAX_TOKENS, OPENAI_TEMPERATURE, TRANSLATION_BATCH_TOKEN_BUDGET, TRANSLATION_BATCH_MAX_EVENTS,
+    TRANSLATION_CACHE_PATH, TRANSLATION_CACHE_MAX_ENTRIES, TRANSLATION_CACHE_MEMORY_ENTRIES,
+    OPENAI_BASE_URL, TRANSLATION_CONCURRENCY, OPENAI_REQUESTS_PER_MINUTE, OPENAI_TOKENS_PER_MINUTE,
+)
 from utils.logger import setup_logger
 from scraper.fetcher import EventFetcher
 from processor.filter import EventFilter
+from processor.dedup import NearDuplicateDetector, is_material_change
 from processor.translator import EventTranslator
 from db.store import EventStore
+from db.maintenance import DatabaseMaintainer
+from db.translation_cache import TranslationCache
 from notifier.slack import EventNotifier
+from scheduler.adaptive import SiteScheduler
+from scraper.snapshot import RECORD, REPLAY, SnapshotStore
+
+# サイト名 → サイト設定（イベントの同一性判定に使う正規化ルール）
+SITE_RULES = {site['name']: site for site in TARGET_URLS}
 
 class KoreaEventBot:
-    def __init__(self):
+    def __init__(self, snapshot: Optional[SnapshotStore] = None, db_path: str = DB_PATH,
+                 translate: bool = True, notify: bool = True):
         self.logger = setup_logger()
-        self.fetcher = EventFetcher()
-        self.filter = EventFilter(FILTER_KEYWORDS)
-        self.translator = EventTranslator(OPENAI_API_KEY) if OPENAI_API_KEY else None
-        self.store = EventStore(DB_PATH)
-        self.notifier = EventNotifier(SLACK_WEBHOOK_URL)
+        self.store = EventStore(db_path, prefilter_fp_rate=PREFILTER_FP_RATE, site_rules=SITE_RULES)
+        self.fetcher = EventFetcher(
+            use_selenium=USE_SELENIUM,
+            concurrent_requests=CONCURRENT_REQUESTS,
+            cache_path=HTTP_CACHE_PATH,
+            volatile_patterns=VOLATILE_PATTERNS,
+            parser_backend=HTML_PARSER,
+            browser_pool_size=BROWSER_POOL_SIZE,
+            browser_max_pages=BROWSER_MAX_PAGES,
+            selenium_wait_timeout=SELENIUM_WAIT_TIMEOUT,
+            host_rate=HOST_RATE_PER_SECOND,
+            host_burst=HOST_BURST,
+            circuit_failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+            circuit_cooldown=CIRCUIT_COOLDOWN,
+            circuit_initial_cooldown=CIRCUIT_INITIAL_COOLDOWN,
+            circuit_store=self.store,
+            streaming=STREAMING_PARSE,
+            max_response_bytes=MAX_RESPONSE_BYTES,
+            snapshot=snapshot,
+        )
+        self.filter = EventFilter(
+            FILTER_KEYWORDS,
+            exclude_keywords=EXCLUDE_KEYWORDS,
+            weights=KEYWORD_WEIGHTS,
+            threshold=RELEVANCE_THRESHOLD,
+            top_k=RELEVANCE_TOP_K,
+            exclude_weight=EXCLUDE_WEIGHT,
+            title_boost=RELEVANCE_TITLE_BOOST,
+            match_modes=KEYWORD_MATCH_MODES,
+            profiles=SUBSCRIPTION_PROFILES,
+        )
+        self.deduper = None
+        if NEAR_DUP_THRESHOLD is not None:
+            self.deduper = NearDuplicateDetector(NEAR_DUP_THRESHOLD)
+            self.deduper.load(self.store.load_minhashes())
+        self.translation_cache = TranslationCache(
+            TRANSLATION_CACHE_PATH,
+            max_entries=TRANSLATION_CACHE_MAX_ENTRIES,
+            memory_entries=TRANSLATION_CACHE_MEMORY_ENTRIES,
+        ) if translate and OPENAI_API_KEY and TRANSLATION_CACHE_PATH else None
+        self.translator = EventTranslator(
+            OPENAI_API_KEY,
+            model=OPENAI_MODEL,
+            max_tokens=OPENAI_MAX_TOKENS,
+            temperature=OPENAI_TEMPERATURE,
+            batch_token_budget=TRANSLATION_BATCH_TOKEN_BUDGET,
+            batch_max_events=TRANSLATION_BATCH_MAX_EVENTS,
+            cache=self.translation_cache,
+            base_url=OPENAI_BASE_URL,
+            concurrency=TRANSLATION_CONCURRENCY,
+            requests_per_minute=OPENAI_REQUESTS_PER_MINUTE,
+            tokens_per_minute=OPENAI_TOKENS_PER_MINUTE,
+        ) if translate and OPENAI_API_KEY else None
+        self.notifier = EventNotifier(SLACK_WEBHOOK_URL, profiles=SUBSCRIPTION_PROFILES) if notify else None
+        self.maintainer = DatabaseMaintainer(
+            self.store,
+            retention_days=DB_BACKUP_DAYS,
+            max_size_mb=MAX_DB_SIZE_MB,
+            tombstone_retention_days=TOMBSTONE_RETENTION_DAYS,
+            interval=MAINTENANCE_INTERVAL,
+            batch_size=MAINTENANCE_BATCH_SIZE,
+        )
         
         self.logger.info("Korea Event Bot initialized")
     
-    def run_single_check(self):
-        """1回分のチェック処理を実行"""
+    def run_single_check(self, sites: Optional[List[Dict]] = None) -> Dict[str, int]:
+        """1回分のチェック処理を実行（サイトごとの新着件数を返す）"""
         self.logger.info("Starting event check cycle")
+        new_counts: Dict[str, int] = {}
         
         try:
-            # 1. 全サイトからイベントを取得
-            all_events = self.fetcher.fetch_all_events(TARGET_URLS)
+            # 1. 全サイト（または指定サイト）からイベントを取得
+            all_events = self.fetcher.fetch_all_events(sites if sites is not None else TARGET_URLS)
             self.logger.info(f"Fetched {len(all_events)} total events")
             
-            # 2. 新規イベントのみをフィルタリング
-            new_events = []
+            # 2. 新規・更新イベントのみを残す（正規化URLで同一性を判定、1クエリでまとめて照会）
+            # 同じURLを異なるタイトルのイベントが共有する場合はタイトルで判定する
+            self.store.assign_event_hashes(all_events)
+            unique_events: Dict[str, Dict] = {}
             for event in all_events:
-                event_hash = self.store.generate_event_hash(
-                    event['site_name'], 
-                    event['title'], 
-                    event['content']
-                )
-                event['event_hash'] = event_hash
-                
-                if self.store.is_new_event(event_hash):
+                event['content_digest'] = self.store.content_digest(event['title'], event['content'])
+                unique_events.setdefault(event['event_hash'], event)
+            known_events = self.store.get_known_events(unique_events)
+
+            new_events, changed_events, revised_events = [], [], []
+            for event_hash, event in unique_events.items():
+                stored = known_events.get(event_hash)
+                if stored is None:
                     new_events.append(event)
+                elif stored['pruned']:
+                    continue  # 保持期間を過ぎて削除済み（再通知しない）
+                elif stored['content_digest'] != event['content_digest']:
+                    changed_events.append(event)
+                    # 閲覧数の更新などの軽微な変化は履歴に残すだけで再処理しない
+                    if is_material_change(
+                        stored['title'], stored['content'] or '',
+                        event['title'], event['content'],
+                        REVISION_MATERIAL_THRESHOLD,
+                    ):
+                        event['revised'] = True
+                        revised_events.append(event)
+            self.store.save_revisions(changed_events)
             
-            self.logger.info(f"Found {len(new_events)} new events")
+            self.logger.info(
+                f"Found {len(new_events)} new events, {len(revised_events)} revised events "
+                f"({len(changed_events) - len(revised_events)} minor changes)"
+            )
             
-            if not new_events:
+            if not new_events and not revised_events:
                 self.logger.info("No new events found")
-                return
+                self.fetcher.commit_cache()
+                return new_counts
             
-            # 3. 注目ワードでフィルタリング
-            interesting_events = self.filter.filter_events(new_events)
+            # 3. 関連度でフィルタリング（購読プロファイルごとに上位 top_k 件のみ）
+            interesting_events = self.filter.filter_events(new_events + revised_events)
+            # 溢れたイベントは保存しない。そのサイトはバリデータ・ダイジェストを反映せず、
+            # 次回も304・本文一致で飛ばされずに再抽出されるようにして次回に回す
+            deferred_sites = {
+                event['site_name'] for event in new_events + revised_events if event.get('deferred')
+            }
+            if deferred_sites:
+                self.logger.info(f"Deferred overflow events from {len(deferred_sites)} sites to the next cycle")
+            # 注目されなかった更新イベントも最新の digest を保存する（次回また「更新」にならないように。
+            # 溢れたイベントは次回に回すので対象外）
+            interesting_hashes = {event['event_hash'] for event in interesting_events}
+            self.store.update_contents([
+                event for event in revised_events
+                if event['event_hash'] not in interesting_hashes and not event.get('deferred')
+            ])
+            # スケジューラ用の新着件数（保存される注目イベントのみ数える。
+            # 保存されない非注目イベントは毎回「新規」に見えるため除外）
+            for event in interesting_events:
+                new_counts[event['site_name']] = new_counts.get(event['site_name'], 0) + 1
             
-            # 4. 翻訳・要約（ChatGPT APIが利用可能な場合）
+            # 4. サイト横断の近似重複をまとめる（各グループの最初のイベントだけ翻訳・通知）
+            primary_events, near_duplicates = interesting_events, []
+            if self.deduper:
+                # 更新されたイベントは既にグループが決まっているので対象外
+                primary_events, near_duplicates = self.deduper.group(
+                    [event for event in interesting_events if not event.get('revised')]
+                )
+                primary_events += [event for event in interesting_events if event.get('revised')]
+                primary_events.sort(key=lambda e: e.get('relevance_score') or 0, reverse=True)
+            
+            # 5. 翻訳・要約（ChatGPT APIが利用可能な場合。複数イベントをまとめたリクエストを並行に送る）
             if self.translator:
-                for event in interesting_events:
-                    event = self.translator.translate_and_summarize(event)
+                self.translator.translate_batch(primary_events)
             
-            # 5. データベースに保存
-            for event in interesting_events:
-                self.store.save_event(event)
+            # 6. データベースに保存（近似重複も duplicate_of 付きで保存、更新は最新の内容に置き換え）
+            duplicates = self.store.save_events(primary_events + near_duplicates)
+            if duplicates:
+                self.logger.info(f"Skipped {len(duplicates)} duplicate events on save")
+            if self.deduper:
+                # 保存できた代表イベントだけを以降のサイクルの照合対象にする
+                self.deduper.remember(primary_events)
             
-            # 6. 通知
-            if interesting_events:
-                self.notifier.notify_events(interesting_events)
-                self.logger.info(f"Notified {len(interesting_events)} interesting events")
+            # 7. 通知
+            if primary_events and self.notifier:
+                self.notifier.notify_events(primary_events)
+                self.store.mark_notified(event['event_hash'] for event in primary_events)
+                self.logger.info(f"Notified {len(primary_events)} interesting events")
+            elif primary_events:
+                self.logger.info(f"Found {len(primary_events)} interesting events (notifications disabled)")
+
+            # 8. 保存・通知まで済んだので、取得時のバリデータ・ダイジェストを反映する
+            self.fetcher.commit_cache(skip_sites=deferred_sites)
             
         except Exception as e:
             self.logger.error(f"Error during event check: {e}")
+
+        return new_counts
     
     def run_continuous(self):
-        """継続的な監視を実行"""
+        """継続的な監視を実行（DBのメンテナンスはバックグラウンドで並行実行）"""
+        self.maintainer.start()
+        if SCHEDULER_ENABLED:
+            self.run_scheduled()
+            return
+
         self.logger.info(f"Starting continuous monitoring (interval: {CHECK_INTERVAL} seconds)")
         
         while True:
@@ -88,19 +236,129 @@ class KoreaEventBot:
                 self.logger.info("Continuing after error...")
                 time.sleep(60)  # エラー後は1分待機
 
+    def run_scheduled(self):
+        """サイトごとの適応的な間隔で監視を実行（期限を迎えたサイトのみチェック）"""
+        scheduler = SiteScheduler(
+            TARGET_URLS,
+            default_interval=CHECK_INTERVAL,
+            min_interval=SCHEDULER_MIN_INTERVAL,
+            max_interval=SCHEDULER_MAX_INTERVAL,
+            target_new_events=SCHEDULER_TARGET_NEW_EVENTS,
+        )
+        self.logger.info(
+            f"Starting scheduled monitoring (interval: {SCHEDULER_MIN_INTERVAL}-{SCHEDULER_MAX_INTERVAL} seconds)"
+        )
+
+        while True:
+            try:
+                due_sites = scheduler.due_sites()
+                if due_sites:
+                    new_counts = self.run_single_check(due_sites)
+                    for site in due_sites:
+                        scheduler.record_result(site['name'], new_counts.get(site['name'], 0))
+
+                wait = scheduler.seconds_until_next()
+                self.logger.info(f"Sleeping for {wait:.0f} seconds until next due site...")
+                time.sleep(wait)
+                
+            except KeyboardInterrupt:
+                self.logger.info("Bot stopped by user")
+                break
+            except Exception as e:
+                self.logger.error(f"Unexpected error: {e}")
+                self.logger.info("Continuing after error...")
+                time.sleep(60)  # エラー後は1分待機
+
+    def run_maintenance(self):
+        """DBのメンテナンスを1回実行（--once 用。継続実行時はバックグラウンドで行う）"""
+        try:
+            self.maintainer.run_once()
+        except Exception as e:
+            self.logger.error(f"Database maintenance failed: {e}")
+
+    def close(self):
+        """リソースのクリーンアップ（ブラウザプール・キャッシュの保存、DB接続など）"""
+        self.maintainer.stop()
+        self.fetcher.close()
+        self.store.close()
+        if self.translation_cache:
+            self.translation_cache.close()
+
+def search_events(query: str, days: Optional[int] = None, site: Optional[str] = None, limit: int = 20):
+    """保存済みイベントを全文検索して表示"""
+    store = EventStore(DB_PATH, prefilter_fp_rate=None, site_rules=SITE_RULES)
+    try:
+        since = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+        results = store.search(query, site=site, since=since, limit=limit)
+    finally:
+        store.close()
+
+    if not results:
+        print("該当するイベントはありません")
+        return
+    for event in results:
+        print(f"[{event['created_at']}] {event['site_name']}")
+        print(f"  {event['translated_title'] or event['title']}")
+        if event['url']:
+            print(f"  {event['url']}")
+    print(f"{len(results)} 件")
+
 def main():
     """メイン関数"""
-    bot = KoreaEventBot()
+    parser = argparse.ArgumentParser(description="Korea Event Bot")
+    parser.add_argument("--once", action="store_true", help="1回だけチェックして終了")
+    snapshot_group = parser.add_mutually_exclusive_group()
+    snapshot_group.add_argument("--record", metavar="PATH", help="取得したレスポンスをアーカイブに記録")
+    snapshot_group.add_argument("--replay", metavar="PATH", help="記録済みアーカイブから再生（ネットワークに接続しない）")
+    parser.add_argument("--db", metavar="PATH", help=f"イベントDBのパス（既定: {DB_PATH}、記録・再生時は一時ファイル）")
+    parser.add_argument("--no-translate", action="store_true", help="翻訳・要約しない（記録・再生時は常に無効）")
+    parser.add_argument("--no-notify", action="store_true", help="Slack・コンソールに通知しない（記録・再生時は常に無効）")
+    subparsers = parser.add_subparsers(dest="command")
+    search_parser = subparsers.add_parser("search", help="保存済みイベントを全文検索")
+    search_parser.add_argument("query", help="検索語（空白区切りの語をすべて含むイベントを探す）")
+    search_parser.add_argument("--days", type=int, help="直近N日に絞る")
+    search_parser.add_argument("--site", help="サイト名で絞る")
+    search_parser.add_argument("--limit", type=int, default=20, help="最大件数")
+    args = parser.parse_args()
+
+    if args.command == "search":
+        search_events(args.query, days=args.days, site=args.site, limit=args.limit)
+        return
+
+    snapshot = None
+    if args.record:
+        snapshot = SnapshotStore(args.record, RECORD)
+    elif args.replay:
+        snapshot = SnapshotStore(args.replay, REPLAY)
+
+    # 記録・再生は本番のDB・OpenAI・Slackに触れない（--db 指定時のみそのDBに保存する）
+    offline = snapshot is not None
+    temp_dir = None
+    db_path = args.db or DB_PATH
+    if offline and not args.db:
+        temp_dir = tempfile.TemporaryDirectory(prefix="korea-event-bot-")
+        db_path = os.path.join(temp_dir.name, "events.db")
+
+    bot = KoreaEventBot(
+        snapshot=snapshot,
+        db_path=db_path,
+        translate=not (offline or args.no_translate),
+        notify=not (offline or args.no_notify),
+    )
     
     # 引数に応じて実行モードを切り替え
-    import sys
-    
-    if len(sys.argv) > 1 and sys.argv[1] == "--once":
-        # 1回だけ実行
-        bot.run_single_check()
-    else:
-        # 継続実行
-        bot.run_continuous()
+    try:
+        if args.once:
+            # 1回だけ実行（cron などから定期実行する場合に備えて、最後にDBのメンテナンスも行う）
+            bot.run_single_check()
+            bot.run_maintenance()
+        else:
+            # 継続実行
+            bot.run_continuous()
+    finally:
+        bot.close()
+        if temp_dir:
+            temp_dir.cleanup()
 
 if __name__ == "__main__":
     main()
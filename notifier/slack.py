@@ -1,41 +1,68 @@
 import requests
 import json
-from typing import Dict, List
+from typing import Dict, List, Optional
 import logging
 
 class EventNotifier:
-    def __init__(self, slack_webhook_url: str = None):
+    def __init__(self, slack_webhook_url: str = None, profiles: Optional[List[Dict]] = None):
         self.slack_webhook_url = slack_webhook_url
+        # プロファイル名 → 通知先（"slack_webhook_url" がなければ slack_webhook_url を使う）
+        self.profile_webhooks: Dict[str, Optional[str]] = {
+            profile['name']: profile.get('slack_webhook_url') or slack_webhook_url
+            for profile in profiles or []
+        }
         self.logger = logging.getLogger(__name__)
     
     def notify_events(self, events: List[Dict]):
-        """イベント情報を通知"""
+        """イベント情報を通知（マッチしたプロファイルの通知先ごとに1回ずつ）"""
         if not events:
             self.logger.info("No events to notify")
             return
         
         for event in events:
-            if self.slack_webhook_url:
-                self.send_slack_notification(event)
-            else:
+            webhooks = self._webhooks_for(event)
+            if not webhooks:
                 self.print_notification(event)
+            for webhook_url in webhooks:
+                self.send_slack_notification(event, webhook_url)
+
+    def _webhooks_for(self, event: Dict) -> List[str]:
+        """イベントの通知先（同じURLには1回だけ送る）"""
+        profiles = event.get('profiles')
+        if not profiles or not self.profile_webhooks:
+            return [self.slack_webhook_url] if self.slack_webhook_url else []
+        webhooks = (self.profile_webhooks.get(name, self.slack_webhook_url) for name in profiles)
+        return list(dict.fromkeys(url for url in webhooks if url))
+
+    def _profile_label(self, event: Dict) -> Optional[str]:
+        """複数プロファイル運用時のみ表示するプロファイル名"""
+        if len(self.profile_webhooks) <= 1 or not event.get('profiles'):
+            return None
+        return ", ".join(event['profiles'])
     
+    @staticmethod
+    def _headline(event: Dict) -> str:
+        """通知の見出し（内容が更新されたイベントは区別する）"""
+        return "🔁 イベント内容が更新されました" if event.get('revised') else "🔥 新着イベント発見！"
+
     def print_notification(self, event: Dict):
         """ターミナルに通知を出力"""
         print("\n" + "="*80)
-        print(f"🔥 新着イベント発見！")
+        print(self._headline(event))
         print(f"サイト: {event.get('site_name', 'Unknown')}")
+        if self._profile_label(event):
+            print(f"プロファイル: {self._profile_label(event)}")
         print(f"タイトル: {event.get('translated_title', event.get('title', ''))}")
         print(f"内容: {event.get('translated_content', event.get('content', ''))}")
         print(f"要約: {event.get('summary', 'No summary')}")
         print(f"URL: {event.get('url', 'No URL')}")
         print("="*80)
     
-    def send_slack_notification(self, event: Dict):
-        """Slack通知を送信"""
+    def send_slack_notification(self, event: Dict, webhook_url: Optional[str] = None):
+        """Slack通知を送信（webhook_url を省略すると slack_webhook_url に送る）"""
         try:
             message = {
-                "text": "🔥 新着イベント発見！",
+                "text": self._headline(event),
                 "attachments": [
                     {
                         "color": "good",
@@ -64,9 +91,15 @@ class EventNotifier:
                     }
                 ]
             }
+            if self._profile_label(event):
+                message["attachments"][0]["fields"].insert(1, {
+                    "title": "プロファイル",
+                    "value": self._profile_label(event),
+                    "short": True
+                })
             
             response = requests.post(
-                self.slack_webhook_url,
+                webhook_url or self.slack_webhook_url,
                 data=json.dumps(message),
                 headers={'Content-Type': 'application/json'},
                 timeout=10
@@ -0,0 +1,270 @@
+# processor/dedup.py - サイト横断の近似重複イベント検出（MinHash + LSH）
+import hashlib
+import logging
+import re
+import unicodedata
+from array import array
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# ハングル・かな・漢字の連続と、英数字の単語
+_TOKEN_RE = re.compile(r"[가-힣ᄀ-ᇿ㄰-㆏]+|[぀-ヿ一-鿿]+|[a-z0-9]+")
+_NUMBER_RE = re.compile(r"\d+")
+
+# 近似重複の特徴量に使う内容の先頭文字数（長い本文で類似度が薄まらないように）
+CONTENT_FEATURE_CHARS = 120
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(text: str) -> Set[str]:
+    """
+    韓国語向けの特徴量（シングル）の集合を作る
+
+    ハングル・CJKの連続は文字バイグラム（分かち書きや助詞の揺れに強い）、英数字は単語単位。
+    """
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    features: Set[str] = set()
+    for token in _TOKEN_RE.findall(text):
+        if token.isascii() or len(token) == 1:
+            features.add(token)
+        else:
+            features.update(token[i:i + 2] for i in range(len(token) - 1))
+    return features
+
+
+def event_features(title: str, content: str = "") -> Set[str]:
+    """近似重複判定用の特徴量（タイトル + 内容の先頭）"""
+    return shingles(title) | shingles((content or "")[:CONTENT_FEATURE_CHARS])
+
+
+def title_numbers(title: str) -> FrozenSet[str]:
+    """タイトル中の数字（回数・号数・日付など）"""
+    text = unicodedata.normalize("NFKC", title or "")
+    return frozenset(n.lstrip("0") or "0" for n in _NUMBER_RE.findall(text))
+
+
+def numbers_compatible(a: FrozenSet[str], b: FrozenSet[str]) -> bool:
+    """
+    数字が食い違っていないか
+
+    "No.45" と "No.46" のような連番は別イベントとして扱う。
+    一方の数字がもう一方に含まれる場合（日付の年の有無など）は食い違いとみなさない。
+    """
+    return a <= b or b <= a
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def is_material_change(old_title: str, old_content: str, new_title: str, new_content: str,
+                       threshold: float = 0.8) -> bool:
+    """
+    内容の変更が再処理に値するか
+
+    タイトルの特徴量が変わった場合、または内容の類似度が threshold 未満の場合に True。
+    閲覧数の更新や一覧の並べ替え程度の変化は False になる。
+    """
+    if shingles(old_title) != shingles(new_title):
+        return True
+    return jaccard(shingles(old_content), shingles(new_content)) < threshold
+
+
+class MinHasher:
+    """num_perm 個のハッシュ関数による MinHash シグネチャ"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        self.num_perm = num_perm
+        params = []
+        for i in range(num_perm):
+            digest = hashlib.blake2b(f"{seed}:{i}".encode(), digest_size=16).digest()
+            a = int.from_bytes(digest[:8], "little") % (_MERSENNE_PRIME - 1) + 1
+            b = int.from_bytes(digest[8:], "little") % _MERSENNE_PRIME
+            params.append((a, b))
+        self._params = params
+
+    def signature(self, features: Iterable[str]) -> Tuple[int, ...]:
+        values = [
+            int.from_bytes(hashlib.blake2b(f.encode("utf-8"), digest_size=8).digest(), "little")
+            for f in features
+        ]
+        if not values:
+            return tuple([_MAX_HASH] * self.num_perm)
+        return tuple(
+            min(((a * v + b) % _MERSENNE_PRIME) & _MAX_HASH for v in values)
+            for a, b in self._params
+        )
+
+
+def estimate_similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """シグネチャから Jaccard 係数を推定"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def pack_signature(signature: Tuple[int, ...]) -> bytes:
+    """DB保存用（32bit整数の配列）"""
+    return array("I", signature).tobytes()
+
+
+def unpack_signature(blob: bytes) -> Tuple[int, ...]:
+    values = array("I")
+    values.frombytes(blob)
+    return tuple(values)
+
+
+class MinHashLSHIndex:
+    """
+    MinHash シグネチャの LSH インデックス
+
+    シグネチャを bands 個のバンドに分け、どれかのバンドが一致したものだけを候補として
+    類似度を確認する。履歴が増えても比較するのは同じバケットの候補だけで済む。
+    キーごとにサイト名とタイトル中の数字を持ち、同じサイトのものと数字が食い違うものは候補にしない。
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._buckets: List[Dict[Tuple[int, ...], List[str]]] = [{} for _ in range(bands)]
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._sites: Dict[str, Optional[str]] = {}
+        self._numbers: Dict[str, FrozenSet[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key: str, signature: Tuple[int, ...], site: Optional[str] = None,
+            numbers: FrozenSet[str] = frozenset()):
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        self._sites[key] = site
+        self._numbers[key] = numbers
+        for band, band_key in self._band_keys(signature):
+            self._buckets[band].setdefault(band_key, []).append(key)
+
+    def find(self, signature: Tuple[int, ...], site: Optional[str] = None,
+             numbers: FrozenSet[str] = frozenset()) -> Optional[str]:
+        """
+        threshold 以上で最も類似したキーを返す（同率なら先に登録されたもの）
+
+        site が同じキー（同じサイトの連番・地域別の告知など）と、数字が食い違うキーは除く。
+        """
+        best: Optional[Tuple[float, str]] = None
+        seen: Set[str] = set()
+        for band, band_key in self._band_keys(signature):
+            for key in self._buckets[band].get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                if site is not None and self._sites[key] == site:
+                    continue
+                if not numbers_compatible(numbers, self._numbers[key]):
+                    continue
+                similarity = estimate_similarity(signature, self._signatures[key])
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, key)
+        return best[1] if best else None
+
+
+class NearDuplicateDetector:
+    """
+    サイト横断の近似重複をまとめる
+
+    グループ内で最初に見つかったイベントだけを翻訳・通知の対象とし、
+    以降のイベントには duplicate_of（最初のイベントのハッシュ）を付ける。
+    同じサイト内のイベント同士はまとめない。
+    購読プロファイル（event["profiles"]）ごとに通知が届くように、このサイクルの代表には
+    重複イベントのプロファイルを合わせ、通知済みの代表が対象にしていないプロファイルがあれば
+    そのプロファイルだけを対象にした代表として残す。
+    group() は履歴のインデックスを変更しないので、代表イベントの保存が済んでから
+    remember() で登録する（保存に失敗したサイクルの代表が残らないように）。
+    """
+
+    def __init__(self, threshold: float = 0.7, num_perm: int = 64, bands: int = 16, min_features: int = 4):
+        self.hasher = MinHasher(num_perm)
+        self.index = MinHashLSHIndex(threshold, num_perm, bands)
+        self.min_features = min_features
+        # 履歴の代表イベントの通知先プロファイル（None はプロファイルを記録する前のイベント）
+        self._profiles: Dict[str, Optional[FrozenSet[str]]] = {}
+
+    def load(self, entries: Iterable[Tuple[str, bytes, str, str, Optional[List[str]]]]):
+        """保存済みの (event_hash, シグネチャ, サイト名, タイトル, プロファイル) を登録"""
+        for event_hash, blob, site_name, title, profiles in entries:
+            signature = unpack_signature(blob)
+            if len(signature) == self.hasher.num_perm:
+                self.index.add(event_hash, signature, site_name, title_numbers(title))
+                self._profiles[event_hash] = frozenset(profiles) if profiles is not None else None
+        logger.info(f"Loaded {len(self.index)} events into near-duplicate index")
+
+    def group(self, events: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """(代表イベント, 近似重複イベント) に分ける（履歴のインデックスは変更しない）"""
+        primary: List[Dict] = []
+        duplicates: List[Dict] = []
+        # このサイクルの代表イベント（まだ保存されていないので履歴とは分けておく）
+        pending = MinHashLSHIndex(self.index.threshold, self.hasher.num_perm, self.index.bands)
+        pending_events: Dict[str, Dict] = {}
+        for event in events:
+            title = event.get("title", "")
+            if len(shingles(title)) < self.min_features:
+                # 短すぎるタイトルは誤判定しやすいので対象外
+                primary.append(event)
+                continue
+
+            signature = self.hasher.signature(event_features(title, event.get("content", "")))
+            event["minhash"] = pack_signature(signature)
+            site = event.get("site_name")
+            numbers = title_numbers(title)
+            match = self.index.find(signature, site, numbers)
+            if match and match != event.get("event_hash"):
+                notified = self._profiles.get(match)
+                uncovered = [p for p in event.get("profiles") or () if notified is not None and p not in notified]
+                if not uncovered:
+                    event["duplicate_of"] = match
+                    duplicates.append(event)
+                    logger.debug(f"[DUP] '{title[:60]}' -> {match}")
+                    continue
+                # 通知済みの代表が届いていないプロファイルにだけ通知する
+                event["profiles"] = uncovered
+
+            match = pending.find(signature, site, numbers)
+            if match and match != event.get("event_hash"):
+                # 代表はまだ通知していないので、重複イベントのプロファイルにも届くようにする
+                first = pending_events[match]
+                if "profiles" in first:
+                    first["profiles"] += [p for p in event.get("profiles") or () if p not in first["profiles"]]
+                event["duplicate_of"] = match
+                duplicates.append(event)
+                logger.debug(f"[DUP] '{title[:60]}' -> {match}")
+            else:
+                pending.add(event["event_hash"], signature, site, numbers)
+                pending_events[event["event_hash"]] = event
+                primary.append(event)
+
+        if duplicates:
+            logger.info(f"Grouped {len(duplicates)} near-duplicate events out of {len(events)}")
+        return primary, duplicates
+
+    def remember(self, events: Iterable[Dict]):
+        """保存済みの代表イベントを履歴のインデックスに登録する"""
+        for event in events:
+            if event.get("minhash") and not event.get("duplicate_of"):
+                self.index.add(
+                    event["event_hash"],
+                    unpack_signature(event["minhash"]),
+                    event.get("site_name"),
+                    title_numbers(event.get("title", "")),
+                )
+                profiles = event.get("profiles")
+                self._profiles.setdefault(event["event_hash"], frozenset(profiles) if profiles is not None else None)
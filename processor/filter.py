@@ -1,7 +1,9 @@
 # processor/filter.py
 import logging
 import unicodedata
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from processor.matcher import MATCH_AUTO, KeywordMatch, KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
@@ -12,22 +14,205 @@ def _normalize(s: str) -> str:
     s = " ".join(s.split())
     return s
 
+def _maximal_matches(matches: List[KeywordMatch]) -> List[KeywordMatch]:
+    """他のマッチに含まれるマッチを除く（"팝업스토어" の中の "팝업" を二重に数えない）"""
+    result: List[KeywordMatch] = []
+    covered_until = -1
+    for m in sorted(matches, key=lambda m: (m.start, -m.end)):
+        if m.end <= covered_until:
+            continue
+        result.append(m)
+        covered_until = m.end
+    return result
+
 class EventFilter:
-    def __init__(self, keywords: List[str]):
-        self.keywords = [_normalize(k) for k in keywords if k]
+    """
+    注目ワードと除外ワードでイベントの関連度を計算する
 
-    def is_interesting(self, event: Dict) -> bool:
+    キーワードごとの重み（weights、未指定は default_weight）をマッチした語ごとに1回ずつ合計し、
+    タイトル内のマッチは title_boost 倍する。除外ワードは exclude_weight（負の値）で加算する。
+    関連度が threshold 以上のイベントを注目イベントとし、1回あたり top_k 件までに絞る。
+    threshold が None なら注目ワードが1つでもあれば（従来どおり）注目イベントとする。
+    match_modes はキーワードごとの照合モード（processor.matcher の MATCH_MODES）。
+
+    profiles を渡すと購読プロファイルごとに判定する（config.SUBSCRIPTION_PROFILES の形式）。
+    各プロファイルは "name" と、任意で "keywords" / "exclude_keywords" / "weights" /
+    "threshold" / "top_k" を持ち、指定のない項目はこのクラスの引数の値を使う。
+    全プロファイルのキーワードを1つのオートマトンにまとめるので、照合は1イベント1回で済む。
+    """
+
+    def __init__(
+        self,
+        keywords: List[str],
+        exclude_keywords: Optional[List[str]] = None,
+        weights: Optional[Dict[str, float]] = None,
+        threshold: Optional[float] = None,
+        top_k: Optional[int] = None,
+        default_weight: float = 1.0,
+        exclude_weight: float = -10.0,
+        title_boost: float = 1.5,
+        match_modes: Optional[Dict[str, str]] = None,
+        default_mode: str = MATCH_AUTO,
+        profiles: Optional[List[Dict]] = None,
+    ):
+        self.title_boost = title_boost
+        self.profiles: List[Dict] = []
+        for profile in profiles or [{"name": "default"}]:
+            include = [_normalize(k) for k in profile.get("keywords", keywords) if k]
+            exclude = [_normalize(k) for k in profile.get("exclude_keywords", exclude_keywords or []) if k]
+            profile_weights: Dict[str, float] = {k: default_weight for k in include}
+            profile_weights.update({k: exclude_weight for k in exclude})
+            for keyword, weight in profile.get("weights", weights or {}).items():
+                profile_weights[_normalize(keyword)] = weight
+            self.profiles.append({
+                "name": profile["name"],
+                "keywords": include,
+                "exclude_keywords": set(exclude),
+                "all_keywords": set(include) | set(exclude),
+                "weights": profile_weights,
+                "threshold": profile.get("threshold", threshold),
+                "top_k": profile.get("top_k", top_k),
+            })
+
+        self.keywords = list(dict.fromkeys(k for p in self.profiles for k in p["keywords"]))
+        self.exclude_keywords = list(dict.fromkeys(k for p in self.profiles for k in p["exclude_keywords"]))
+
+        # 注目ワードと除外ワードを1つのオートマトンにまとめておく（照合はテキスト1回の走査で済む）
+        self.matcher = KeywordMatcher(
+            self.keywords + self.exclude_keywords,
+            modes={_normalize(k): mode for k, mode in (match_modes or {}).items()},
+            default_mode=default_mode,
+        )
+        logger.debug(
+            f"Compiled {len(self.matcher.keywords)} keywords for {len(self.profiles)} profiles ({self.matcher.backend})"
+        )
+        if self.matcher.backend != "pyahocorasick":
+            logger.warning("pyahocorasick is not installed; keyword matching falls back to the slower pure-Python automaton")
+
+    def match(self, event: Dict) -> List[KeywordMatch]:
+        """タイトル + 内容（正規化済み）に含まれる全キーワードと位置を返す"""
+        return self.matcher.find_all(self._text(event))
+
+    @staticmethod
+    def _text(event: Dict) -> str:
         title = _normalize(event.get("title", ""))
         content = _normalize(event.get("content", ""))
-        text = f"{title} {content}".strip()
+        return f"{title} {content}".strip()
+
+    def score(self, event: Dict) -> float:
+        """
+        関連度を計算し、マッチしたキーワードと一緒にイベントに記録する
+
+        profiles: 対象になったプロファイル名の一覧
+        profile_scores: プロファイル名 → 関連度（キーワードがマッチしたプロファイルのみ）
+        matched_keywords: 出現順の注目ワード一覧
+        keyword_positions: 注目ワード → 開始位置のリスト（正規化後の "タイトル 内容" 上の位置）
+        excluded_keywords: マッチした除外ワード
+        relevance_score: 関連度（対象になったプロファイルの最大値）
+        """
+        matches = self.match(event)
+        title_length = len(_normalize(event.get("title", "")))
 
-        for kw in self.keywords:
-            if kw and kw in text:
-                logger.debug(f"[HIT] kw='{kw}' title='{event.get('title','')[:60]}'")
-                return True
-        return False
+        profiles: List[str] = []
+        scores: Dict[str, float] = {}
+        best: Optional[float] = None
+        positions: Dict[str, List[int]] = {}
+        excluded: List[str] = []
+        fallback: Optional[tuple] = None  # どのプロファイルにも該当しない場合に記録する内容
+        for profile in self.profiles:
+            own = [m for m in matches if m.keyword in profile["all_keywords"]]
+            if not own:
+                continue
+            score, profile_positions, profile_excluded = self._score_profile(profile, own, title_length)
+            scores[profile["name"]] = score
+            if not self._passes(profile, score, profile_positions, profile_excluded):
+                if fallback is None or score > fallback[0]:
+                    fallback = (score, profile_positions, profile_excluded)
+                continue
+            profiles.append(profile["name"])
+            best = score if best is None else max(best, score)
+            for keyword, starts in profile_positions.items():
+                positions.setdefault(keyword, starts)
+            excluded.extend(k for k in profile_excluded if k not in excluded)
+
+        if not profiles and fallback:
+            best, positions, excluded = fallback
+        # 出現順に並べ直す
+        positions = dict(sorted(positions.items(), key=lambda kv: kv[1][0]))
+
+        event["profiles"] = profiles
+        event["profile_scores"] = scores
+        event["matched_keywords"] = list(positions)
+        event["keyword_positions"] = positions
+        event["excluded_keywords"] = excluded
+        event["relevance_score"] = best or 0.0
+        return event["relevance_score"]
+
+    def _score_profile(self, profile: Dict, matches: List[KeywordMatch], title_length: int):
+        weights = profile["weights"]
+        positions: Dict[str, List[int]] = {}
+        excluded: List[str] = []
+        in_title: Dict[str, bool] = {}
+        for m in _maximal_matches(matches):
+            if m.keyword in profile["exclude_keywords"]:
+                if m.keyword not in excluded:
+                    excluded.append(m.keyword)
+            else:
+                positions.setdefault(m.keyword, []).append(m.start)
+            in_title[m.keyword] = in_title.get(m.keyword, False) or m.start < title_length
+
+        score = sum(
+            weights[keyword] * (self.title_boost if in_title[keyword] and weights[keyword] > 0 else 1.0)
+            for keyword in list(positions) + excluded
+        )
+        return round(score, 3), positions, excluded
+
+    @staticmethod
+    def _passes(profile: Dict, score: float, positions: Dict, excluded: List[str]) -> bool:
+        if profile["threshold"] is None:
+            return bool(positions) and not excluded
+        return score >= profile["threshold"]
+
+    def is_interesting(self, event: Dict) -> bool:
+        score = self.score(event)
+        interesting = bool(event["profiles"])
+
+        if interesting:
+            logger.debug(
+                f"[HIT] score={score} profiles={event['profiles']} kw={event['matched_keywords']} "
+                f"title='{event.get('title','')[:60]}'"
+            )
+        elif event["excluded_keywords"]:
+            logger.debug(f"[EXCLUDE] kw={event['excluded_keywords']} title='{event.get('title','')[:60]}'")
+        return interesting
 
     def filter_events(self, events: List[Dict]) -> List[Dict]:
+        """
+        注目イベントを関連度の高い順に返す
+
+        top_k はプロファイルごとに適用する（上位に入らなかったプロファイルは profiles から外し、
+        どのプロファイルにも残らなかったイベントは除いて deferred を付ける）。
+        """
         hits = [e for e in events if self.is_interesting(e)]
+        hits.sort(key=lambda e: e["relevance_score"], reverse=True)
+
+        kept: Dict[str, set] = {}
+        for profile in self.profiles:
+            name = profile["name"]
+            profile_hits = [e for e in hits if name in e["profiles"]]
+            if profile["top_k"] is not None and len(profile_hits) > profile["top_k"]:
+                logger.info(
+                    f"Keeping top {profile['top_k']} of {len(profile_hits)} interesting events "
+                    f"for profile '{name}' by relevance"
+                )
+                profile_hits.sort(key=lambda e: e["profile_scores"][name], reverse=True)
+                profile_hits = profile_hits[:profile["top_k"]]
+            kept[name] = {id(e) for e in profile_hits}
+        for event in hits:
+            event["profiles"] = [name for name in event["profiles"] if id(event) in kept[name]]
+            if not event["profiles"]:
+                event["deferred"] = True
+        hits = [e for e in hits if e["profiles"]]
+
         logger.info(f"Filtered {len(hits)} interesting events from {len(events)} total events")
         return hits
@@ -0,0 +1,187 @@
+# processor/matcher.py - 多数のキーワードを1回の走査で照合する（Aho-Corasick）
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# pyahocorasick（requirements.txt に含む、C実装で高速）。インストールできない環境では純Python版のオートマトンを使う
+# （純Python版は従来の `in` による判定と同程度の速度にしかならない）
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+# 照合モード
+MATCH_AUTO = "auto"            # ラテン文字のキーワードは word、それ以外は substring
+MATCH_SUBSTRING = "substring"  # どこに含まれていてもマッチ
+MATCH_WORD = "word"            # 前後が単語の区切りのときだけマッチ
+MATCH_PREFIX = "prefix"        # 直前が単語の区切りのときだけマッチ（"collab" → "collaboration"）
+MATCH_MODES = (MATCH_AUTO, MATCH_SUBSTRING, MATCH_WORD, MATCH_PREFIX)
+
+# word モードでハングルのキーワードの直後に続いてもよい助詞（"아이브의" はマッチ、"아이브로우" はしない）
+HANGUL_PARTICLES = (
+    "에서", "으로", "에게", "까지", "부터", "처럼", "보다", "이랑", "하고",
+    "은", "는", "이", "가", "을", "를", "의", "에", "도", "와", "과", "로", "만", "랑",
+)
+
+# word モードで複数形の "s" を許す最短のキーワード長（"new" → "news" は許さない）
+PLURAL_MIN_LENGTH = 4
+
+_LATIN, _HANGUL, _KANA, _HAN = "latin", "hangul", "kana", "han"
+
+
+def _script(ch: str) -> Optional[str]:
+    """単語を構成する文字の種類（区切り文字なら None）"""
+    if "가" <= ch <= "힣" or "ᄀ" <= ch <= "ᇿ" or "㄰" <= ch <= "㆏":
+        return _HANGUL
+    if "぀" <= ch <= "ヿ":
+        return _KANA
+    if "一" <= ch <= "鿿" or "㐀" <= ch <= "䶿":
+        return _HAN
+    if ch.isalnum():
+        return _LATIN
+    return None
+
+
+class KeywordMatch(NamedTuple):
+    keyword: str
+    start: int  # テキスト内の開始位置
+    end: int    # 終了位置（この位置の文字は含まない）
+
+
+class KeywordMatcher:
+    """
+    全キーワードを1つのオートマトンにまとめ、テキストを1回走査して全マッチ（重なりを含む）を返す
+
+    キーワード数に関係なく走査はテキスト長に比例する。
+    構築は1回だけ行い、以降の照合で使い回す。
+
+    modes でキーワードごとの照合モード（MATCH_MODES）を指定できる（未指定は default_mode）。
+    単語の区切りは文字種で判定するので、"bts콘서트" の "bts" や "限定セール" の "限定" は
+    区切られているとみなす。区切りの確認はマッチごとに前後1文字を見るだけなので、
+    照合全体は1回の走査のまま。
+    """
+
+    def __init__(self, keywords: Iterable[str], use_native: bool = True,
+                 modes: Optional[Dict[str, str]] = None, default_mode: str = MATCH_AUTO):
+        self.keywords: List[str] = list(dict.fromkeys(k for k in keywords if k))
+        modes = modes or {}
+        for mode in [default_mode, *modes.values()]:
+            if mode not in MATCH_MODES:
+                raise ValueError(f"Unknown match mode: {mode}")
+        # 区切りを確認するキーワード → (左端の文字種, 右端の文字種, 複数形を許すか)
+        self._bounded: Dict[str, Tuple[Optional[str], Optional[str], bool]] = {}
+        for keyword in self.keywords:
+            rule = self._boundary_rule(keyword, modes.get(keyword, default_mode))
+            if rule:
+                self._bounded[keyword] = rule
+
+        if use_native and AHOCORASICK_AVAILABLE:
+            self.backend = "pyahocorasick"
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self.keywords:
+                self._automaton.add_word(keyword, (len(keyword), keyword))
+            if self.keywords:
+                self._automaton.make_automaton()
+        else:
+            self.backend = "python"
+            self._transitions, self._outputs = self._build_dfa(self.keywords)
+
+    @staticmethod
+    def _boundary_rule(keyword: str, mode: str) -> Optional[Tuple[Optional[str], Optional[str], bool]]:
+        if mode == MATCH_AUTO:
+            scripts = {_script(ch) for ch in keyword} - {None}
+            mode = MATCH_WORD if scripts == {_LATIN} else MATCH_SUBSTRING
+        if mode == MATCH_SUBSTRING:
+            return None
+        left = _script(keyword[0])
+        right = _script(keyword[-1]) if mode == MATCH_WORD else None
+        plural = right == _LATIN and len(keyword) >= PLURAL_MIN_LENGTH
+        if left is None and right is None:
+            return None
+        return left, right, plural
+
+    def mode_of(self, keyword: str) -> str:
+        """実際に適用される照合モード"""
+        rule = self._bounded.get(keyword)
+        if rule is None:
+            return MATCH_SUBSTRING
+        return MATCH_WORD if rule[1] else MATCH_PREFIX
+
+    @staticmethod
+    def _is_bounded(text: str, start: int, end: int, rule: Tuple[Optional[str], Optional[str], bool]) -> bool:
+        left, right, plural = rule
+        if left and start > 0 and _script(text[start - 1]) == left:
+            return False
+        if not right or end >= len(text) or _script(text[end]) != right:
+            return True
+
+        # 区切りでなくても、直後が複数形の "s" や助詞で終わっていれば許す
+        if plural and text[end] == "s":
+            tail = end + 1
+        elif right == _HANGUL:
+            tail = next((end + len(p) for p in HANGUL_PARTICLES if text.startswith(p, end)), None)
+            if tail is None:
+                return False
+        else:
+            return False
+        return tail >= len(text) or _script(text[tail]) != right
+
+    @staticmethod
+    def _build_dfa(keywords: List[str]) -> Tuple[List[Dict[str, int]], List[Tuple[Tuple[int, str], ...]]]:
+        """
+        失敗リンクを展開済みの遷移表を作る（走査時は1文字につき辞書を1回引くだけで済む）
+
+        遷移先が初期状態になる文字は表に持たない。
+        """
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[List[Tuple[int, str]]] = [[]]
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    outputs.append([])
+                    goto[state][ch] = nxt
+                state = nxt
+            outputs[state].append((len(keyword), keyword))
+
+        fail = [0] * len(goto)
+        transitions: List[Dict[str, int]] = [dict(goto[0])] + [{} for _ in goto[1:]]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            # 幅優先なので失敗先（より浅い状態）の遷移表は完成済み
+            transitions[state] = {**transitions[fail[state]], **goto[state]}
+            outputs[state] = outputs[state] + outputs[fail[state]]
+            for ch, nxt in goto[state].items():
+                fail[nxt] = transitions[fail[state]].get(ch, 0)
+                queue.append(nxt)
+        return transitions, [tuple(out) for out in outputs]
+
+    def find_all(self, text: str) -> List[KeywordMatch]:
+        """全マッチを終了位置順に返す（照合モードの区切りを満たさないものは除く）"""
+        if not text or not self.keywords:
+            return []
+
+        matches: List[KeywordMatch] = []
+        if self.backend == "pyahocorasick":
+            for end, (length, keyword) in self._automaton.iter(text):
+                matches.append(KeywordMatch(keyword, end - length + 1, end + 1))
+        else:
+            transitions, outputs = self._transitions, self._outputs
+            state = 0
+            for i, ch in enumerate(text):
+                state = transitions[state].get(ch, 0)
+                if outputs[state]:
+                    for length, keyword in outputs[state]:
+                        matches.append(KeywordMatch(keyword, i - length + 1, i + 1))
+
+        bounded = self._bounded
+        if not bounded:
+            return matches
+        return [
+            m for m in matches
+            if m.keyword not in bounded or self._is_bounded(text, m.start, m.end, bounded[m.keyword])
+        ]
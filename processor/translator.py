@@ -1,10 +1,80 @@
-from openai import OpenAI
+from openai import OpenAI, APIConnectionError, InternalServerError, RateLimitError
+import json
 import logging
-from typing import Dict, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+from db.translation_cache import TranslationCache, cache_key
+from utils.ratelimit import TokenBucket
+
+# プロンプト・出力形式を変えたら上げる（古い翻訳をキャッシュから返さないように）。
+# 1件ずつの翻訳（行形式）と一括翻訳（JSON）はプロンプトも解析も違うので、キャッシュも分ける
+SINGLE_PROMPT_VERSION = "single-1"
+BATCH_PROMPT_VERSION = "batch-1"
+
+# 一括翻訳の指示（リクエストごとに1回だけ送る）
+BATCH_SYSTEM_PROMPT = """
+あなたは韓国語のイベント情報を日本語に翻訳するアシスタントです。
+せどり・転売の観点から重要な情報（限定性、価格、数量、期間など）を重視して翻訳してください。
+
+入力は {"id": {"title": タイトル, "content": 内容}, ...} 形式のJSONです。
+全てのidについて、以下の形式のJSONオブジェクトだけを返してください：
+{"id": {"translated_title": "翻訳されたタイトル", "translated_content": "翻訳された内容", "summary": "せどり観点での重要ポイントを3行以内で要約"}, ...}
+""".strip()
+
+TRANSLATION_FIELDS = ('translated_title', 'translated_content', 'summary')
+
+
+def estimate_tokens(text: str) -> int:
+    """トークン数の概算（ハングル・CJKは1文字1トークン、それ以外は4文字1トークン）"""
+    if not text:
+        return 0
+    wide = sum(1 for ch in text if ord(ch) >= 0x1100)
+    return wide + (len(text) - wide + 3) // 4
+
 
 class EventTranslator:
-    def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gpt-3.5-turbo",
+        max_tokens: int = 500,
+        temperature: float = 0.3,
+        batch_token_budget: int = 8000,
+        batch_max_events: int = 20,
+        batch_max_attempts: int = 3,
+        cache: Optional[TranslationCache] = None,
+        base_url: Optional[str] = None,
+        concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        max_output_tokens: int = 4096,
+    ):
+        # リトライは自前で行う（429 の Retry-After を全ワーカーで共有するため）
+        self.client = OpenAI(api_key=api_key, base_url=base_url or None, max_retries=0)
+        self.model = model
+        self.max_tokens = max_tokens  # 1イベントあたりの出力トークン上限
+        self.temperature = temperature
+        self.batch_token_budget = batch_token_budget  # 1リクエストの入力 + 出力の上限
+        self.batch_max_events = batch_max_events
+        self.batch_max_attempts = batch_max_attempts
+        self.max_output_tokens = max_output_tokens  # モデルの1応答あたりの出力上限
+        self.cache = cache
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max_retries
+        # 分あたりの上限をトークンバケットにする（APIは1分より短い単位でも制限するので、
+        # リクエストは等間隔に送り、トークンのバーストは1秒分まで）
+        self.request_bucket = TokenBucket(requests_per_minute / 60, 1.0) if requests_per_minute else None
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute / 60, max(float(batch_token_budget), tokens_per_minute / 60))
+            if tokens_per_minute else None
+        )
+        self._pause_until = 0.0
+        self._pause_lock = threading.Lock()
         self.logger = logging.getLogger(__name__)
     
     def translate_and_summarize(self, event: Dict) -> Dict:
@@ -12,6 +82,9 @@ class EventTranslator:
         try:
             title = event.get('title', '')
             content = event.get('content', '')
+
+            if self._apply_cached(event, SINGLE_PROMPT_VERSION):
+                return event
             
             # 翻訳プロンプト
             translation_prompt = f"""
@@ -27,13 +100,11 @@ class EventTranslator:
 要約: [せどり観点での重要ポイントを3行以内で要約]
 """
             
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = self._complete(
                 messages=[
                     {"role": "user", "content": translation_prompt}
                 ],
-                max_tokens=500,
-                temperature=0.3
+                max_tokens=self.max_tokens,
             )
             
             result_text = response.choices[0].message.content
@@ -42,6 +113,8 @@ class EventTranslator:
             translated_data = self.parse_translation_result(result_text)
             
             event.update(translated_data)
+            if self.cache and translated_data['translated_title']:
+                self.cache.put(self._cache_key(event, SINGLE_PROMPT_VERSION), translated_data)
             
             self.logger.info(f"Translated event: {event.get('title', '')}")
             return event
@@ -51,6 +124,235 @@ class EventTranslator:
             # 翻訳失敗時はそのまま返す
             return event
     
+    def translate_batch(self, events: List[Dict]) -> List[Dict]:
+        """
+        複数のイベントをまとめて翻訳・要約（入力と同じ順で返す）
+
+        batch_token_budget に収まるだけのイベントを1リクエストに詰め、結果をJSON（バッチ内のid → 翻訳）
+        で受け取る。応答に含まれなかった・形式が壊れていたイベントだけを、より小さいバッチで
+        batch_max_attempts 回まで再送する。APIの失敗（_complete で再送しきったもの）は再送せず、
+        以降のバッチも送らない。失敗したイベントは翻訳なしのまま返す。
+        キャッシュ済みの原文はAPIに送らず、同じ原文のイベントは1件だけ送って結果を共有する。
+        バッチは concurrency 本のスレッドで並行に送る（分あたりのリクエスト数・トークン数の上限内で）。
+        """
+        targets = [event for event in events if event.get('title') or event.get('content')]
+        cached = {id(event) for event in targets if self._apply_cached(event, BATCH_PROMPT_VERSION)}
+
+        # 同じ原文（キャッシュキー）ごとにまとめ、代表の1件だけを送る
+        groups: Dict[str, List[Dict]] = {}
+        for event in targets:
+            if id(event) not in cached:
+                groups.setdefault(self._cache_key(event, BATCH_PROMPT_VERSION), []).append(event)
+        pending = [group[0] for group in groups.values()]
+        given_up: List[Dict] = []
+        api_down = threading.Event()
+        max_events = self.batch_max_events
+        requests_sent = 0
+
+        for attempt in range(self.batch_max_attempts):
+            if not pending or api_down.is_set():
+                break
+            retry: List[Dict] = []
+            batches = self._pack(pending, max_events)
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                for batch_retry, batch_given_up in executor.map(
+                    lambda batch: self._translate_packed(batch, api_down), batches
+                ):
+                    retry.extend(batch_retry)
+                    given_up.extend(batch_given_up)
+            requests_sent += len(batches)
+            if retry:
+                self.logger.warning(f"{len(retry)} events came back missing or malformed (attempt {attempt + 1})")
+            pending = retry
+            # 出力の打ち切りで失敗しやすいので、再送時はバッチを小さくする
+            max_events = max(1, max_events // 2)
+
+        translated = len(cached)
+        failed_ids = {id(event) for event in pending + given_up}
+        for key, (first, *others) in groups.items():
+            if id(first) in failed_ids:
+                continue
+            result = {field: first[field] for field in TRANSLATION_FIELDS}
+            for event in others:
+                event.update(result)
+            if self.cache and result['translated_title']:
+                self.cache.put(key, result)
+            translated += 1 + len(others)
+
+        message = f"Translated {translated}/{len(targets)} events in {requests_sent} requests"
+        if self.cache:
+            self.cache.flush()
+            stats = self.cache.stats()
+            message += f" ({len(cached)} from cache, total hits={stats['hits']} misses={stats['misses']})"
+        self.logger.info(message)
+        return events
+
+    def _cache_key(self, event: Dict, prompt_version: str) -> str:
+        return cache_key(event.get('title', ''), event.get('content', ''), self.model, prompt_version)
+
+    def _apply_cached(self, event: Dict, prompt_version: str) -> bool:
+        """キャッシュ済みなら翻訳をイベントに反映して True"""
+        if not self.cache:
+            return False
+        result = self.cache.get(self._cache_key(event, prompt_version))
+        if result is None:
+            return False
+        event.update(result)
+        return True
+
+    def _output_allowance(self, event: Dict) -> int:
+        """1イベントの出力トークンの見積もり（翻訳は原文と同程度 + 要約。max_tokens が上限）"""
+        source = estimate_tokens(event.get('title', '')) + estimate_tokens(event.get('content', ''))
+        return min(self.max_tokens, 2 * source + 100)
+
+    def _event_cost(self, event: Dict) -> int:
+        """バッチ内で1イベントが使うトークン数の見積もり（入力 + 出力）"""
+        return estimate_tokens(event.get('title', '')) + estimate_tokens(event.get('content', '')) + 10 + self._output_allowance(event)
+
+    def _pack(self, events: List[Dict], max_events: int) -> List[List[Dict]]:
+        """トークン予算と件数の上限に収まるように順にバッチへ詰める（予算を超える1件は単独のバッチ）"""
+        budget = self.batch_token_budget - estimate_tokens(BATCH_SYSTEM_PROMPT)
+        batches: List[List[Dict]] = []
+        batch: List[Dict] = []
+        used = output = 0
+        for event in events:
+            cost = self._event_cost(event)
+            allowance = self._output_allowance(event)
+            if batch and (used + cost > budget or output + allowance > self.max_output_tokens
+                          or len(batch) >= max_events):
+                batches.append(batch)
+                batch, used, output = [], 0, 0
+            batch.append(event)
+            used += cost
+            output += allowance
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _translate_packed(self, batch: List[Dict], api_down: threading.Event) -> Tuple[List[Dict], List[Dict]]:
+        """
+        1リクエストで翻訳し、(再送するイベント, 諦めたイベント) を返す
+
+        再送するのは応答に含まれなかった・形式が壊れていたイベントだけ。APIの失敗は
+        _complete が再送しきった後なので諦め、api_down を立てて残りのバッチも送らない。
+        """
+        if api_down.is_set():
+            return [], batch
+        payload = {
+            str(i): {"title": event.get('title', ''), "content": event.get('content', '')}
+            for i, event in enumerate(batch, 1)
+        }
+        try:
+            response = self._complete(
+                messages=[
+                    {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                    {"role": "user", "content": json.dumps(payload, ensure_ascii=False)},
+                ],
+                max_tokens=min(self.max_output_tokens, sum(self._output_allowance(event) for event in batch)),
+                response_format={"type": "json_object"},
+            )
+            results = self.parse_batch_result(response.choices[0].message.content)
+        except Exception as e:
+            self.logger.error(f"Error translating batch of {len(batch)} events, skipping remaining batches: {e}")
+            api_down.set()
+            return [], batch
+
+        retry: List[Dict] = []
+        for i, event in enumerate(batch, 1):
+            result = results.get(str(i))
+            if result is None:
+                retry.append(event)
+            else:
+                event.update(result)
+        return retry, []
+
+    def _complete(self, messages: List[Dict], max_tokens: int, **kwargs):
+        """
+        レート制限を守ってチャット補完を呼ぶ
+
+        送信前に分あたりのリクエスト数・トークン数（入力の見積もり + max_tokens）のバケットを待つ。
+        429 は Retry-After（なければ指数バックオフ）の間、全ワーカーの送信を止めてから再送する。
+        接続エラーと 5xx も max_retries 回まで再送する。
+        """
+        cost = sum(estimate_tokens(message['content']) for message in messages) + max_tokens
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_pause()
+            if self.request_bucket:
+                self.request_bucket.acquire()
+            if self.token_bucket:
+                self.token_bucket.acquire(cost)
+            try:
+                return self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=self.temperature,
+                    **kwargs,
+                )
+            except RateLimitError as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self._retry_after(e)
+                delay = min(60.0, 2.0 ** attempt) if delay is None else delay
+                self.logger.warning(f"Rate limited by OpenAI API, retrying in {delay:.1f}s")
+                self._pause(delay)
+            except (APIConnectionError, InternalServerError) as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = min(60.0, 2.0 ** attempt)
+                self.logger.warning(f"OpenAI API error ({e}), retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    @staticmethod
+    def _retry_after(error: RateLimitError) -> Optional[float]:
+        """429 応答の待ち時間（秒）。Retry-After-Ms / Retry-After（秒数または日時）を見る"""
+        response = getattr(error, 'response', None)
+        headers = response.headers if response is not None else {}
+        try:
+            if headers.get('retry-after-ms'):
+                return max(0.0, float(headers['retry-after-ms']) / 1000)
+            value = headers.get('retry-after')
+            if not value:
+                return None
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _pause(self, delay: float):
+        """全ワーカーの送信を delay 秒止める"""
+        with self._pause_lock:
+            self._pause_until = max(self._pause_until, time.monotonic() + delay)
+
+    def _wait_for_pause(self):
+        while True:
+            with self._pause_lock:
+                remaining = self._pause_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    @staticmethod
+    def parse_batch_result(result_text: str) -> Dict[str, Dict]:
+        """一括翻訳の結果を解析（形式が正しいidだけを返す。JSONとして壊れていれば空）"""
+        try:
+            data = json.loads(result_text or '')
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+
+        results: Dict[str, Dict] = {}
+        for key, item in data.items():
+            if not isinstance(item, dict):
+                continue
+            if not all(isinstance(item.get(field), str) for field in TRANSLATION_FIELDS):
+                continue
+            results[str(key)] = {field: item[field].strip() for field in TRANSLATION_FIELDS}
+        return results
+
     def parse_translation_result(self, result_text: str) -> Dict:
         """ChatGPTの翻訳結果を解析"""
         lines = result_text.strip().split('\n')
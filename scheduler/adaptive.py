@@ -0,0 +1,101 @@
+# scheduler/adaptive.py - サイトごとの適応的ポーリングスケジューラ
+import logging
+import time
+from typing import Dict, List, Optional
+
+
+class SiteScheduler:
+    """
+    サイトごとに次回チェック時刻を持ち、新着イベントの観測頻度から間隔を学習する
+
+    新着の多いサイトは間隔を短く、静かなサイトは長くする（min/maxの範囲内）。
+    1回の調整幅は speedup〜backoff 倍に制限し、単発の変動で間隔が振れすぎないようにする。
+    """
+
+    def __init__(
+        self,
+        sites: List[Dict],
+        default_interval: float,
+        min_interval: float,
+        max_interval: float,
+        target_new_events: float = 1.0,
+        speedup: float = 0.5,
+        backoff: float = 1.5,
+        smoothing: float = 0.3,
+        now: Optional[float] = None,
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.sites = list(sites)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.target_new_events = target_new_events
+        self.speedup = speedup
+        self.backoff = backoff
+        self.smoothing = smoothing
+
+        now = time.time() if now is None else now
+        self.states: Dict[str, Dict] = {}
+        for site in self.sites:
+            interval = self._clamp(site, site.get("interval", default_interval))
+            # 起動直後は全サイトを一度チェックする
+            self.states[site["name"]] = {
+                "interval": interval,
+                "next_due": now,
+                "last_checked": None,
+                "rate": 0.0,  # 新着イベント/秒（指数移動平均）
+            }
+
+    def due_sites(self, now: Optional[float] = None) -> List[Dict]:
+        """チェック時刻を迎えたサイトを設定順で返す"""
+        now = time.time() if now is None else now
+        return [site for site in self.sites if self.states[site["name"]]["next_due"] <= now]
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """次にいずれかのサイトがチェック時刻を迎えるまでの秒数"""
+        now = time.time() if now is None else now
+        if not self.states:
+            return self.max_interval
+        next_due = min(state["next_due"] for state in self.states.values())
+        return max(0.0, next_due - now)
+
+    def record_result(self, site_name: str, new_count: int, now: Optional[float] = None):
+        """チェック結果（新着件数）から次回の間隔を更新"""
+        state = self.states.get(site_name)
+        if state is None:
+            return
+        now = time.time() if now is None else now
+        site = next(s for s in self.sites if s["name"] == site_name)
+
+        if state["last_checked"] is None:
+            # 初回は観測値をそのまま採用する
+            observed = new_count / max(state["interval"], 1.0)
+            state["rate"] = observed
+        else:
+            observed = new_count / max(now - state["last_checked"], 1.0)
+            state["rate"] = self.smoothing * observed + (1 - self.smoothing) * state["rate"]
+
+        current = state["interval"]
+        if state["rate"] > 0:
+            # 1回あたりの新着が target_new_events 件になる間隔を目指す
+            desired = self.target_new_events / state["rate"]
+        else:
+            desired = self.max_interval
+        if new_count == 0:
+            # 今回新着がなければ短縮はしない
+            desired = max(desired, current)
+        else:
+            # 新着があれば延長はしない
+            desired = min(desired, current)
+        desired = min(max(desired, current * self.speedup), current * self.backoff)
+
+        state["interval"] = self._clamp(site, desired)
+        state["last_checked"] = now
+        state["next_due"] = now + state["interval"]
+        self.logger.debug(
+            f"{site_name}: {new_count} new, interval {current:.0f}s -> {state['interval']:.0f}s"
+        )
+
+    def _clamp(self, site: Dict, interval: float) -> float:
+        low = site.get("min_interval", self.min_interval)
+        high = site.get("max_interval", self.max_interval)
+        return min(max(interval, low), high)
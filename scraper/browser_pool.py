@@ -0,0 +1,120 @@
+# scraper/browser_pool.py - 使い回し可能なヘッドレスブラウザのプール
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, List
+
+
+class BrowserSession:
+    """プール内の1ブラウザ（WebDriverと処理したページ数）"""
+
+    __slots__ = ("driver", "pages")
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    WebDriverの上限付きプール
+
+    サイト・サイクルをまたいでブラウザを再利用し、貸し出し前のヘルスチェックと
+    max_pages ページ処理後の作り直しを行う。
+    """
+
+    def __init__(
+        self,
+        driver_factory: Callable[[], object],
+        size: int = 2,
+        max_pages: int = 50,
+        acquire_timeout: float = 120.0,
+    ):
+        self.driver_factory = driver_factory
+        self.size = max(1, int(size))
+        self.max_pages = max(1, int(max_pages))
+        self.acquire_timeout = acquire_timeout
+        self.logger = logging.getLogger(__name__)
+
+        self._idle: "queue.LifoQueue[BrowserSession]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._sessions: List[BrowserSession] = []
+        self._closed = False
+
+    @contextmanager
+    def session(self):
+        """ブラウザを借りて返すコンテキストマネージャ（例外時は破棄）"""
+        browser = self.acquire()
+        try:
+            yield browser.driver
+        except Exception:
+            self.release(browser, discard=True)
+            raise
+        else:
+            self.release(browser)
+
+    def acquire(self) -> BrowserSession:
+        """空いているブラウザを取得（なければ上限まで起動）"""
+        if self._closed:
+            raise RuntimeError("BrowserPool is closed")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("Timed out waiting for a browser session")
+
+        try:
+            while True:
+                try:
+                    browser = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._start()
+                if self._is_healthy(browser):
+                    return browser
+                self.logger.warning("Discarding unhealthy browser session")
+                self._quit(browser)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, browser: BrowserSession, discard: bool = False):
+        """ブラウザを返却（上限ページ数に達したものは終了させる）"""
+        try:
+            browser.pages += 1
+            if discard or self._closed or browser.pages >= self.max_pages:
+                if not discard and browser.pages >= self.max_pages:
+                    self.logger.info(f"Recycling browser session after {browser.pages} pages")
+                self._quit(browser)
+            else:
+                self._idle.put(browser)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """全ブラウザを終了"""
+        self._closed = True
+        with self._lock:
+            sessions = list(self._sessions)
+        for browser in sessions:
+            self._quit(browser)
+
+    def _start(self) -> BrowserSession:
+        browser = BrowserSession(self.driver_factory())
+        with self._lock:
+            self._sessions.append(browser)
+        self.logger.info(f"Started browser session ({len(self._sessions)}/{self.size})")
+        return browser
+
+    def _is_healthy(self, browser: BrowserSession) -> bool:
+        try:
+            return browser.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _quit(self, browser: BrowserSession):
+        with self._lock:
+            if browser in self._sessions:
+                self._sessions.remove(browser)
+        try:
+            browser.driver.quit()
+        except Exception as e:
+            self.logger.debug(f"Error quitting browser: {e}")
@@ -0,0 +1,120 @@
+# scraper/cache.py - 条件付きGET用のバリデータ・本文ダイジェストキャッシュ
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class FetchCache:
+    """
+    URLごとの ETag / Last-Modified とサイトごとの本文ダイジェストを
+    ディスクに保存する小さなキャッシュ
+
+    取得時の記録は stage() で保留しておき、イベントの保存・通知まで済んだサイトの分だけ
+    commit() で反映する（途中で失敗したサイトは次回も304・ダイジェスト一致にならず再取得される）。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._data: Dict[str, Dict] = {"validators": {}, "digests": {}}
+        # サイト名 → 反映待ちの (URL, レスポンスヘッダー, ダイジェスト)
+        self._pending: Dict[str, tuple] = {}
+        self.load()
+
+    def load(self):
+        """キャッシュファイルを読み込む（壊れていれば空で開始）"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                for section in self._data:
+                    if isinstance(data.get(section), dict):
+                        self._data[section] = data[section]
+        except Exception as e:
+            self.logger.warning(f"Failed to load fetch cache {self.path}: {e}")
+
+    def save(self):
+        """変更があればキャッシュファイルへ書き出す"""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps(self._data, ensure_ascii=False)
+            self._dirty = False
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.warning(f"Failed to save fetch cache {self.path}: {e}")
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """保存済みバリデータから条件付きリクエストヘッダーを作る"""
+        with self._lock:
+            validators = self._data["validators"].get(url) or {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        return headers
+
+    def store_validators(self, url: str, response_headers) -> None:
+        """レスポンスヘッダーのバリデータを記録する"""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self._lock:
+            if not etag and not last_modified:
+                if self._data["validators"].pop(url, None) is not None:
+                    self._dirty = True
+                return
+            entry = {"etag": etag, "last_modified": last_modified}
+            if self._data["validators"].get(url) != entry:
+                self._data["validators"][url] = entry
+                self._dirty = True
+
+    def digest_matches(self, key: str, digest: str) -> bool:
+        """前回記録したダイジェストと一致するか"""
+        with self._lock:
+            return self._data["digests"].get(key) == digest
+
+    def store_digest(self, key: str, digest: str) -> None:
+        """本文ダイジェストを記録する"""
+        with self._lock:
+            if self._data["digests"].get(key) != digest:
+                self._data["digests"][key] = digest
+                self._dirty = True
+
+    def stage(self, key: str, url: str, response_headers, digest: Optional[str]) -> None:
+        """バリデータとダイジェストを反映待ちとして記録する"""
+        headers = {name: response_headers.get(name) for name in ("ETag", "Last-Modified")}
+        with self._lock:
+            self._pending[key] = (url, headers, digest)
+
+    def commit(self, skip: Iterable[str] = ()) -> None:
+        """反映待ちの記録を反映して保存する（skip のサイトは反映せず捨てる）"""
+        skip = set(skip)
+        with self._lock:
+            entries = [(key, entry) for key, entry in self._pending.items() if key not in skip]
+            self._pending.clear()
+        for key, (url, headers, digest) in entries:
+            self.store_validators(url, headers)
+            if digest is not None:
+                self.store_digest(key, digest)
+        self.save()
+
+    def discard(self) -> None:
+        """反映待ちの記録を捨てる"""
+        with self._lock:
+            self._pending.clear()
@@ -0,0 +1,106 @@
+# scraper/extraction.py - 要素内の1パス抽出プラン
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+from scraper.parsers import iter_descendant_tags
+
+
+class SelectorRule:
+    """
+    「タグ名 / classトークン / class部分一致」の組み合わせで表した単純なセレクター
+
+    例: "h1, h2" → tags={"h1","h2"}、".title" → classes={"title"}、
+    "[class*='desc']" → class_substrings=("desc",)
+    """
+
+    __slots__ = ("tags", "classes", "class_substrings")
+
+    def __init__(
+        self,
+        tags: Sequence[str] = (),
+        classes: Sequence[str] = (),
+        class_substrings: Sequence[str] = (),
+    ):
+        self.tags: FrozenSet[str] = frozenset(tags)
+        self.classes: FrozenSet[str] = frozenset(classes)
+        self.class_substrings: Tuple[str, ...] = tuple(class_substrings)
+
+    def matches(self, name: str, class_list: Sequence[str], class_attr: str) -> bool:
+        if name in self.tags:
+            return True
+        if self.classes and not self.classes.isdisjoint(class_list):
+            return True
+        # 属性セレクターと同じく、複数値のclassは空白で連結した文字列に対して判定する
+        return any(sub in class_attr for sub in self.class_substrings)
+
+
+# タイトル候補（優先順位順）
+TITLE_RULES = [
+    SelectorRule(tags=("h1", "h2", "h3", "h4")),                    # "h1, h2, h3, h4"
+    SelectorRule(classes=("title", "headline", "subject")),         # ".title, .headline, .subject"
+    SelectorRule(class_substrings=("title", "subject")),            # "[class*='title'], [class*='subject']"
+    SelectorRule(tags=("strong", "b")),                             # "strong, b"
+    SelectorRule(tags=("a",)),                                      # "a"
+]
+
+# 内容候補（優先順位順）
+CONTENT_RULES = [
+    SelectorRule(tags=("p",), classes=("content", "description", "summary")),  # "p, .content, .description, .summary"
+    SelectorRule(class_substrings=("desc", "content")),                          # "[class*='desc'], [class*='content']"
+]
+
+# リンク候補
+LINK_RULE = SelectorRule(tags=("a",))
+
+
+class ExtractionPlan:
+    """
+    1回の子孫走査で、各候補セレクターに最初にマッチする要素を集める
+
+    ルールごとの select_one と同じく「文書順で最初にマッチした子孫要素」を返すので、
+    優先順位付きの評価結果は select_one を順番に呼んだ場合と一致する。
+    """
+
+    def __init__(self, title_rules=TITLE_RULES, content_rules=CONTENT_RULES, link_rule=LINK_RULE):
+        self.rules: List[SelectorRule] = list(title_rules) + list(content_rules) + [link_rule]
+        self.title_slots = range(0, len(title_rules))
+        self.content_slots = range(len(title_rules), len(title_rules) + len(content_rules))
+        self.link_slot = len(self.rules) - 1
+
+    def collect(self, el) -> "PlanMatches":
+        found: List[Optional[object]] = [None] * len(self.rules)
+        remaining = len(self.rules)
+        for tag in iter_descendant_tags(el):
+            class_list = tag.get("class") or ()
+            class_attr = " ".join(class_list) if class_list else ""
+            name = tag.name
+            for index, rule in enumerate(self.rules):
+                if found[index] is None and rule.matches(name, class_list, class_attr):
+                    found[index] = tag
+                    remaining -= 1
+            if not remaining:
+                break
+        return PlanMatches(self, found)
+
+
+class PlanMatches:
+    """ExtractionPlan.collect の結果（ルールごとの最初のマッチ）"""
+
+    __slots__ = ("plan", "found")
+
+    def __init__(self, plan: ExtractionPlan, found: List[Optional[object]]):
+        self.plan = plan
+        self.found = found
+
+    def titles(self):
+        """タイトル候補を優先順位順に返す（マッチなしは除く）"""
+        return [self.found[i] for i in self.plan.title_slots if self.found[i] is not None]
+
+    def contents(self):
+        """内容候補を優先順位順に返す（マッチなしは除く）"""
+        return [self.found[i] for i in self.plan.content_slots if self.found[i] is not None]
+
+    def link(self):
+        return self.found[self.plan.link_slot]
+
+
+DEFAULT_PLAN = ExtractionPlan()
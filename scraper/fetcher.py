@@ -1,11 +1,23 @@
 # scraper/fetcher.py - JavaScript対応改良版
+import hashlib
+import itertools
 import logging
+import re
+import threading
 import time
-from typing import List, Dict, Optional
-from urllib.parse import urljoin
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Dict, Optional
+from urllib.parse import urljoin, urlparse
 
 import requests
-from bs4 import BeautifulSoup
+
+from scraper.browser_pool import BrowserPool
+from scraper.cache import FetchCache
+from scraper.extraction import DEFAULT_PLAN, PlanMatches
+from scraper.parsers import DEFAULT_BACKEND, get_backend
+from scraper.snapshot import SnapshotStore
+from utils.ratelimit import CircuitBreaker, TokenBucket
+from utils.urls import identity_url
 
 # Selenium（オプション、JavaScript必須サイト用）
 try:
@@ -14,6 +26,7 @@ try:
     from selenium.webdriver.common.by import By
     from selenium.webdriver.support.ui import WebDriverWait
     from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
     SELENIUM_AVAILABLE = True
 except ImportError:
     SELENIUM_AVAILABLE = False
@@ -24,7 +37,27 @@ class EventFetcher:
     改良版EventFetcher - JavaScript動的サイト対応
     """
 
-    def __init__(self, use_selenium=False, max_retries: int = 3):
+    def __init__(
+        self,
+        use_selenium=False,
+        max_retries: int = 3,
+        concurrent_requests: int = 1,
+        cache_path: Optional[str] = None,
+        volatile_patterns: Optional[List[str]] = None,
+        parser_backend: str = DEFAULT_BACKEND,
+        browser_pool_size: int = 2,
+        browser_max_pages: int = 50,
+        selenium_wait_timeout: float = 10.0,
+        host_rate: float = 1.0,
+        host_burst: int = 2,
+        circuit_failure_threshold: int = 3,
+        circuit_cooldown: float = 1800.0,
+        circuit_initial_cooldown: Optional[float] = None,
+        circuit_store=None,
+        streaming: bool = False,
+        max_response_bytes: Optional[int] = None,
+        snapshot: Optional[SnapshotStore] = None,
+    ):
         self.session = requests.Session()
         self.session.headers.update({
             "User-Agent": (
@@ -35,13 +68,41 @@ class EventFetcher:
         })
         self.logger = logging.getLogger(__name__)
         self.max_retries = max_retries
+        self.concurrent_requests = max(1, int(concurrent_requests or 1))
+        # 記録・再生（record/replay）用のスナップショット
+        self.snapshot = snapshot
+        # 条件付きGET用のバリデータキャッシュ（パス未指定なら無効）
+        # 記録・再生中は毎回完全なレスポンスを扱うため使わない
+        self.cache = FetchCache(cache_path) if cache_path and snapshot is None else None
+        # 本文ダイジェスト計算前に取り除く揮発トークン（CSRF・タイムスタンプ等）
+        self.volatile_patterns = [re.compile(p) for p in (volatile_patterns or [])]
+        # HTMLパーサーバックエンド（サイト設定の "parser" で個別に上書き可能）
+        self.parser_backend = parser_backend
+        # ストリーミング抽出（max_items件で打ち切り）とレスポンスサイズ上限
+        self.streaming = streaming
+        self.max_response_bytes = max_response_bytes
+        # サイクルごとの統計（304 / 本文未変更でスキップしたサイト数）
+        self._stats_lock = threading.Lock()
+        self.cycle_stats: Dict[str, int] = {"not_modified": 0, "unchanged": 0, "circuit_open": 0}
+        # ホスト単位のレート制限とサーキットブレーカー（circuit_store があれば状態を永続化）
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=circuit_failure_threshold,
+            cooldown=circuit_cooldown,
+            initial_cooldown=circuit_initial_cooldown,
+            state_store=circuit_store,
+        )
         self.use_selenium = use_selenium and SELENIUM_AVAILABLE
+        self.browser_pool: Optional[BrowserPool] = None
+        self.selenium_wait_timeout = selenium_wait_timeout
         
         if self.use_selenium:
-            self._setup_selenium()
+            self._setup_selenium(browser_pool_size, browser_max_pages)
 
-    def _setup_selenium(self):
-        """Seleniumの設定"""
+    def _setup_selenium(self, pool_size: int, max_pages: int):
+        """Seleniumの設定（ブラウザはプールで使い回す）"""
         try:
             self.chrome_options = Options()
             self.chrome_options.add_argument('--headless')
@@ -49,39 +110,81 @@ class EventFetcher:
             self.chrome_options.add_argument('--disable-dev-shm-usage')
             self.chrome_options.add_argument('--disable-gpu')
             self.chrome_options.add_argument('--window-size=1920,1080')
+            self.browser_pool = BrowserPool(
+                lambda: webdriver.Chrome(options=self.chrome_options),
+                size=pool_size,
+                max_pages=max_pages,
+            )
             self.logger.info("Selenium WebDriver configured")
         except Exception as e:
             self.logger.error(f"Selenium setup failed: {e}")
             self.use_selenium = False
 
     def fetch_all_events(self, target_urls: List[Dict]) -> List[Dict]:
-        """全ターゲットからイベントを取得"""
-        all_events: List[Dict] = []
-        
+        """全ターゲットからイベントを取得（ホスト単位で並列化）"""
         # 有効なサイトのみ処理
         valid_sites = [site for site in target_urls if site.get("enabled", True)]
         self.logger.info(f"Processing {len(valid_sites)} enabled sites")
-        
-        for site in valid_sites:
-            try:
-                # JavaScript必須サイトの処理
-                if site.get("requires_js", False) and self.use_selenium:
-                    events = self.fetch_events_with_selenium(site)
-                else:
-                    events = self.fetch_events_from_site(site)
-                
-                all_events.extend(events)
-                
-                # サイト別の待機時間
-                delay = site.get('delay', 1.0)
+        self.cycle_stats = {"not_modified": 0, "unchanged": 0, "circuit_open": 0}
+        if self.cache:
+            # 前回のサイクルで反映されなかった記録は使わない
+            self.cache.discard()
+        if not valid_sites:
+            return []
+
+        # 同一ホストのサイトは1つのグループにまとめ、グループ内は直列に処理する
+        host_groups: Dict[str, List[int]] = {}
+        for index, site in enumerate(valid_sites):
+            host_groups.setdefault(self._host_key(site), []).append(index)
+
+        results: List[List[Dict]] = [[] for _ in valid_sites]
+        workers = min(self.concurrent_requests, len(host_groups))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as executor:
+            futures = [
+                executor.submit(self._fetch_host_group, valid_sites, indices, results)
+                for indices in host_groups.values()
+            ]
+            for future in futures:
+                future.result()
+
+        self.logger.info(
+            f"Skipped sites this cycle: {self.cycle_stats['not_modified']} not modified, "
+            f"{self.cycle_stats['unchanged']} unchanged body, "
+            f"{self.cycle_stats['circuit_open']} circuit open"
+        )
+
+        # 結果は設定順に連結するので、並列実行でも順序は決定的
+        all_events: List[Dict] = []
+        for events in results:
+            all_events.extend(events)
+        return all_events
+
+    def _fetch_host_group(self, sites: List[Dict], indices: List[int], results: List[List[Dict]]):
+        """同一ホストのサイト群を順番に取得し、リクエスト間にのみ待機する"""
+        replaying = self.snapshot is not None and self.snapshot.replaying
+        for position, index in enumerate(indices):
+            if position > 0 and not replaying:
+                # サイト別の待機時間（直前に取得した同一ホストのサイトの設定）
+                delay = sites[indices[position - 1]].get('delay', 1.0)
                 if delay > 0:
                     time.sleep(delay)
-                    
-            except Exception as e:
-                self.logger.error(f"Unexpected error processing site {site['name']}: {e}")
-                continue
-        
-        return all_events
+            results[index] = self._fetch_site(sites[index])
+
+    def _fetch_site(self, site: Dict) -> List[Dict]:
+        """1サイト分の取得（例外はここで握りつぶす）"""
+        try:
+            # JavaScript必須サイトの処理
+            if site.get("requires_js", False) and self.use_selenium:
+                return self.fetch_events_with_selenium(site)
+            return self.fetch_events_from_site(site)
+        except Exception as e:
+            self.logger.error(f"Unexpected error processing site {site['name']}: {e}")
+            return []
+
+    @staticmethod
+    def _host_key(site: Dict) -> str:
+        """ポライトネス制御の単位となるホスト名"""
+        return (urlparse(site["url"]).hostname or site["url"]).lower()
 
     def fetch_events_with_selenium(self, site: Dict) -> List[Dict]:
         """Seleniumを使ってJavaScript動的サイトから取得"""
@@ -93,24 +196,25 @@ class EventFetcher:
         url = site["url"]
         selector = site["selector"]
         
-        driver = None
         try:
             self.logger.info(f"Fetching with Selenium: {name} - {url}")
             
-            driver = webdriver.Chrome(options=self.chrome_options)
-            driver.get(url)
-            
-            # ページの読み込みを待機
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            time.sleep(3)  # 追加の待機時間
-            
-            # HTMLを取得
-            html_content = driver.page_source
-            soup = BeautifulSoup(html_content, "html.parser")
-            
-            elements = soup.select(selector)
+            with self.browser_pool.session() as driver:
+                driver.get(url)
+
+                # サイトのセレクターに一致する要素が現れるまで待機
+                try:
+                    WebDriverWait(driver, self.selenium_wait_timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+                    )
+                except TimeoutException:
+                    self.logger.warning(f"{name}: Selector not found within {self.selenium_wait_timeout}s")
+
+                # HTMLを取得
+                html_content = driver.page_source
+
+            parser = self._parser_for(site)
+            elements = parser.select(parser.parse(html_content), selector)
             self.logger.info(f"{name}: Found {len(elements)} elements with Selenium")
             
             # フィルタリング処理
@@ -141,18 +245,11 @@ class EventFetcher:
         except Exception as e:
             self.logger.error(f"[{name}] Selenium fetch error: {e}")
             return []
-        finally:
-            if driver:
-                driver.quit()
 
     def fetch_events_from_site(self, site: Dict) -> List[Dict]:
         """通常のrequestsを使った取得（改良版）"""
         name = site["name"]
         url = site["url"]
-        selector = site["selector"]
-        base_url = site.get("base_url")
-        max_items = site.get("max_items")
-        must_include = site.get("link_must_include")
 
         try:
             self.logger.info(f"Fetching: {name} - {url}")
@@ -161,67 +258,231 @@ class EventFetcher:
             if not resp:
                 return []
 
-            soup = BeautifulSoup(resp.text, "html.parser")
-            elements = soup.select(selector)
-            
-            self.logger.info(f"{name}: Found {len(elements)} elements")
-            
-            # 空の場合は代替セレクターを試す
-            if not elements and selector != "a":
-                self.logger.warning(f"{name}: No elements found, trying fallback selector 'a'")
-                elements = soup.select("a")
-                self.logger.info(f"{name}: Fallback found {len(elements)} links")
-
-            # フィルタリング処理
-            if must_include:
-                elements = self._filter_by_keywords(elements, must_include)
-                self.logger.info(f"{name}: Filtered to {len(elements)} elements")
+            # 変更なし（304）ならパースも抽出もしない
+            if resp.status_code == 304:
+                self.logger.info(f"{name}: Not modified, skipping parse")
+                self._count("not_modified")
+                return []
 
-            if isinstance(max_items, int) and max_items > 0:
-                elements = elements[:max_items]
+            # 本文が前回と同一ならパースもハッシュ計算もしない
+            digest = None
+            if self.cache:
+                digest = self._body_digest(resp.text, site)
+                if self.cache.digest_matches(name, digest):
+                    self.logger.info(f"{name}: Body unchanged, skipping parse")
+                    self._count("unchanged")
+                    return []
 
-            results: List[Dict] = []
-            for el in elements:
-                try:
-                    item = self.extract_event_data(el, site, page_url=resp.url, base_url=base_url)
-                    if item and self._is_valid_event(item):
-                        results.append(item)
-                except Exception as e:
-                    self.logger.debug(f"Error extracting data from element: {e}")
-                    continue
+            results = self.extract_events_from_html(resp.text, site, page_url=resp.url)
 
             self.logger.info(f"{name}: {len(results)} valid events extracted")
+
+            # バリデータは保留しておき、保存・通知が済んでから commit_cache() で反映する
+            if self.cache:
+                self.cache.stage(name, url, resp.headers, digest)
             return results
 
         except Exception as e:
             self.logger.error(f"[{name}] fetch error: {e}")
             return []
 
+    def extract_events_from_html(self, html: str, site: Dict, page_url: str) -> List[Dict]:
+        """取得済みHTMLからイベントを抽出（ネットワークアクセスなし）"""
+        name = site["name"]
+        selector = site["selector"]
+        base_url = site.get("base_url")
+        max_items = site.get("max_items")
+        must_include = site.get("link_must_include")
+
+        parser = self._parser_for(site)
+        root = parser.parse(html, parse_only=site.get("parse_only"))
+
+        if site.get("streaming", self.streaming):
+            return self._extract_events_streaming(parser, root, site, page_url)
+
+        elements = parser.select(root, selector)
+
+        self.logger.info(f"{name}: Found {len(elements)} elements")
+
+        # 空の場合は代替セレクターを試す
+        if not elements and selector != "a":
+            self.logger.warning(f"{name}: No elements found, trying fallback selector 'a'")
+            elements = parser.select(root, "a")
+            self.logger.info(f"{name}: Fallback found {len(elements)} links")
+
+        # フィルタリング処理
+        if must_include:
+            elements = self._filter_by_keywords(elements, must_include)
+            self.logger.info(f"{name}: Filtered to {len(elements)} elements")
+
+        if isinstance(max_items, int) and max_items > 0:
+            elements = elements[:max_items]
+
+        results: List[Dict] = []
+        for el in elements:
+            try:
+                item = self.extract_event_data(el, site, page_url=page_url, base_url=base_url)
+                if item and self._is_valid_event(item):
+                    results.append(item)
+            except Exception as e:
+                self.logger.debug(f"Error extracting data from element: {e}")
+                continue
+        return results
+
+    def _extract_events_streaming(self, parser, root, site: Dict, page_url: str) -> List[Dict]:
+        """マッチを文書順に1件ずつ処理し、max_items 件の有効イベントが揃った時点で打ち切る"""
+        name = site["name"]
+        selector = site["selector"]
+        base_url = site.get("base_url")
+        max_items = site.get("max_items")
+        must_include = site.get("link_must_include")
+        limit = max_items if isinstance(max_items, int) and max_items > 0 else None
+
+        matches = parser.iselect(root, selector)
+        first = next(matches, None)
+        # 空の場合は代替セレクターを試す
+        if first is None and selector != "a":
+            self.logger.warning(f"{name}: No elements found, trying fallback selector 'a'")
+            matches = parser.iselect(root, "a")
+            first = next(matches, None)
+        if first is None:
+            return []
+
+        results: List[Dict] = []
+        scanned = 0
+        for el in itertools.chain([first], matches):
+            scanned += 1
+            if must_include and not self._matches_keywords(el, must_include):
+                continue
+            try:
+                item = self.extract_event_data(el, site, page_url=page_url, base_url=base_url)
+                if item and self._is_valid_event(item):
+                    results.append(item)
+            except Exception as e:
+                self.logger.debug(f"Error extracting data from element: {e}")
+                continue
+            if limit and len(results) >= limit:
+                break
+
+        self.logger.info(f"{name}: Scanned {scanned} elements (streaming)")
+        return results
+
+    def _parser_for(self, site: Dict):
+        """サイト設定（"parser"）またはグローバル設定のパーサーバックエンド"""
+        return get_backend(site.get("parser") or self.parser_backend)
+
+    def _body_digest(self, text: str, site: Dict) -> str:
+        """揮発トークンを除去・空白を正規化した本文のダイジェスト"""
+        patterns = self.volatile_patterns + [re.compile(p) for p in site.get("volatile_patterns", [])]
+        for pattern in patterns:
+            text = pattern.sub("", text)
+        normalized = " ".join(text.split())
+        # セレクター変更時に古いダイジェストで誤ってスキップしないよう含めておく
+        combined = f"{site['selector']}\n{normalized}"
+        return hashlib.sha1(combined.encode("utf-8")).hexdigest()
+
+    def _count(self, key: str):
+        """サイクル統計のカウントアップ"""
+        with self._stats_lock:
+            self.cycle_stats[key] = self.cycle_stats.get(key, 0) + 1
+
     def _fetch_with_retry(self, url: str) -> Optional[requests.Response]:
-        """リトライ機能付きの取得"""
+        """
+        リトライ機能付きの取得（ホスト単位のレート制限・サーキットブレーカー付き）
+
+        ブレーカーにはリトライ込みの1回の取得を1回の失敗として数える（1サイクルの一時的な
+        障害だけでは開かない）。タイムアウト・接続エラーはこのサイクルではリトライしない
+        （落ちているホストで毎回タイムアウト × リトライ回数だけサイクルを待たせない）。
+        """
+        if self.snapshot is not None and self.snapshot.replaying:
+            resp = self.snapshot.replay(url)
+            if resp is None:
+                self.logger.warning(f"No snapshot recorded for {url}")
+            return resp
+
+        host = (urlparse(url).hostname or url).lower()
+        if not self.circuit_breaker.allow(host):
+            self.logger.warning(f"Circuit open for {host}, skipping {url}")
+            self._count("circuit_open")
+            return None
+
+        bucket = self._host_bucket(host)
         for attempt in range(self.max_retries):
+            bucket.acquire()
             try:
-                resp = self.session.get(url, timeout=15)
+                headers = self.cache.conditional_headers(url) if self.cache else None
+                resp = self.session.get(url, timeout=15, headers=headers, stream=True)
                 resp.raise_for_status()
+                self._read_capped_body(resp, url)
+                self.circuit_breaker.record_success(host)
+                if self.snapshot is not None:
+                    self.snapshot.record(url, resp)
                 return resp
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code if e.response is not None else 0
+                if e.response is not None:
+                    # stream=True なので本文を読まずに接続をプールへ返す
+                    e.response.close()
+                self.logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+                if 400 <= status < 500 and status != 429:
+                    # ホストは応答しているのでブレーカーには数えず、リトライもしない
+                    self.circuit_breaker.record_success(host)
+                    return None
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                self.logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+                break
             except requests.exceptions.RequestException as e:
                 self.logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(2 ** attempt)  # 指数バックオフ
+
+            if attempt < self.max_retries - 1:
+                time.sleep(2 ** attempt)  # 指数バックオフ
+        self.circuit_breaker.record_failure(host)
         return None
 
+    def _read_capped_body(self, resp: requests.Response, url: str):
+        """本文を max_response_bytes までに制限して読み込む（超過分は切り捨て）"""
+        if not self.max_response_bytes:
+            resp.content  # 全体を読み込んで接続を解放する
+            return
+
+        chunks = []
+        size = 0
+        try:
+            for chunk in resp.iter_content(chunk_size=64 * 1024):
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= self.max_response_bytes:
+                    self.logger.warning(
+                        f"Response from {url} exceeds {self.max_response_bytes} bytes, truncating"
+                    )
+                    break
+        finally:
+            resp.close()
+        # 以降は通常どおり resp.text / resp.content で読めるようにする
+        resp._content = b"".join(chunks)[:self.max_response_bytes]
+        resp._content_consumed = True
+
+    def _host_bucket(self, host: str) -> TokenBucket:
+        """ホストごとのトークンバケット"""
+        with self._stats_lock:
+            bucket = self._host_buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.host_rate, self.host_burst)
+                self._host_buckets[host] = bucket
+            return bucket
+
     def _filter_by_keywords(self, elements, keywords: List[str]):
         """キーワードによるフィルタリング"""
-        filtered = []
-        for el in elements:
-            link_el = el if el.name == "a" else el.select_one("a")
-            href = (link_el.get("href") if link_el else "") or ""
-            text = (link_el.get_text(" ", strip=True) if link_el else el.get_text(" ", strip=True)) or ""
-            
-            combined = (href + " " + text).lower()
-            if any(keyword.lower() in combined for keyword in keywords):
-                filtered.append(el)
-        return filtered
+        return [el for el in elements if self._matches_keywords(el, keywords)]
+
+    def _matches_keywords(self, el, keywords: List[str]) -> bool:
+        """要素のリンク先・テキストにキーワードが含まれるか"""
+        link_el = el if el.name == "a" else el.select_one("a")
+        href = (link_el.get("href") if link_el else "") or ""
+        text = (link_el.get_text(" ", strip=True) if link_el else el.get_text(" ", strip=True)) or ""
+
+        combined = (href + " " + text).lower()
+        return any(keyword.lower() in combined for keyword in keywords)
 
     def _is_valid_event(self, event: Dict) -> bool:
         """イベントデータの妥当性チェック"""
@@ -241,22 +502,29 @@ class EventFetcher:
     ) -> Optional[Dict]:
         """要素からイベントデータを抽出（改良版）"""
         try:
+            # 子孫要素を1回だけ走査して各候補を集める
+            matches = DEFAULT_PLAN.collect(el)
+
             # タイトル抽出の改良
-            title = self._extract_title(el)
+            title = self._extract_title(el, matches)
             if not title:
                 return None
 
             # 内容抽出
-            content = self._extract_content(el)
+            content = self._extract_content(el, matches)
 
             # URL抽出と正規化
-            event_url = self._extract_and_normalize_url(el, page_url, base_url)
+            event_url = self._extract_and_normalize_url(el, page_url, base_url, matches)
+
+            # 同一性判定用の正規化URL（一覧ページ自身へのリンクは個別のイベントを表さないので使わない）
+            canonical_url = identity_url(event_url, site, page_url)
 
             return {
                 "site_name": site["name"],
                 "title": title[:200],  # 長さ制限
                 "content": content[:500] if content else "",
                 "url": event_url,
+                "canonical_url": canonical_url,
                 "fetched_at": time.time()
             }
 
@@ -264,23 +532,15 @@ class EventFetcher:
             self.logger.debug(f"Extract error for {site['name']}: {e}")
             return None
 
-    def _extract_title(self, el) -> Optional[str]:
+    def _extract_title(self, el, matches: Optional[PlanMatches] = None) -> Optional[str]:
         """タイトル抽出"""
-        # 優先順位付きのセレクター
-        title_selectors = [
-            "h1, h2, h3, h4",
-            ".title, .headline, .subject",
-            "[class*='title'], [class*='subject']",
-            "strong, b",
-            "a"
-        ]
-        
-        for selector in title_selectors:
-            title_el = el.select_one(selector)
-            if title_el:
-                title = title_el.get_text(strip=True)
-                if title and len(title) > 2:  # 最低限の長さチェック
-                    return title
+        matches = matches or DEFAULT_PLAN.collect(el)
+
+        # 優先順位付きの候補（セレクターごとに最初にマッチした要素）
+        for title_el in matches.titles():
+            title = title_el.get_text(strip=True)
+            if title and len(title) > 2:  # 最低限の長さチェック
+                return title
         
         # 最後の手段：要素全体のテキスト
         full_text = el.get_text(strip=True)
@@ -290,25 +550,23 @@ class EventFetcher:
         
         return None
 
-    def _extract_content(self, el) -> str:
+    def _extract_content(self, el, matches: Optional[PlanMatches] = None) -> str:
         """内容抽出"""
-        content_selectors = [
-            "p, .content, .description, .summary",
-            "[class*='desc'], [class*='content']"
-        ]
-        
-        for selector in content_selectors:
-            content_el = el.select_one(selector)
-            if content_el:
-                content = content_el.get_text(" ", strip=True)
-                if content and len(content) > 5:
-                    return content
+        matches = matches or DEFAULT_PLAN.collect(el)
+
+        for content_el in matches.contents():
+            content = content_el.get_text(" ", strip=True)
+            if content and len(content) > 5:
+                return content
         
         return ""
 
-    def _extract_and_normalize_url(self, el, page_url: str, base_url: Optional[str]) -> str:
+    def _extract_and_normalize_url(
+        self, el, page_url: str, base_url: Optional[str], matches: Optional[PlanMatches] = None
+    ) -> str:
         """URL抽出と正規化"""
-        link_el = el.select_one("a")
+        matches = matches or DEFAULT_PLAN.collect(el)
+        link_el = matches.link()
         if not link_el:
             return ""
         
@@ -329,8 +587,19 @@ class EventFetcher:
         except:
             return ""
 
+    def commit_cache(self, skip_sites: Iterable[str] = ()):
+        """保留中のバリデータ・ダイジェストを反映する（skip_sites のサイトは次回も再取得させる）"""
+        if self.cache:
+            self.cache.commit(skip_sites)
+
     def close(self):
-        """リソースのクリーンアップ"""
+        """リソースのクリーンアップ（反映済みのキャッシュのみ保存）"""
+        if self.cache:
+            self.cache.save()
+        if self.browser_pool:
+            self.browser_pool.close()
+        if self.snapshot:
+            self.snapshot.close()
         if hasattr(self, 'session'):
             self.session.close()
 
@@ -0,0 +1,248 @@
+# scraper/parsers.py - HTMLパーサーバックエンドの切り替え
+import itertools
+import logging
+from typing import Dict, Iterator, List, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+
+# lxml（オプション、BeautifulSoupのツリービルダーとして使用）
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+# selectolax（オプション、lexbor Cエンジン）
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = "html.parser"
+
+
+class SoupBackend:
+    """
+    BeautifulSoupベースのバックエンド（html.parser / lxml）
+    """
+
+    def __init__(self, features: str):
+        self.name = features
+        self.features = features
+
+    def parse(self, html: str, parse_only: Optional[Dict] = None):
+        # parse_only（SoupStrainerの引数）を指定すると該当部分だけをツリー化する
+        strainer = _soup_strainer(parse_only) if parse_only else None
+        return BeautifulSoup(html, self.features, parse_only=strainer)
+
+    def select(self, root, selector: str) -> List:
+        return root.select(selector)
+
+    def iselect(self, root, selector: str) -> Iterator:
+        """マッチした要素を文書順に1つずつ返す（必要な件数で打ち切れる）"""
+        return root.css.iselect(selector)
+
+
+def _class_matcher(wanted):
+    """class 属性のいずれかの値が wanted に含まれるか（CSSの .name と同じ判定）"""
+    wanted = {wanted} if isinstance(wanted, str) else set(wanted)
+    return lambda value: bool(value) and not wanted.isdisjoint(value.split())
+
+
+def _soup_strainer(parse_only: Dict) -> SoupStrainer:
+    """
+    parse_only から SoupStrainer を作る
+
+    パース中の SoupStrainer は class 属性を分割せずに文字列全体と比べるため、
+    class="list news_list" の要素に class_="list" が一致しない。class の指定は
+    値ごとに照合する関数に置き換えて、select() の ".list" と同じ要素に一致させる。
+    """
+    kwargs = dict(parse_only)
+    attrs = dict(kwargs.pop("attrs", None) or {})
+    if "class_" in kwargs:
+        attrs["class"] = kwargs.pop("class_")
+    if isinstance(attrs.get("class"), (str, list, tuple, set)):
+        attrs["class"] = _class_matcher(attrs["class"])
+    return SoupStrainer(attrs=attrs, **kwargs)
+
+
+class SelectolaxElement:
+    """
+    lexborノードをBeautifulSoupのTagと同じ使い方ができるようにするアダプター
+
+    抽出処理が使う name / get / get_text / select / select_one だけを実装する。
+    テキストはBeautifulSoupと同じ規則（テキストノード単位でstrip、コメント除外）で組み立てる。
+    """
+
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    @property
+    def name(self) -> str:
+        return self.node.tag
+
+    def get(self, key: str, default=None):
+        attributes = self.node.attributes
+        if key not in attributes:
+            return default
+        value = attributes[key] or ""
+        if key == "class":
+            # BeautifulSoupと同様にclassは複数値属性として扱う
+            return value.split()
+        return value
+
+    def get_text(self, separator: str = "", strip: bool = False) -> str:
+        strings = []
+        for node in self.node.traverse(include_text=True):
+            if node.tag != "-text":
+                continue
+            text = node.text_content or ""
+            if strip:
+                text = text.strip()
+                if not text:
+                    continue
+            strings.append(text)
+        return separator.join(strings)
+
+    def select(self, selector: str) -> List["SelectolaxElement"]:
+        # lexborは自ノードもマッチ対象に含めるので、子孫のみに揃える
+        return [SelectolaxElement(n) for n in _unique_nodes(self.node.css(selector)) if n != self.node]
+
+    def select_one(self, selector: str) -> Optional["SelectolaxElement"]:
+        for node in self.node.css(selector):
+            if node != self.node:
+                return SelectolaxElement(node)
+        return None
+
+    def descendant_tags(self):
+        """子孫要素を文書順に返す（テキスト・コメントノードは除く）"""
+        nodes = self.node.traverse(include_text=False)
+        next(nodes, None)  # 自ノード
+        for node in nodes:
+            if not node.tag.startswith("-"):
+                yield SelectolaxElement(node)
+
+
+def iter_descendant_tags(el):
+    """バックエンドを問わず、要素の子孫要素を文書順に返す"""
+    if isinstance(el, SelectolaxElement):
+        return el.descendant_tags()
+    return (node for node in el.descendants if isinstance(node, Tag))
+
+
+def _strainer_selector(parse_only: Dict) -> str:
+    """
+    SoupStrainer の引数（name / id / class_ / attrs）を同じ要素に一致するCSSセレクターにする
+
+    値は文字列・文字列のリスト・True のみ対応（正規表現や関数は不可）。
+    """
+    def values(value) -> List:
+        if value is True or isinstance(value, str):
+            return [value]
+        if isinstance(value, (list, tuple, set)) and all(isinstance(v, str) for v in value):
+            return list(value)
+        raise ValueError(f"unsupported parse_only value for selectolax: {value!r}")
+
+    attrs = dict(parse_only.get("attrs") or {})
+    attrs.update({key.rstrip("_"): value for key, value in parse_only.items() if key not in ("name", "attrs")})
+    alternatives = [[name for name in values(parse_only["name"])] if "name" in parse_only else [""]]
+    for attr, value in attrs.items():
+        options = []
+        for v in values(value):
+            if v is True:
+                options.append(f"[{attr}]")
+            elif attr == "class":
+                options.append(f".{v}")
+            elif attr == "id":
+                options.append(f"#{v}")
+            else:
+                options.append(f'[{attr}="{v}"]')
+        alternatives.append(options)
+    return ", ".join("".join(parts) or "*" for parts in itertools.product(*alternatives))
+
+
+def _strained_html(root, parse_only: Dict) -> str:
+    """parse_only に一致する要素（一致した要素の中の要素は除く）のHTMLを文書順に連結する"""
+    nodes = _unique_nodes(root.css(_strainer_selector(parse_only)))
+    matched = {node.mem_id for node in nodes}
+    kept = []
+    for node in nodes:
+        parent = node.parent
+        while parent is not None and parent.mem_id not in matched:
+            parent = parent.parent
+        if parent is None:
+            kept.append(node.html)
+    return "".join(kept)
+
+
+def _unique_nodes(nodes) -> List:
+    """カンマ区切りセレクターで複数回マッチしたノードを文書順のまま1つにまとめる"""
+    seen = set()
+    unique = []
+    for node in nodes:
+        if node.mem_id not in seen:
+            seen.add(node.mem_id)
+            unique.append(node)
+    return unique
+
+
+class SelectolaxBackend:
+    """
+    selectolax（lexbor）ベースのバックエンド
+    """
+
+    name = "selectolax"
+
+    def parse(self, html: str, parse_only: Optional[Dict] = None):
+        root = LexborHTMLParser(html).root
+        if parse_only:
+            # lexborには部分パースがないので、SoupStrainer と同じ部分だけを取り出したツリーに作り直す
+            # （抽出結果を他のバックエンドと揃え、大きなツリーはすぐ手放す）
+            root = LexborHTMLParser(_strained_html(root, parse_only)).root
+        return SelectolaxElement(root)
+
+    def select(self, root, selector: str) -> List:
+        # ドキュメントルート（html要素）自体もマッチ対象に含める
+        return [SelectolaxElement(n) for n in _unique_nodes(root.node.css(selector))]
+
+    def iselect(self, root, selector: str) -> Iterator:
+        """
+        マッチした要素を文書順に1つずつ返す（max_items 件で打ち切れる）
+
+        lexborの照合はC側で一括に行われるので、ここではアダプターの生成と重複除去だけを遅延させる。
+        """
+        seen = set()
+        for node in root.node.css(selector):
+            if node.mem_id not in seen:
+                seen.add(node.mem_id)
+                yield SelectolaxElement(node)
+
+
+def available_backends() -> List[str]:
+    """利用可能なバックエンド名の一覧"""
+    names = ["html.parser"]
+    if LXML_AVAILABLE:
+        names.append("lxml")
+    if SELECTOLAX_AVAILABLE:
+        names.append("selectolax")
+    return names
+
+
+_BACKENDS: Dict[str, object] = {}
+
+
+def get_backend(name: Optional[str] = None):
+    """名前からバックエンドを取得（未インストールならhtml.parserにフォールバック）"""
+    requested = name or DEFAULT_BACKEND
+    if requested not in _BACKENDS:
+        name = requested
+        if name not in available_backends():
+            logger.warning(f"HTML parser backend '{name}' is not available, falling back to {DEFAULT_BACKEND}")
+            name = DEFAULT_BACKEND
+        _BACKENDS[requested] = SelectolaxBackend() if name == "selectolax" else SoupBackend(name)
+    return _BACKENDS[requested]
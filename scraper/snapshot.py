@@ -0,0 +1,118 @@
+# scraper/snapshot.py - HTTPレスポンスの記録・再生（オフライン実行・ベンチマーク用）
+import hashlib
+import json
+import logging
+import os
+import threading
+import zipfile
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+RECORD = "record"
+REPLAY = "replay"
+
+# 本文は展開済みで保存するので、転送用のヘッダーは除く
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+class SnapshotStore:
+    """
+    レスポンス（ステータス・ヘッダー・本文）を圧縮アーカイブ（zip）に保存・再生する
+
+    URLごとに <sha1>.json（ステータス・ヘッダー）と <sha1>.body（本文）の2エントリを持つ。
+
+    record モードでは取得したレスポンスを記録し、close() でアーカイブに書き出す。
+    replay モードではネットワークにアクセスせず、記録済みのレスポンスを返す。
+    """
+
+    def __init__(self, path: str, mode: str):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown snapshot mode: {mode}")
+        self.path = path
+        self.mode = mode
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict] = {}
+        self._dirty = False
+
+        if os.path.exists(path):
+            self._load()
+        elif mode == REPLAY:
+            raise FileNotFoundError(f"Snapshot archive not found: {path}")
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == REPLAY
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        with zipfile.ZipFile(self.path, "r") as archive:
+            for name in archive.namelist():
+                if not name.endswith(".json"):
+                    continue
+                key = name[:-len(".json")]
+                entry = json.loads(archive.read(name).decode("utf-8"))
+                entry["body"] = archive.read(f"{key}.body")
+                self._entries[key] = entry
+        self.logger.info(f"Loaded {len(self._entries)} snapshots from {self.path}")
+
+    def record(self, url: str, resp: requests.Response):
+        """レスポンスを記録"""
+        entry = {
+            "url": url,
+            "final_url": resp.url,
+            "status": resp.status_code,
+            "headers": {k: v for k, v in resp.headers.items() if k.lower() not in _DROP_HEADERS},
+            "body": resp.content,
+        }
+        with self._lock:
+            self._entries[self._key(url)] = entry
+            self._dirty = True
+
+    def replay(self, url: str) -> Optional[requests.Response]:
+        """記録済みのレスポンスを返す（なければ None）"""
+        with self._lock:
+            entry = self._entries.get(self._key(url))
+        if entry is None:
+            return None
+
+        resp = requests.Response()
+        resp.status_code = entry["status"]
+        resp.headers = CaseInsensitiveDict(entry["headers"])
+        resp.url = entry.get("final_url") or url
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp._content = entry["body"]
+        resp._content_consumed = True
+        return resp
+
+    def bodies(self) -> Dict[str, str]:
+        """URL → 本文テキスト（ベンチマーク用）"""
+        with self._lock:
+            urls = [entry["url"] for entry in self._entries.values()]
+        return {url: self.replay(url).text for url in urls}
+
+    def close(self):
+        """record モードならアーカイブに書き出す"""
+        with self._lock:
+            if self.mode != RECORD or not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for key, entry in entries.items():
+                meta = {k: v for k, v in entry.items() if k != "body"}
+                archive.writestr(f"{key}.json", json.dumps(meta, ensure_ascii=False))
+                archive.writestr(f"{key}.body", entry["body"])
+        os.replace(tmp_path, self.path)
+        self.logger.info(f"Saved {len(entries)} snapshots to {self.path}")
@@ -0,0 +1,5 @@
+# tests/conftest.py - リポジトリ直下のパッケージ（scraper, processor など）を import できるようにする
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
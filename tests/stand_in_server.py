@@ -0,0 +1,100 @@
+# tests/stand_in_server.py - Chat Completions API の代役サーバー（翻訳のテスト・ベンチマーク用）
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+
+class StandInChatHandler(BaseHTTPRequestHandler):
+    """
+    Chat Completions API の代役（翻訳のベンチマーク・テスト用）
+
+    応答ごとに server.latency 秒待ち、直近1秒のリクエストが server.rps_limit を超えたら
+    429 と Retry-After を返す。一括翻訳（JSON）の入力には "JA:" を付けたタイトルを返す。
+    テスト用に以下の設定を持つ:
+      server.fail_first: 最初のN件に 429（Retry-After は server.retry_after 秒）を返す
+      server.error_status: 常にこのステータスのエラーを返す
+      server.drop_titles: このタイトルは初回の応答から省く（2回目以降は返す）
+      server.log: (受信時刻, ステータス, 入力のタイトル一覧) の記録
+    """
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        try:
+            items = json.loads(prompt)
+        except ValueError:
+            items = None
+        titles = [item["title"] for item in items.values()] if items else []
+        now = time.monotonic()
+        with server.lock:
+            status, wait = 200, None
+            while server.window and now - server.window[0] >= 1.0:
+                server.window.popleft()
+            if server.error_status:
+                status = server.error_status
+            elif server.stats["requests"] + server.stats["rate_limited"] < server.fail_first:
+                status, wait = 429, server.retry_after
+            elif server.rps_limit and len(server.window) >= server.rps_limit:
+                status, wait = 429, 1.0 - (now - server.window[0])
+            server.log.append((now, status, titles))
+            if status == 429:
+                server.stats["rate_limited"] += 1
+                return self._reply(429, {"error": {"message": "Rate limit reached", "type": "requests"}}, {
+                    "retry-after": str(max(1, round(wait))), "retry-after-ms": str(int(wait * 1000)),
+                })
+            if status != 200:
+                return self._reply(status, {"error": {"message": "Stand-in server error", "type": "server_error"}})
+            server.window.append(now)
+            server.stats["requests"] += 1
+            dropped = {title for title in titles if title in server.drop_titles}
+            server.drop_titles -= dropped
+
+        time.sleep(server.latency)
+        if items is not None:
+            text = json.dumps({
+                key: {"translated_title": f"JA:{item['title']}", "translated_content": "JA", "summary": "-"}
+                for key, item in items.items() if item["title"] not in dropped
+            }, ensure_ascii=False)
+        else:
+            title = re.search(r"タイトル: (.*)", prompt).group(1)
+            text = f"タイトル（日本語）: JA:{title}\n内容（日本語）: JA\n要約: -"
+        self._reply(200, {
+            "id": "stand-in", "object": "chat.completion", "created": int(time.time()), "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+    def _reply(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_stand_in_server(latency: float, rps_limit: Optional[int]) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInChatHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.rps_limit = rps_limit
+    server.lock = threading.Lock()
+    server.window = deque()
+    server.stats = {"requests": 0, "rate_limited": 0}
+    server.fail_first = 0
+    server.retry_after = 1.0
+    server.error_status = None
+    server.drop_titles = set()
+    server.log = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
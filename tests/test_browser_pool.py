@@ -0,0 +1,204 @@
+# tests/test_browser_pool.py - BrowserPool と Selenium 取得のテスト（ローカルの静的HTTPサーバーを使用）
+import threading
+import urllib.request
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraper.browser_pool import BrowserPool
+
+# 一覧はページ読み込みの 0.5 秒後に JavaScript で描画される（セレクター待機の確認用）
+EVENTS_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body>
+<div id="app"></div>
+<script>
+setTimeout(function () {
+  var html = "";
+  for (var i = 1; i <= 3; i++) {
+    html += '<li class="event"><a href="/event/' + i + '"><h3 class="title">팝업스토어 이벤트 ' + i + '</h3></a></li>';
+  }
+  document.getElementById("app").innerHTML = '<ul class="event-list">' + html + '</ul>';
+}, 500);
+</script>
+</body></html>
+"""
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def static_server(tmp_path_factory):
+    """events.html を配信するローカルHTTPサーバーのベースURL"""
+    root = tmp_path_factory.mktemp("site")
+    (root / "events.html").write_text(EVENTS_PAGE, encoding="utf-8")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=str(root)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class FakeDriver:
+    """WebDriver の代わり（get でローカルサーバーから取得し、page_source を返す）"""
+
+    def __init__(self):
+        self.page_source = ""
+        self.visited = []
+        self.alive = True
+        self.quit_called = False
+
+    def get(self, url):
+        with urllib.request.urlopen(url, timeout=5) as resp:
+            self.page_source = resp.read().decode("utf-8")
+        self.visited.append(url)
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("browser crashed")
+        return 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class CountingFactory:
+    """作ったドライバーを記録するファクトリ"""
+
+    def __init__(self, make=FakeDriver):
+        self.make = make
+        self.drivers = []
+
+    def __call__(self):
+        driver = self.make()
+        self.drivers.append(driver)
+        return driver
+
+
+def fetch(pool, url):
+    with pool.session() as driver:
+        driver.get(url)
+        return driver
+
+
+def test_session_is_reused_across_fetches(static_server):
+    factory = CountingFactory()
+    pool = BrowserPool(factory, size=1, max_pages=10)
+    first = fetch(pool, f"{static_server}/events.html")
+    second = fetch(pool, f"{static_server}/events.html")
+    assert first is second
+    assert len(factory.drivers) == 1
+    assert "event-list" in first.page_source  # スクリプト内の文字列（静的HTMLとして取得できている）
+    pool.close()
+    assert first.quit_called
+
+
+def test_session_is_recycled_after_max_pages(static_server):
+    factory = CountingFactory()
+    pool = BrowserPool(factory, size=1, max_pages=2)
+    drivers = [fetch(pool, f"{static_server}/events.html") for _ in range(5)]
+    # 2ページごとに作り直す: 1,1 / 2,2 / 3
+    assert len(factory.drivers) == 3
+    assert drivers[0] is drivers[1] and drivers[2] is drivers[3]
+    assert drivers[1] is not drivers[2]
+    assert factory.drivers[0].quit_called and factory.drivers[1].quit_called
+    assert not factory.drivers[2].quit_called
+    pool.close()
+
+
+def test_unhealthy_session_is_replaced(static_server):
+    factory = CountingFactory()
+    pool = BrowserPool(factory, size=1, max_pages=10)
+    crashed = fetch(pool, f"{static_server}/events.html")
+    crashed.alive = False  # 待機中にブラウザが落ちた
+
+    replacement = fetch(pool, f"{static_server}/events.html")
+    assert replacement is not crashed
+    assert crashed.quit_called
+    assert replacement.visited == [f"{static_server}/events.html"]
+    pool.close()
+
+
+def test_session_is_discarded_when_fetch_raises(static_server):
+    factory = CountingFactory()
+    pool = BrowserPool(factory, size=1, max_pages=10)
+    with pytest.raises(OSError):
+        fetch(pool, f"{static_server}/missing.html")
+    assert factory.drivers[0].quit_called
+    assert fetch(pool, f"{static_server}/events.html") is factory.drivers[1]
+    pool.close()
+
+
+def test_pool_never_exceeds_size(static_server):
+    factory = CountingFactory()
+    pool = BrowserPool(factory, size=2, max_pages=100)
+    barrier = threading.Barrier(4)
+
+    def worker():
+        barrier.wait()
+        for _ in range(5):
+            fetch(pool, f"{static_server}/events.html")
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    assert len(factory.drivers) <= 2
+    pool.close()
+
+
+# --- 実ブラウザ（Selenium + ヘッドレス Chrome）での取得 ---
+
+@pytest.fixture
+def selenium_fetcher():
+    pytest.importorskip("selenium")
+    from scraper.fetcher import EventFetcher
+
+    fetcher = EventFetcher(use_selenium=True, browser_pool_size=1, browser_max_pages=2, selenium_wait_timeout=10)
+    if not fetcher.use_selenium:
+        pytest.skip("Selenium is not configured")
+    try:
+        fetcher.browser_pool.driver_factory().quit()
+    except Exception as e:
+        fetcher.close()
+        pytest.skip(f"Chrome could not be started: {e}")
+    fetcher.factory = CountingFactory(fetcher.browser_pool.driver_factory)
+    fetcher.browser_pool.driver_factory = fetcher.factory
+    yield fetcher
+    fetcher.close()
+
+
+def selenium_site(base_url):
+    return {
+        "name": "local",
+        "url": f"{base_url}/events.html",
+        "selector": "li.event",
+        "base_url": base_url,
+        "requires_js": True,
+    }
+
+
+def test_selenium_waits_for_selector(selenium_fetcher, static_server):
+    events = selenium_fetcher.fetch_events_with_selenium(selenium_site(static_server))
+    assert [e["title"] for e in events] == [f"팝업스토어 이벤트 {i}" for i in range(1, 4)]
+    assert events[0]["url"] == f"{static_server}/event/1"
+
+
+def test_selenium_reuses_and_recycles_browsers(selenium_fetcher, static_server):
+    for _ in range(5):
+        assert len(selenium_fetcher.fetch_events_with_selenium(selenium_site(static_server))) == 3
+    # max_pages=2 なので 2ページごとに作り直す
+    assert len(selenium_fetcher.factory.drivers) == 3
+
+
+def test_selenium_replaces_crashed_browser(selenium_fetcher, static_server):
+    selenium_fetcher.fetch_events_with_selenium(selenium_site(static_server))
+    selenium_fetcher.factory.drivers[0].quit()  # 待機中のブラウザを外から終了させる
+    assert len(selenium_fetcher.fetch_events_with_selenium(selenium_site(static_server))) == 3
+    assert len(selenium_fetcher.factory.drivers) == 2
@@ -0,0 +1,44 @@
+# tests/test_check_cycle.py - チェックサイクル（新規・更新の判定と保存）のテスト
+import pytest
+
+import main
+from main import KoreaEventBot
+from utils.urls import identity_url
+
+SITE = main.TARGET_URLS[0]
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = KoreaEventBot(db_path=str(tmp_path / "events.db"), translate=False, notify=False)
+    bot.fetched = []
+    monkeypatch.setattr(bot.fetcher, "fetch_all_events", lambda sites: [dict(e) for e in bot.fetched])
+    monkeypatch.setattr(bot.fetcher, "commit_cache", lambda skip_sites=(): None)
+    yield bot
+    bot.close()
+
+
+def make_event(title, content):
+    # 取得時と同じく、同一性判定用の正規化URLを付けておく
+    url = SITE["base_url"].rstrip("/") + "/event/detail/1234"
+    return {"site_name": SITE["name"], "title": title, "content": content, "url": url,
+            "canonical_url": identity_url(url, SITE)}
+
+
+def test_revision_that_fails_the_filter_is_not_revised_again(bot, caplog):
+    bot.fetched = [make_event("팝업스토어 한정 굿즈 선착순 증정", "성수동 팝업스토어 한정판 굿즈")]
+    bot.run_single_check()
+    assert bot.store.query_events()[0][0]["title"] == bot.fetched[0]["title"]
+
+    # 同じURLの内容が大きく変わり、注目ワードがなくなった
+    bot.fetched = [make_event("매장 영업시간 변경 안내", "다음 주부터 영업시간이 변경됩니다")]
+    with caplog.at_level("INFO"):
+        bot.run_single_check()
+    assert "1 revised events" in caplog.text
+    assert bot.store.query_events()[0][0]["title"] == "매장 영업시간 변경 안내"
+
+    caplog.clear()
+    with caplog.at_level("INFO"):
+        bot.run_single_check()
+    assert "0 revised events" in caplog.text
@@ -0,0 +1,82 @@
+# tests/test_circuit_breaker.py - ホスト単位のサーキットブレーカーと取得のリトライのテスト
+import pytest
+import requests
+
+from scraper.fetcher import EventFetcher
+from utils import ratelimit
+from utils.ratelimit import CircuitBreaker
+
+URL = "http://dead.example/events"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "time", clock.time)
+    return clock
+
+
+class DeadSession:
+    """常にタイムアウトするセッション（呼ばれた回数を数える）"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        raise requests.exceptions.ConnectTimeout(f"timed out: {url}")
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fetcher(monkeypatch):
+    fetcher = EventFetcher(max_retries=3, circuit_failure_threshold=3, circuit_cooldown=1800,
+                           circuit_initial_cooldown=300, host_rate=1000, host_burst=1000)
+    fetcher.session = DeadSession()
+    monkeypatch.setattr("scraper.fetcher.time.sleep", lambda seconds: None)
+    yield fetcher
+    fetcher.close()
+
+
+def test_timeout_is_not_retried_within_a_cycle(fetcher, clock):
+    assert fetcher._fetch_with_retry(URL) is None
+    assert fetcher.session.calls == 1
+    # 1サイクルの失敗だけではブレーカーは開かない
+    assert not fetcher.circuit_breaker.is_open("dead.example")
+
+
+def test_breaker_opens_after_failed_cycles_with_short_first_cooldown(fetcher, clock):
+    for _ in range(3):
+        fetcher._fetch_with_retry(URL)
+    assert fetcher.circuit_breaker.is_open("dead.example")
+
+    clock.now += 301
+    assert not fetcher.circuit_breaker.is_open("dead.example")
+
+
+def test_cooldown_doubles_on_failed_trials_up_to_the_maximum(clock):
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=1800, initial_cooldown=300)
+    for _ in range(3):
+        breaker.record_failure("host")
+
+    cooldowns = []
+    for _ in range(5):
+        opened_until = breaker._states["host"]["opened_until"]
+        cooldowns.append(opened_until - clock.now)
+        clock.now = opened_until
+        assert breaker.allow("host")  # ハーフオープンの試行
+        breaker.record_failure("host")
+    assert cooldowns == [300, 600, 1200, 1800, 1800]
+
+    breaker.record_success("host")
+    assert breaker.allow("host") and not breaker.is_open("host")
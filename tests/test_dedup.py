@@ -0,0 +1,72 @@
+# tests/test_dedup.py - 購読プロファイルをまたぐ近似重複のまとめ方のテスト
+import pytest
+
+from db.store import EventStore
+from processor.dedup import NearDuplicateDetector
+from processor.filter import EventFilter
+
+TITLE = "성수동 신상 브랜드 팝업스토어 오픈 안내 봄 시즌 컬렉션"
+CONTENT = "3월 한 달간 성수동에서 봄 시즌 컬렉션을 소개합니다"
+PROFILES = [
+    {"name": "A", "keywords": ["선착순"]},
+    {"name": "B", "keywords": ["굿즈"]},
+]
+
+
+def make_pair():
+    # 同じ告知を2つのサイトが載せ、A の注目ワードは片方、B の注目ワードはもう片方にだけある
+    return [
+        {"event_hash": "a1", "site_name": "site-a", "title": TITLE, "content": CONTENT + " 선착순 입장"},
+        {"event_hash": "b1", "site_name": "site-b", "title": TITLE + "!", "content": CONTENT + " 굿즈 증정"},
+    ]
+
+
+@pytest.fixture
+def interesting():
+    events = EventFilter([], profiles=PROFILES).filter_events(make_pair())
+    assert sorted(e["profiles"][0] for e in events) == ["A", "B"]
+    return events
+
+
+def test_duplicate_profiles_are_merged_into_primary(interesting):
+    primary, duplicates = NearDuplicateDetector().group(interesting)
+
+    assert len(primary) == 1 and len(duplicates) == 1
+    assert duplicates[0]["duplicate_of"] == primary[0]["event_hash"]
+    assert sorted(primary[0]["profiles"]) == ["A", "B"]
+
+
+def test_history_match_only_covers_notified_profiles(interesting):
+    detector = NearDuplicateDetector()
+    first = next(e for e in interesting if e["profiles"] == ["A"])
+    second = next(e for e in interesting if e["profiles"] == ["B"])
+    detector.group([first])
+    detector.remember([first])
+
+    # A にだけ通知した代表と重複していても、B にはまだ届いていないので代表として残す
+    primary, duplicates = detector.group([second])
+    assert primary == [second] and duplicates == []
+    assert second["profiles"] == ["B"]
+
+    # 同じプロファイルだけなら重複としてまとめる
+    again = dict(make_pair()[1], event_hash="b2", site_name="site-c", profiles=["A"])
+    primary, duplicates = detector.group([again])
+    assert primary == [] and duplicates[0]["duplicate_of"] == first["event_hash"]
+
+
+def test_profiles_survive_reload(tmp_path, interesting):
+    store = EventStore(str(tmp_path / "events.db"), prefilter_fp_rate=None)
+    try:
+        detector = NearDuplicateDetector()
+        first = next(e for e in interesting if e["profiles"] == ["A"])
+        detector.group([first])
+        store.save_events([first])
+
+        reloaded = NearDuplicateDetector()
+        reloaded.load(store.load_minhashes())
+    finally:
+        store.close()
+
+    second = next(e for e in interesting if e["profiles"] == ["B"])
+    primary, duplicates = reloaded.group([second])
+    assert primary == [second] and duplicates == []
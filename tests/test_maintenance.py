@@ -0,0 +1,59 @@
+# tests/test_maintenance.py - DBメンテナンス（保持期間・容量上限・削除済みハッシュ）のテスト
+import pytest
+
+from db.maintenance import DatabaseMaintainer
+from db.store import EventStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"), prefilter_fp_rate=None)
+    yield store
+    store.close()
+
+
+def save(store, count, prefix="e"):
+    store.save_events([
+        {"event_hash": f"{prefix}{i}", "site_name": "site", "title": f"이벤트 {i}", "content": "내용 " * 20}
+        for i in range(count)
+    ])
+
+
+def add_tombstones(store, count, pruned_at="CURRENT_TIMESTAMP"):
+    conn = store._connect()
+    with conn:
+        conn.executemany(
+            f"INSERT INTO pruned_events (event_hash, pruned_at) VALUES (?, {pruned_at})",
+            ((f"t{i:064d}",) for i in range(count)),
+        )
+
+
+def count(store, table):
+    return store._connect().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_tombstones_do_not_count_toward_size_cap(store):
+    save(store, 50)
+    add_tombstones(store, 20000)
+    store.incremental_vacuum()
+    event_size = store.database_size() - store.tombstone_size()
+    assert store.tombstone_size() > event_size
+
+    # 削除済みハッシュを含めると上限を超えるが、イベントの分だけなら収まっている
+    maintainer = DatabaseMaintainer(store, retention_days=None, max_size_mb=(event_size + 65536) / 1024 / 1024)
+    stats = maintainer.run_once()
+
+    assert stats["evicted"] == 0
+    assert count(store, "events") == 50
+
+
+def test_old_tombstones_expire(store):
+    add_tombstones(store, 10, pruned_at="datetime('now', '-400 days')")
+    save(store, 3)
+    store.prune_oldest(3)
+    assert count(store, "pruned_events") == 13
+
+    stats = DatabaseMaintainer(store, retention_days=None, max_size_mb=None, tombstone_retention_days=365).run_once()
+
+    assert stats["tombstones"] == 10
+    assert count(store, "pruned_events") == 3
@@ -0,0 +1,56 @@
+# tests/test_store.py - EventStore の期間指定・ページングのテスト
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from db.store import EventStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EventStore(str(tmp_path / "events.db"), prefilter_fp_rate=None)
+    store.save_events([
+        {"event_hash": f"e{hour}", "site_name": "site", "title": f"이벤트 {hour}"} for hour in range(6)
+    ])
+    conn = store._connect()
+    with conn:
+        for hour in range(6):
+            conn.execute(
+                "UPDATE events SET created_at = ? WHERE event_hash = ?",
+                (f"2026-10-01 {hour:02d}:30:00", f"e{hour}"),
+            )
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("since, until", [
+    ("2026-10-01T02:00:00", "2026-10-01T04:00:00"),
+    ("2026-10-01T02:00:00Z", "2026-10-01T04:00:00.000Z"),
+    ("2026-10-01T11:00:00+09:00", "2026-10-01T13:00:00+09:00"),
+    (datetime(2026, 10, 1, 2), datetime(2026, 10, 1, 13, tzinfo=timezone(timedelta(hours=9)))),
+])
+def test_iso_strings_filter_like_datetimes(store, since, until):
+    events, _ = store.query_events(since=since, until=until)
+    assert [e["event_hash"] for e in events] == ["e3", "e2"]
+
+
+def test_date_only_string(store):
+    events, _ = store.query_events(until="2026-10-01")
+    assert events == []
+    events, _ = store.query_events(since="2026-10-01")
+    assert len(events) == 6
+
+
+def test_invalid_timestamp_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.query_events(since="yesterday")
+
+
+def test_cursor_pages_through_all_events(store):
+    seen, cursor = [], None
+    while True:
+        events, cursor = store.query_events(limit=4, cursor=cursor, since="2026-10-01T00:00:00Z")
+        seen += [e["event_hash"] for e in events]
+        if cursor is None:
+            break
+    assert seen == [f"e{hour}" for hour in reversed(range(6))]
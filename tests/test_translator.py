@@ -0,0 +1,108 @@
+# tests/test_translator.py - 一括翻訳の並行送信・レート制限・再送のテスト（ローカルの代役サーバーを使用）
+import pytest
+
+from db.translation_cache import TranslationCache
+from processor.translator import EventTranslator
+from tests.stand_in_server import start_stand_in_server
+
+
+@pytest.fixture
+def server():
+    server = start_stand_in_server(latency=0.02, rps_limit=None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_translator(server, **kwargs):
+    return EventTranslator("stand-in", base_url=f"http://127.0.0.1:{server.server_port}/v1", **kwargs)
+
+
+def make_events(count):
+    return [{"title": f"팝업스토어 이벤트 {i}", "content": "한정 굿즈 선착순 증정"} for i in range(count)]
+
+
+def test_results_keep_input_order(server):
+    server.latency = 0.05
+    events = make_events(30)
+    # 同じ原文は1回だけ送り、結果を共有する
+    events.append(dict(events[0]))
+    result = make_translator(server, concurrency=4, batch_max_events=3).translate_batch(events)
+
+    assert result is events
+    assert [e["translated_title"] for e in result] == [f"JA:{e['title']}" for e in events]
+    assert server.stats["requests"] == 10
+
+
+def test_retry_after_is_honored(server):
+    server.fail_first = 2
+    server.retry_after = 0.4
+    events = make_events(3)
+    translator = make_translator(server, concurrency=2)
+    # 待ち時間は記録だけして実際には待たない（実時間に頼らない）
+    pauses = []
+    translator._pause = pauses.append
+    translator.translate_batch(events)
+
+    assert [status for _, status, _ in server.log] == [429, 429, 200]
+    # Retry-After の 0.4 秒で止める（指数バックオフの 1s / 2s は使わない）
+    assert pauses == [0.4, 0.4]
+    assert all(e["translated_title"] == f"JA:{e['title']}" for e in events)
+
+
+def test_no_429_under_rpm_cap(server):
+    server.rps_limit = 5
+    events = make_events(8)
+    # 1件ずつのバッチを4並行で送っても、毎分120件（毎秒2件）の上限で 429 を受けない
+    # （上限をサーバーの半分以下にして、到着がずれても1秒に5件そろわないようにする）
+    make_translator(server, concurrency=4, batch_max_events=1, requests_per_minute=120).translate_batch(events)
+
+    assert server.stats["rate_limited"] == 0
+    assert server.stats["requests"] == 8
+    assert all(e["translated_title"] == f"JA:{e['title']}" for e in events)
+
+
+def test_api_failure_is_not_resent_as_a_batch(server):
+    server.error_status = 500
+    events = make_events(2)
+    make_translator(server, max_retries=1, batch_max_attempts=3).translate_batch(events)
+
+    # _complete の再送（1回）だけで諦め、バッチとしては再送しない
+    assert len(server.log) == 2
+    assert not any("translated_title" in e for e in events)
+
+
+def test_api_failure_skips_remaining_batches(server):
+    server.error_status = 500
+    events = make_events(4)
+    make_translator(server, concurrency=1, batch_max_events=1, max_retries=0).translate_batch(events)
+
+    assert len(server.log) == 1
+    assert not any("translated_title" in e for e in events)
+
+
+def test_only_missing_ids_are_resent(server):
+    events = make_events(3)
+    server.drop_titles = {events[1]["title"]}
+    make_translator(server).translate_batch(events)
+
+    assert [titles for _, _, titles in server.log] == [[e["title"] for e in events], [events[1]["title"]]]
+    assert all(e["translated_title"] == f"JA:{e['title']}" for e in events)
+
+
+def test_single_and_batch_prompts_do_not_share_cache(server, tmp_path):
+    cache = TranslationCache(str(tmp_path / "translations.db"))
+    try:
+        translator = make_translator(server, cache=cache)
+        translator.translate_batch(make_events(1))
+        assert len(server.log) == 1
+
+        # 行形式のプロンプトの結果は一括翻訳のキャッシュから返さない
+        translator.translate_and_summarize(make_events(1)[0])
+        assert len(server.log) == 2
+
+        translator.translate_batch(make_events(1))
+        translator.translate_and_summarize(make_events(1)[0])
+        assert len(server.log) == 2
+    finally:
+        cache.close()
@@ -0,0 +1,138 @@
+# utils/ratelimit.py - トークンバケットとサーキットブレーカー
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+    """
+    スレッドセーフなトークンバケット（rate トークン/秒、最大 capacity トークン）
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """トークンがあれば消費して True（待たない）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """トークンが貯まるまで待って消費（timeout 秒を超えそうなら False）"""
+        # バケット容量を超える要求は容量分で打ち止めにする（永久に待たないように）
+        tokens = min(tokens, self.capacity)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate if self.rate > 0 else 1.0
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    キー（ホスト）ごとのサーキットブレーカー
+
+    連続 failure_threshold 回失敗するとオープンし、initial_cooldown 秒間はリクエストを止める。
+    クールダウン後は1回だけ試行を許し（ハーフオープン）、成功すれば閉じる。
+    試行も失敗するとクールダウンを倍にして再びオープンする（最長 cooldown 秒。
+    一時的な障害でホストを長く止めず、落ちたままのホストには問い合わせを減らす）。
+    initial_cooldown を省くと最初から cooldown 秒止める。
+    state_store（load_circuit_states / save_circuit_state を持つオブジェクト）を渡すと
+    状態を永続化し、再起動後も引き継ぐ。
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 1800.0, state_store=None,
+                 initial_cooldown: Optional[float] = None):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown = float(cooldown)
+        self.initial_cooldown = min(self.cooldown, float(initial_cooldown)) if initial_cooldown else self.cooldown
+        self.state_store = state_store
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._states: Dict[str, Dict] = {}
+        self._trials: Dict[str, bool] = {}
+
+        if state_store is not None:
+            try:
+                self._states = state_store.load_circuit_states()
+            except Exception as e:
+                self.logger.warning(f"Failed to load circuit breaker state: {e}")
+
+    def allow(self, key: str) -> bool:
+        """リクエストしてよいか"""
+        with self._lock:
+            state = self._states.get(key)
+            if not state or not state["opened_until"]:
+                return True
+            if time.time() < state["opened_until"]:
+                return False
+            # ハーフオープン：同時に1件だけ試行を許す
+            if self._trials.get(key):
+                return False
+            self._trials[key] = True
+            return True
+
+    def is_open(self, key: str) -> bool:
+        with self._lock:
+            state = self._states.get(key)
+            return bool(state and state["opened_until"] and time.time() < state["opened_until"])
+
+    def record_success(self, key: str):
+        with self._lock:
+            self._trials.pop(key, None)
+            state = self._states.get(key)
+            if not state or (not state["failures"] and not state["opened_until"]):
+                return
+            if state["opened_until"]:
+                self.logger.info(f"Circuit closed for {key}")
+            state = {"failures": 0, "opened_until": 0.0}
+            self._states[key] = state
+        self._persist(key, state)
+
+    def record_failure(self, key: str):
+        with self._lock:
+            self._trials.pop(key, None)
+            state = dict(self._states.get(key) or {"failures": 0, "opened_until": 0.0})
+            state["failures"] += 1
+            if state["failures"] >= self.failure_threshold:
+                cooldown = self._cooldown(state["failures"])
+                state["opened_until"] = time.time() + cooldown
+                self.logger.warning(
+                    f"Circuit opened for {key} after {state['failures']} consecutive failures "
+                    f"(cooldown {cooldown:.0f}s)"
+                )
+            self._states[key] = state
+        self._persist(key, state)
+
+    def _cooldown(self, failures: int) -> float:
+        """failure_threshold 回目は initial_cooldown、以降は失敗するたびに倍（最長 cooldown）"""
+        doublings = min(failures - self.failure_threshold, 32)
+        return min(self.cooldown, self.initial_cooldown * 2 ** doublings)
+
+    def _persist(self, key: str, state: Dict):
+        if self.state_store is None:
+            return
+        try:
+            self.state_store.save_circuit_state(key, state["failures"], state["opened_until"])
+        except Exception as e:
+            self.logger.warning(f"Failed to save circuit breaker state for {key}: {e}")
@@ -0,0 +1,81 @@
+# utils/urls.py - イベントURLの正規化（同一性判定用）
+import re
+from typing import Dict, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# 常に取り除く計測用パラメータ
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "yclid", "msclkid", "igshid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "ref", "ref_src", "spm", "napm", "nclick",
+}
+# この接頭辞で始まるパラメータも取り除く（utm_source など）
+TRACKING_PREFIXES = ("utm_", "pk_", "hsa_")
+
+_DEFAULT_PORTS = {"http": "80", "https": "443"}
+_MULTI_SLASH_RE = re.compile(r"/{2,}")
+
+
+def canonicalize_url(url: str, rules: Optional[Dict] = None) -> str:
+    """
+    URLを正規化する（同じイベントを指すURLが同じ文字列になるように）
+
+    スキーム・ホストの小文字化、既定ポート・フラグメント・末尾スラッシュの除去、
+    計測用パラメータの除去とパラメータの並べ替えを行う。
+
+    rules はサイト設定（TARGET_URLS の要素）で、以下のキーを参照する:
+      "canonical_params": 残すクエリパラメータ（指定時はこれ以外を全て除去）
+      "drop_params": 追加で除去するクエリパラメータ
+    """
+    if not url:
+        return ""
+    rules = rules or {}
+
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    if not parts.scheme or not parts.netloc:
+        return url.strip()
+
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+
+    path = _MULTI_SLASH_RE.sub("/", parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = urlencode(sorted(_kept_params(parts.query, rules)))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+def _kept_params(query: str, rules: Dict) -> Iterable:
+    keep = rules.get("canonical_params")
+    keep = {p.lower() for p in keep} if keep is not None else None
+    drop = {p.lower() for p in rules.get("drop_params", ())}
+
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        key = name.lower()
+        if keep is not None:
+            if key in keep:
+                yield name, value
+            continue
+        if key in TRACKING_PARAMS or key in drop or key.startswith(TRACKING_PREFIXES):
+            continue
+        yield name, value
+
+
+def identity_url(url: str, rules: Optional[Dict] = None, page_url: Optional[str] = None) -> str:
+    """
+    イベントの同一性判定に使う正規化URL
+
+    一覧ページ自身（サイト設定の "url"、または取得したページのURL）へのリンクは
+    個別のイベントを表さないので "" を返す（タイトルで判定させる）。
+    取得時と DB の移行時で同じ結果になるよう、どちらもこの関数を使う。
+    """
+    canonical = canonicalize_url(url, rules)
+    if not canonical:
+        return ""
+    listing_pages = {canonicalize_url(u, rules) for u in ((rules or {}).get("url"), page_url) if u}
+    return "" if canonical in listing_pages else canonical